@@ -174,6 +174,17 @@ async function main() {
       'src/cli.py',
       'src/search.py',
       'src/ingest.py',
+      'src/ratelimit.py',
+      'src/cache.py',
+      'src/language.py',
+      'src/storage.py',
+      'src/hnsw.py',
+      'src/server.py',
+      'src/client.py',
+      'src/providers.py',
+      'src/bench.py',
+      'src/tracing.py',
+      'src/chunker.py',
     ];
     
     const baseUrl = 'https://raw.githubusercontent.com/hohre12/knowledge-search-skill/main';
@@ -406,6 +406,17 @@ FILES=(
     "src/cli.py"
     "src/search.py"
     "src/ingest.py"
+    "src/ratelimit.py"
+    "src/cache.py"
+    "src/language.py"
+    "src/storage.py"
+    "src/hnsw.py"
+    "src/server.py"
+    "src/client.py"
+    "src/providers.py"
+    "src/bench.py"
+    "src/tracing.py"
+    "src/chunker.py"
 )
 
 # Download files from GitHub
@@ -417,7 +428,7 @@ mkdir -p src
 if command -v gum &> /dev/null; then
     # Use gum spinner for interactive progress
     gum spin --spinner dot --title "Downloading $TOTAL files..." -- sh -c '
-        for file in "SKILL.md" "README.md" "requirements.txt" "schema.sql" "setup.py" "src/__init__.py" "src/cli.py" "src/search.py" "src/ingest.py"; do
+        for file in "SKILL.md" "README.md" "requirements.txt" "schema.sql" "setup.py" "src/__init__.py" "src/cli.py" "src/search.py" "src/ingest.py" "src/ratelimit.py" "src/cache.py" "src/language.py" "src/storage.py" "src/hnsw.py" "src/server.py" "src/client.py" "src/providers.py" "src/bench.py" "src/tracing.py" "src/chunker.py"; do
             curl -sSL "'"$BASE_URL"'/$file" -o "$file"
         done
     '
@@ -7,15 +7,111 @@ CREATE EXTENSION IF NOT EXISTS vector;
 -- embeddings 테이블 생성
 CREATE TABLE IF NOT EXISTS embeddings (
   id BIGSERIAL PRIMARY KEY,
-  embedding vector(1536),  -- OpenAI text-embedding-3-small: 1536 차원
+  embedding vector(1536),  -- OpenAI text-embedding-3-small: 1536 차원 (embedding.dimensions를 바꾸면 set_embedding_dimensions)
   metadata JSONB NOT NULL,
   created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- 자주 쓰는 메타데이터의 typed 컬럼 (필터, 증분 임베딩 조회, 최신성 검색)
+-- metadata JSONB가 원본이고, INSERT/metadata UPDATE 시 trigger가 컬럼을 채운다.
+-- 기존 행은 backfill_typed_columns()로 채운다 (`ks backfill`, ks ingest도 시작 시 실행).
+ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS source text;
+ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS author text;
+ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS path text;
+ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS date date;
+ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS category text;
+ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS file_hash text;
+ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS chunk_index int;
+
+-- metadata->>'date' (YYYY-MM-DD...) → date (날짜 형식이 아니면 NULL)
+CREATE OR REPLACE FUNCTION metadata_date(value text)
+RETURNS date
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+BEGIN
+  IF value ~ '^\d{4}-\d{2}-\d{2}' THEN
+    RETURN left(value, 10)::date;
+  END IF;
+  RETURN NULL;
+EXCEPTION WHEN others THEN
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION embeddings_typed_columns()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.source := NEW.metadata->>'source';
+  NEW.author := NEW.metadata->>'author';
+  NEW.path := NEW.metadata->>'path';
+  NEW.date := metadata_date(NEW.metadata->>'date');
+  NEW.category := NEW.metadata->>'category';
+  NEW.file_hash := NEW.metadata->>'file_hash';
+  NEW.chunk_index := CASE WHEN NEW.metadata->>'chunk_index' ~ '^\d+$'
+                          THEN (NEW.metadata->>'chunk_index')::int END;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS embeddings_typed_columns ON embeddings;
+CREATE TRIGGER embeddings_typed_columns
+  BEFORE INSERT OR UPDATE OF metadata ON embeddings
+  FOR EACH ROW EXECUTE FUNCTION embeddings_typed_columns();
+
+-- 기존 행 backfill (batch_size개씩, 채운 행 수 반환 - 0이 될 때까지 호출)
+-- metadata를 그대로 다시 써서 trigger가 컬럼을 채우게 한다.
+-- path IS NULL이 "아직 안 채움" 표시다. metadata의 path가 없거나 null인 행은 채워도
+-- NULL이므로 제외한다 (제외하지 않으면 매 배치 다시 골라져 끝나지 않는다).
+CREATE OR REPLACE FUNCTION backfill_typed_columns(batch_size int DEFAULT 1000)
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  updated int;
+BEGIN
+  UPDATE embeddings SET metadata = embeddings.metadata
+  WHERE embeddings.id IN (
+    SELECT pending.id FROM embeddings AS pending
+    WHERE pending.path IS NULL AND pending.metadata->>'path' IS NOT NULL
+    LIMIT batch_size
+  );
+
+  GET DIAGNOSTICS updated = ROW_COUNT;
+  RETURN updated;
+END;
+$$;
+
 -- 메타데이터 인덱스 (빠른 필터링)
-CREATE INDEX IF NOT EXISTS idx_metadata_source ON embeddings USING GIN ((metadata->'source'));
-CREATE INDEX IF NOT EXISTS idx_metadata_author ON embeddings USING GIN ((metadata->'author'));
-CREATE INDEX IF NOT EXISTS idx_metadata_path ON embeddings USING GIN ((metadata->'path'));
+-- typed 컬럼의 B-tree 인덱스 (이전 버전의 JSONB 표현식/GIN 인덱스는 삭제)
+DROP INDEX IF EXISTS idx_metadata_source;
+DROP INDEX IF EXISTS idx_metadata_author;
+DROP INDEX IF EXISTS idx_metadata_path;
+DROP INDEX IF EXISTS idx_metadata_source_text;
+DROP INDEX IF EXISTS idx_metadata_author_text;
+DROP INDEX IF EXISTS idx_metadata_category_text;
+DROP INDEX IF EXISTS idx_metadata_date_text;
+DROP INDEX IF EXISTS idx_metadata_path_text;
+CREATE INDEX IF NOT EXISTS idx_embeddings_source ON embeddings (source);
+CREATE INDEX IF NOT EXISTS idx_embeddings_author ON embeddings (author);
+CREATE INDEX IF NOT EXISTS idx_embeddings_category ON embeddings (category);
+CREATE INDEX IF NOT EXISTS idx_embeddings_date ON embeddings (date);
+
+-- 경로 조회 인덱스 (증분 임베딩: path 접두사 검색, path 단위 교체, path + file_hash 삭제)
+-- chunk_index를 붙여 파일의 청크를 순서대로 읽을 수도 있다
+CREATE INDEX IF NOT EXISTS idx_embeddings_path ON embeddings (path text_pattern_ops, file_hash, chunk_index);
+
+-- 전문 검색(lexical) 컬럼 + 인덱스 (하이브리드 검색: search_lexical)
+-- 원문(text_original)과 번역(text)을 함께 색인한다. 'simple' 설정은 형태소 분석 없이
+-- 공백/구두점 단위로 나누므로 식별자, 에러 메시지, 고유명사가 그대로 토큰이 된다.
+-- (기존 테이블에 추가하면 한 번 테이블을 다시 쓴다)
+ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS fts tsvector
+  GENERATED ALWAYS AS (
+    to_tsvector('simple', COALESCE(metadata->>'text_original', '') || ' ' || COALESCE(metadata->>'text', ''))
+  ) STORED;
+CREATE INDEX IF NOT EXISTS idx_embeddings_fts ON embeddings USING gin (fts);
 
 -- 벡터 유사도 검색 인덱스 (IVFFlat)
 -- lists 파라미터는 문서 개수에 따라 조정 (권장: rows/1000, 최소 10)
@@ -25,12 +121,152 @@ CREATE INDEX IF NOT EXISTS idx_embedding_vector ON embeddings
   WITH (lists = 100);
 
 -- 벡터 유사도 검색 함수
+-- 필터는 모두 SQL 안에서 적용되므로 match_count개를 정확히 돌려준다.
+-- 필터가 없으면 IVFFlat 인덱스로 근사 검색, 필터가 있으면 B-tree 인덱스로
+-- 후보를 좁힌 뒤 정확한 거리 순으로 정렬한다 (IVFFlat 후필터링은
+-- 선택적인 필터에서 결과가 match_count보다 적어질 수 있음).
+-- 필터는 typed 컬럼 (날짜 범위는 YYYY-MM-DD 문자열을 date로 비교)
+-- include_text = false이면 metadata에서 text/text_original을 빼고 돌려준다 (lean 행).
+-- 검색 클라이언트는 최종 top-k의 본문만 get_chunk_texts로 가져온다.
+DROP FUNCTION IF EXISTS search_embeddings(vector, float, int, text, text);
+DROP FUNCTION IF EXISTS search_embeddings(vector, float, int, text, text, text, text, text);
+
 CREATE OR REPLACE FUNCTION search_embeddings(
   query_embedding vector(1536),
   match_threshold float DEFAULT 0.5,
   match_count int DEFAULT 10,
   filter_source text DEFAULT NULL,
-  filter_author text DEFAULT NULL
+  filter_author text DEFAULT NULL,
+  filter_category text DEFAULT NULL,
+  filter_date_from text DEFAULT NULL,
+  filter_date_to text DEFAULT NULL,
+  include_text boolean DEFAULT true
+)
+RETURNS TABLE (
+  id bigint,
+  similarity float,
+  metadata jsonb,
+  created_at timestamptz
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF filter_source IS NULL AND filter_author IS NULL AND filter_category IS NULL
+     AND filter_date_from IS NULL AND filter_date_to IS NULL THEN
+    RETURN QUERY
+    SELECT
+      embeddings.id,
+      1 - (embeddings.embedding <=> query_embedding) AS similarity,
+      CASE WHEN include_text THEN embeddings.metadata ELSE embeddings.metadata - 'text' - 'text_original' END AS metadata,
+      embeddings.created_at
+    FROM embeddings
+    WHERE (1 - (embeddings.embedding <=> query_embedding)) >= match_threshold
+    ORDER BY embeddings.embedding <=> query_embedding
+    LIMIT match_count;
+  ELSE
+    RETURN QUERY
+    WITH filtered AS MATERIALIZED (
+      SELECT
+        embeddings.id,
+        1 - (embeddings.embedding <=> query_embedding) AS similarity,
+        embeddings.metadata,
+        embeddings.created_at
+      FROM embeddings
+      WHERE
+        (filter_source IS NULL OR embeddings.source = filter_source)
+        AND (filter_author IS NULL OR embeddings.author = filter_author)
+        AND (filter_category IS NULL OR embeddings.category = filter_category)
+        AND (filter_date_from IS NULL OR embeddings.date >= filter_date_from::date)
+        AND (filter_date_to IS NULL OR embeddings.date <= filter_date_to::date)
+    )
+    SELECT
+      filtered.id,
+      filtered.similarity,
+      CASE WHEN include_text THEN filtered.metadata ELSE filtered.metadata - 'text' - 'text_original' END AS metadata,
+      filtered.created_at
+    FROM filtered
+    WHERE filtered.similarity >= match_threshold
+    ORDER BY filtered.similarity DESC
+    LIMIT match_count;
+  END IF;
+END;
+$$;
+
+-- 2단계 검색 (storage.quantization: halfvec / binary, storage.prefix_dimensions)
+-- 작은 HNSW 인덱스(반정밀도, 부호 비트, Matryoshka 임베딩의 앞쪽 차원)로
+-- rescore_count개 후보를 고르고, 원본 embedding으로 유사도를 다시 계산한다.
+-- 원본 IVFFlat 인덱스 대신 작은 인덱스만 메모리에 올리면 된다
+-- (halfvec 1/2, binary 1/32, prefix 256차원 = 1536차원의 1/6).
+-- halfvec / binary_quantize / subvector는 pgvector 0.7 이상이 필요하다
+-- (plpgsql이므로 함수 생성은 이전 버전에서도 되고, 호출할 때 확인된다).
+-- 인덱스는 기본으로 만들지 않는다. config와 같은 설정으로 한 번 만든다:
+--   SELECT create_rescore_index('binary', 256);   -- quantization, prefix_dimensions (NULL 가능)
+-- 최신성 검색(search_recent)은 원본 인덱스를 쓰므로, idx_embedding_vector를 지우면
+-- 시간 관련 쿼리는 전체 스캔이 된다.
+DROP FUNCTION IF EXISTS search_embeddings_quantized(vector, float, int, text, int, boolean);
+
+-- 1차 인덱스 식 (인덱스와 검색 쿼리가 같은 식을 써야 인덱스가 쓰인다)
+-- value: 'embedding' 또는 쿼리 파라미터, dims: 저장된 벡터의 차원
+CREATE OR REPLACE FUNCTION rescore_expression(value text, quantization text, prefix_dimensions int, dims int)
+RETURNS text
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+  scan_dims int := COALESCE(LEAST(prefix_dimensions, dims), dims);
+BEGIN
+  IF scan_dims < dims THEN
+    value := format('subvector(%s, 1, %s)::vector(%s)', value, scan_dims, scan_dims);
+  END IF;
+
+  IF quantization IS NULL THEN
+    RETURN value;
+  ELSIF quantization = 'halfvec' THEN
+    RETURN format('(%s)::halfvec(%s)', value, scan_dims);
+  ELSIF quantization = 'binary' THEN
+    RETURN format('binary_quantize(%s)::bit(%s)', value, scan_dims);
+  END IF;
+  RAISE EXCEPTION 'Unknown quantization: %', quantization;
+END;
+$$;
+
+-- 1차 HNSW 인덱스 만들기 (인덱스 이름 반환, 이미 있으면 그대로)
+-- 만드는 동안 쓰기가 막힌다. 큰 테이블은 반환된 식으로 CREATE INDEX CONCURRENTLY를 직접 실행해도 된다.
+CREATE OR REPLACE FUNCTION create_rescore_index(quantization text DEFAULT NULL, prefix_dimensions int DEFAULT NULL)
+RETURNS text
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  dims int;
+  index_name text := format(
+    'idx_embedding_rescore_%s_%s', COALESCE(quantization, 'vector'), COALESCE(prefix_dimensions::text, 'full')
+  );
+  opclass text := CASE quantization
+    WHEN 'halfvec' THEN 'halfvec_cosine_ops'
+    WHEN 'binary' THEN 'bit_hamming_ops'
+    ELSE 'vector_cosine_ops'
+  END;
+BEGIN
+  -- vector(n)의 typmod = n
+  SELECT atttypmod INTO dims FROM pg_attribute
+  WHERE attrelid = 'embeddings'::regclass AND attname = 'embedding';
+
+  EXECUTE format(
+    'CREATE INDEX IF NOT EXISTS %I ON embeddings USING hnsw ((%s) %s)',
+    index_name, rescore_expression('embedding', quantization, prefix_dimensions, dims), opclass
+  );
+  RETURN index_name;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION search_embeddings_rescored(
+  query_embedding vector(1536),
+  match_threshold float DEFAULT 0.5,
+  match_count int DEFAULT 10,
+  quantization text DEFAULT NULL,
+  prefix_dimensions int DEFAULT NULL,
+  rescore_count int DEFAULT 40,
+  include_text boolean DEFAULT true
 )
 RETURNS TABLE (
   id bigint,
@@ -40,59 +276,389 @@ RETURNS TABLE (
 )
 LANGUAGE plpgsql
 AS $$
+DECLARE
+  candidate_ids bigint[];
+  dims int := vector_dims(query_embedding);
 BEGIN
+  -- HNSW는 ef_search개까지만 돌려주므로 후보 수만큼 넓힌다
+  PERFORM set_config('hnsw.ef_search', GREATEST(rescore_count, 40)::text, true);
+
+  EXECUTE format(
+    'SELECT array_agg(candidates.id) FROM ('
+    '  SELECT embeddings.id FROM embeddings ORDER BY %s %s %s LIMIT $2'
+    ') candidates',
+    rescore_expression('embeddings.embedding', quantization, prefix_dimensions, dims),
+    CASE WHEN quantization = 'binary' THEN '<~>' ELSE '<=>' END,
+    rescore_expression('$1', quantization, prefix_dimensions, dims)
+  ) INTO candidate_ids USING query_embedding, rescore_count;
+
   RETURN QUERY
   SELECT
     embeddings.id,
     1 - (embeddings.embedding <=> query_embedding) AS similarity,
-    embeddings.metadata,
+    CASE WHEN include_text THEN embeddings.metadata ELSE embeddings.metadata - 'text' - 'text_original' END AS metadata,
     embeddings.created_at
   FROM embeddings
-  WHERE 
-    (filter_source IS NULL OR embeddings.metadata->>'source' = filter_source)
-    AND (filter_author IS NULL OR embeddings.metadata->>'author' = filter_author)
+  WHERE embeddings.id = ANY(candidate_ids)
     AND (1 - (embeddings.embedding <=> query_embedding)) >= match_threshold
   ORDER BY embeddings.embedding <=> query_embedding
   LIMIT match_count;
 END;
 $$;
 
+-- 임베딩 차원 바꾸기 (embedding.dimensions, Matryoshka 임베딩 마이그레이션)
+--   SELECT set_embedding_dimensions(512);
+-- 줄일 때는 저장된 벡터의 앞쪽 차원만 남긴다. text-embedding-3-*의 dimensions 축소는
+-- 앞쪽 차원을 잘라 다시 정규화한 것과 같고 코사인 거리는 길이와 무관하므로
+-- 다시 임베딩할 필요가 없다. 늘리는 것은 빈 테이블에서만 된다.
+-- 2단계 검색 인덱스는 지워지므로 create_rescore_index()로 다시 만든다.
+-- (SQL Editor에서 실행, 테이블을 다시 쓰는 동안 잠긴다)
+CREATE OR REPLACE FUNCTION set_embedding_dimensions(dims int)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  current_dims int;
+  index_name text;
+BEGIN
+  SELECT atttypmod INTO current_dims FROM pg_attribute
+  WHERE attrelid = 'embeddings'::regclass AND attname = 'embedding';
+
+  IF dims = current_dims THEN
+    RETURN;
+  END IF;
+  IF dims > current_dims AND EXISTS (SELECT 1 FROM embeddings) THEN
+    RAISE EXCEPTION 'Cannot grow embeddings from % to % dimensions; re-ingest into an empty table', current_dims, dims;
+  END IF;
+
+  FOR index_name IN
+    SELECT indexname FROM pg_indexes
+    WHERE tablename = 'embeddings' AND indexname LIKE 'idx\_embedding\_rescore\_%'
+  LOOP
+    EXECUTE format('DROP INDEX %I', index_name);
+  END LOOP;
+
+  IF dims < current_dims THEN
+    EXECUTE format(
+      'ALTER TABLE embeddings ALTER COLUMN embedding TYPE vector(%s) USING subvector(embedding, 1, %s)::vector(%s)',
+      dims, dims, dims
+    );
+  ELSE
+    EXECUTE format('ALTER TABLE embeddings ALTER COLUMN embedding TYPE vector(%s)', dims);
+  END IF;
+END;
+$$;
+
+-- 전문 검색 함수 (하이브리드 검색의 lexical 후보)
+-- 쿼리 단어 중 하나라도 (접두사로) 포함한 행을 ts_rank_cd 순으로 돌려준다 (OR 검색).
+-- 영어 기능어와 한 글자 토큰은 검색어에서 뺀다 (language.lexical_terms와 같은 규칙:
+-- 'the', 'x', '1' 같은 토큰은 거의 모든 행과 일치한다).
+-- 결과를 벡터 결과와 합칠 수 있도록 쿼리 임베딩과의 유사도도 함께 계산한다.
+-- 필터는 search_embeddings와 같다.
+DROP FUNCTION IF EXISTS search_lexical(text, vector, int, text, text, text, text, text);
+
+CREATE OR REPLACE FUNCTION search_lexical(
+  query_text text,
+  query_embedding vector(1536),
+  match_count int DEFAULT 10,
+  filter_source text DEFAULT NULL,
+  filter_author text DEFAULT NULL,
+  filter_category text DEFAULT NULL,
+  filter_date_from text DEFAULT NULL,
+  filter_date_to text DEFAULT NULL,
+  include_text boolean DEFAULT true
+)
+RETURNS TABLE (
+  id bigint,
+  similarity float,
+  rank float,
+  metadata jsonb,
+  created_at timestamptz
+)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH q AS (
+    -- 단어별 접두사 OR 쿼리 ('삼성전자' → '삼성전자가'도 일치)
+    SELECT COALESCE(
+      to_tsquery('simple', string_agg(quote_literal(lexeme) || ':*', ' | ')),
+      ''::tsquery
+    ) AS tsq
+    FROM unnest(tsvector_to_array(to_tsvector('simple', query_text))) AS lexeme
+    WHERE length(lexeme) >= 2
+      AND lexeme <> ALL (ARRAY[
+        'a', 'about', 'after', 'all', 'also', 'an', 'and', 'any', 'are', 'as', 'at', 'be',
+        'because', 'been', 'but', 'by', 'can', 'could', 'did', 'do', 'does', 'for', 'from',
+        'had', 'has', 'have', 'he', 'her', 'his', 'how', 'i', 'if', 'in', 'into', 'is', 'it',
+        'its', 'just', 'like', 'more', 'my', 'no', 'not', 'of', 'on', 'one', 'or', 'our',
+        'out', 'she', 'so', 'some', 'than', 'that', 'the', 'their', 'them', 'then', 'there',
+        'these', 'they', 'this', 'to', 'up', 'was', 'we', 'were', 'what', 'when', 'which',
+        'who', 'will', 'with', 'would', 'you', 'your'
+      ])
+  )
+  SELECT
+    embeddings.id,
+    1 - (embeddings.embedding <=> query_embedding) AS similarity,
+    ts_rank_cd(embeddings.fts, q.tsq) AS rank,
+    CASE WHEN include_text THEN embeddings.metadata ELSE embeddings.metadata - 'text' - 'text_original' END AS metadata,
+    embeddings.created_at
+  FROM embeddings, q
+  WHERE
+    embeddings.fts @@ q.tsq
+    AND (filter_source IS NULL OR embeddings.source = filter_source)
+    AND (filter_author IS NULL OR embeddings.author = filter_author)
+    AND (filter_category IS NULL OR embeddings.category = filter_category)
+    AND (filter_date_from IS NULL OR embeddings.date >= filter_date_from::date)
+    AND (filter_date_to IS NULL OR embeddings.date <= filter_date_to::date)
+  ORDER BY rank DESC
+  LIMIT match_count;
+$$;
+
+-- 최신성 반영 검색 함수 (시간 관련 쿼리: "최근", "latest" ...)
+-- score = (1 - recency_weight) * similarity + recency_weight * recency
+-- recency = 0.5 ^ (문서 나이(일) / half_life_days), 날짜가 없으면 0
+-- 후보는 유사도 상위 match_count * 5개 (벡터 인덱스) ∪ 최근 2 half-life 안의 문서
+-- (date 인덱스)이다. 그보다 오래된 문서는 recency가 0.25 미만이므로 유사도 상위에
+-- 들지 못하면 순위가 바뀌지 않는다. 벡터 top-k 바로 아래의 최근 문서도 놓치지 않는다.
+DROP FUNCTION IF EXISTS search_recent(vector, float, int, float, float, text, text, text, text, text);
+
+CREATE OR REPLACE FUNCTION search_recent(
+  query_embedding vector(1536),
+  match_threshold float DEFAULT 0.5,
+  match_count int DEFAULT 10,
+  recency_weight float DEFAULT 0.4,
+  half_life_days float DEFAULT 180,
+  filter_source text DEFAULT NULL,
+  filter_author text DEFAULT NULL,
+  filter_category text DEFAULT NULL,
+  filter_date_from text DEFAULT NULL,
+  filter_date_to text DEFAULT NULL,
+  include_text boolean DEFAULT true
+)
+RETURNS TABLE (
+  id bigint,
+  similarity float,
+  recency float,
+  score float,
+  metadata jsonb,
+  created_at timestamptz
+)
+LANGUAGE sql
+STABLE
+AS $$
+  -- NOT MATERIALIZED: 두 후보 쿼리가 각각 벡터 / date 인덱스를 쓰도록 인라인
+  WITH filtered AS NOT MATERIALIZED (
+    SELECT embeddings.*
+    FROM embeddings
+    WHERE
+      (filter_source IS NULL OR embeddings.source = filter_source)
+      AND (filter_author IS NULL OR embeddings.author = filter_author)
+      AND (filter_category IS NULL OR embeddings.category = filter_category)
+      AND (filter_date_from IS NULL OR embeddings.date >= filter_date_from::date)
+      AND (filter_date_to IS NULL OR embeddings.date <= filter_date_to::date)
+  ),
+  candidates AS (
+    (SELECT filtered.id FROM filtered
+     ORDER BY filtered.embedding <=> query_embedding
+     LIMIT match_count * 5)
+    UNION
+    (SELECT filtered.id FROM filtered
+     WHERE filtered.date >= current_date - ceil(half_life_days * 2)::int)
+  ),
+  scored AS (
+    SELECT
+      embeddings.id,
+      1 - (embeddings.embedding <=> query_embedding) AS similarity,
+      COALESCE(power(0.5, GREATEST(current_date - embeddings.date, 0) / half_life_days), 0) AS recency,
+      embeddings.metadata,
+      embeddings.created_at
+    FROM embeddings
+    JOIN candidates ON candidates.id = embeddings.id
+  )
+  SELECT
+    scored.id,
+    scored.similarity,
+    scored.recency,
+    (1 - recency_weight) * scored.similarity + recency_weight * scored.recency AS score,
+    CASE WHEN include_text THEN scored.metadata ELSE scored.metadata - 'text' - 'text_original' END AS metadata,
+    scored.created_at
+  FROM scored
+  WHERE scored.similarity >= match_threshold
+  ORDER BY score DESC
+  LIMIT match_count;
+$$;
+
+-- 검색 결과 본문 조회 함수 (lean 검색 후 최종 top-k만 hydrate)
+CREATE OR REPLACE FUNCTION get_chunk_texts(ids bigint[])
+RETURNS TABLE (
+  id bigint,
+  text text,
+  text_original text
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    embeddings.id,
+    embeddings.metadata->>'text',
+    embeddings.metadata->>'text_original'
+  FROM embeddings
+  WHERE embeddings.id = ANY(ids);
+$$;
+
+-- 저장된 파일 해시 조회 함수 (증분 임베딩)
+-- path_prefix는 LIKE 패턴 접두사 (와일드카드는 호출 측에서 이스케이프)
+CREATE OR REPLACE FUNCTION get_file_hashes(path_prefix text DEFAULT '')
+RETURNS TABLE (
+  path text,
+  file_hash text
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT DISTINCT
+    embeddings.path,
+    embeddings.file_hash
+  FROM embeddings
+  WHERE embeddings.path LIKE path_prefix || '%'
+  ORDER BY 1, 2;
+$$;
+
+-- 파일 단위 교체 저장 함수
+-- new_rows: [{"embedding": [...], "metadata": {...}}, ...]
+-- 같은 path의 기존 행 삭제와 새 행 삽입을 하나의 트랜잭션으로 처리
+CREATE OR REPLACE FUNCTION replace_embeddings(new_rows jsonb)
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  inserted int;
+BEGIN
+  DELETE FROM embeddings
+  WHERE embeddings.path IN (
+    SELECT DISTINCT r->'metadata'->>'path'
+    FROM jsonb_array_elements(new_rows) AS r
+  );
+
+  INSERT INTO embeddings (embedding, metadata)
+  SELECT (r->>'embedding')::vector, r->'metadata'
+  FROM jsonb_array_elements(new_rows) AS r;
+
+  GET DIAGNOSTICS inserted = ROW_COUNT;
+  RETURN inserted;
+END;
+$$;
+
+-- 여러 요청으로 나눠 저장한 파일 확정 (요청 크기 제한을 넘는 큰 파일)
+-- 새 버전 행은 임시 file_hash(staged_hash)로 먼저 추가되어 있다. 임시 행의 file_hash를
+-- new_hash로 바꾼 뒤 같은 path의 나머지 행(이전 버전)을 지우는 작업을 하나의 트랜잭션으로
+-- 처리하므로, 추가 도중에 실패해도 이전 버전은 그대로 남는다. 임시 행을 모두 확정하지
+-- 못하면 (RLS 등) 이전 버전을 지우기 전에 오류를 낸다. 확정한 행 수를 반환한다.
+CREATE OR REPLACE FUNCTION promote_file_version(file_path text, staged_hash text, new_hash text)
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  staged int;
+  promoted_ids bigint[];
+  promoted int;
+BEGIN
+  SELECT COUNT(*) INTO staged
+  FROM embeddings
+  WHERE embeddings.path = file_path
+    AND embeddings.file_hash = staged_hash;
+
+  WITH promoted_rows AS (
+    UPDATE embeddings
+    SET metadata = jsonb_set(embeddings.metadata, '{file_hash}', to_jsonb(new_hash))
+    WHERE embeddings.path = file_path
+      AND embeddings.file_hash = staged_hash
+    RETURNING embeddings.id
+  )
+  SELECT COALESCE(array_agg(id), '{}') INTO promoted_ids FROM promoted_rows;
+
+  promoted := cardinality(promoted_ids);
+  IF promoted = 0 OR promoted <> staged THEN
+    RAISE EXCEPTION 'promote_file_version: promoted % of % staged rows for %', promoted, staged, file_path;
+  END IF;
+
+  -- 같은 hash로 다시 저장한 경우(--force)에도 이전 행이 남지 않도록 id로 구분
+  DELETE FROM embeddings
+  WHERE embeddings.path = file_path
+    AND NOT (embeddings.id = ANY(promoted_ids));
+
+  RETURN promoted;
+END;
+$$;
+
 -- 통계 확인 함수
+-- ks status용 서버 측 집계 (행/벡터를 내려받지 않고 개수와 크기만 반환)
+-- sources/authors/categories/folders: {"값": 개수, ...}
+DROP FUNCTION IF EXISTS get_stats();
+
 CREATE OR REPLACE FUNCTION get_stats()
 RETURNS TABLE (
   total_count bigint,
   sources jsonb,
-  authors jsonb
+  authors jsonb,
+  categories jsonb,
+  folders jsonb,
+  table_size bigint,
+  index_size bigint,
+  last_ingest timestamptz
 )
-LANGUAGE plpgsql
+LANGUAGE sql
+STABLE
 AS $$
-BEGIN
-  RETURN QUERY
   SELECT
-    COUNT(*) as total_count,
-    jsonb_agg(DISTINCT metadata->'source') as sources,
-    jsonb_agg(DISTINCT metadata->'author') as authors
-  FROM embeddings;
-END;
+    (SELECT COUNT(*) FROM embeddings),
+    (SELECT COALESCE(jsonb_object_agg(name, count), '{}'::jsonb)
+       FROM (SELECT COALESCE(source, 'unknown') AS name, COUNT(*) AS count
+             FROM embeddings GROUP BY 1) s),
+    (SELECT COALESCE(jsonb_object_agg(name, count), '{}'::jsonb)
+       FROM (SELECT COALESCE(author, 'unknown') AS name, COUNT(*) AS count
+             FROM embeddings GROUP BY 1) a),
+    (SELECT COALESCE(jsonb_object_agg(name, count), '{}'::jsonb)
+       FROM (SELECT COALESCE(category, 'none') AS name, COUNT(*) AS count
+             FROM embeddings GROUP BY 1) c),
+    (SELECT COALESCE(jsonb_object_agg(name, count), '{}'::jsonb)
+       FROM (SELECT COALESCE(metadata->>'folder', 'unknown') AS name, COUNT(*) AS count
+             FROM embeddings GROUP BY 1) f),
+    pg_total_relation_size('embeddings'),
+    pg_indexes_size('embeddings'),
+    (SELECT MAX(created_at) FROM embeddings);
 $$;
 
 -- Row Level Security (RLS) 설정
 ALTER TABLE embeddings ENABLE ROW LEVEL SECURITY;
 
+-- 정책은 CREATE OR REPLACE가 없으므로 먼저 지운다 (기존 프로젝트에서 이 스크립트를
+-- 다시 실행해도 "policy already exists"로 전체 배치가 롤백되지 않도록)
+
 -- 모든 사용자가 읽을 수 있도록 (API Key로 제어)
+DROP POLICY IF EXISTS "Enable read access for all users" ON embeddings;
 CREATE POLICY "Enable read access for all users" ON embeddings
   FOR SELECT USING (true);
 
 -- 인증된 사용자만 쓸 수 있도록
+DROP POLICY IF EXISTS "Enable insert for authenticated users only" ON embeddings;
 CREATE POLICY "Enable insert for authenticated users only" ON embeddings
   FOR INSERT WITH CHECK (auth.role() = 'authenticated' OR auth.role() = 'service_role');
 
+DROP POLICY IF EXISTS "Enable delete for authenticated users only" ON embeddings;
 CREATE POLICY "Enable delete for authenticated users only" ON embeddings
   FOR DELETE USING (auth.role() = 'authenticated' OR auth.role() = 'service_role');
 
+-- promote_file_version이 임시 행의 file_hash를 바꿀 수 있도록 (insert/delete와 같은 조건)
+DROP POLICY IF EXISTS "Enable update for authenticated users only" ON embeddings;
+CREATE POLICY "Enable update for authenticated users only" ON embeddings
+  FOR UPDATE USING (auth.role() = 'authenticated' OR auth.role() = 'service_role')
+  WITH CHECK (auth.role() = 'authenticated' OR auth.role() = 'service_role');
+
 -- 인덱스 통계 업데이트 (선택적, 대량 삽입 후 실행)
 -- VACUUM ANALYZE embeddings;
 
 COMMENT ON TABLE embeddings IS 'Vector embeddings for knowledge search system';
 COMMENT ON COLUMN embeddings.embedding IS 'OpenAI text-embedding-3-small (1536 dimensions)';
 COMMENT ON COLUMN embeddings.metadata IS 'Document metadata: path, text, author, source, date, visibility';
+COMMENT ON COLUMN embeddings.path IS 'Typed copy of metadata->>''path'' (set by trigger; same for source, author, date, category, file_hash, chunk_index)';
@@ -0,0 +1,590 @@
+"""
+Knowledge Search - 오프라인 벤치마크 (ks bench)
+
+API와 Supabase 없이 KnowledgeIngest / KnowledgeSearch의 성능을 측정한다.
+- StubProviders: 결정적인 임베딩(단어 feature hashing)과 번역(원문 그대로), 지연 시간 설정 가능
+- LatencyStore: Supabase 대신 쓰는 로컬 저장소 + 호출당 지연 시간
+- generate_vault(): 한/영 혼용 노트, 긴 Apple Notes export, 한국어 `Created:` 헤더를 가진 합성 vault
+
+측정값(ingest chunks/sec와 peak RSS, 검색 p50/p95/p99와 peak 할당량)을 baseline JSON으로 저장하고
+다음 실행과 비교해 회귀를 잡는다.
+"""
+
+import contextlib
+import hashlib
+import io
+import json
+import math
+import platform
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from storage import VectorStore
+
+
+DEFAULT_BENCH_DIR = "~/.cache/knowledge-search/bench"
+BASELINE_VERSION = 1
+# 합성 vault 형식 (바뀌면 같은 seed라도 다시 생성)
+VAULT_VERSION = 2
+
+# (섹션, 지표, 클수록 좋은지, 무시할 절대 변화량)
+TRACKED_METRICS = [
+    ("ingest", "chunks_per_sec", True, 0.0),
+    ("chunker", "mb_per_sec", True, 0.0),
+    ("ingest", "peak_rss_mb", False, 5.0),
+    ("search", "p50_ms", False, 1.0),
+    ("search", "p95_ms", False, 1.0),
+    ("search", "p99_ms", False, 1.0),
+    ("search_cached", "p50_ms", False, 1.0),
+    ("search_cached", "p95_ms", False, 1.0),
+    ("search_cached", "p99_ms", False, 1.0),
+    ("search", "peak_alloc_mb", False, 5.0),
+]
+
+
+def stub_embedding(text: str, dim: int) -> List[float]:
+    """
+    결정적인 텍스트 임베딩 (단어 feature hashing, L2 정규화)
+
+    같은 단어를 많이 공유하는 텍스트일수록 코사인 유사도가 높다.
+    """
+    vector = [0.0] * dim
+    for word in re.findall(r"\w+", text.lower()):
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dim
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class StubProviders:
+    """
+    ProviderClients 대용 (네트워크 없음)
+
+    - complete(): 프롬프트의 원문을 그대로 돌려준다 (번역 = 항등 함수)
+    - embed(): stub_embedding()
+    호출마다 설정한 지연 시간만큼 기다려 API 왕복을 흉내 낸다.
+    """
+
+    def __init__(self, dim: int = 1536, embed_latency_ms: float = 0.0, translate_latency_ms: float = 0.0):
+        """
+        초기화
+
+        Args:
+            dim: 임베딩 차원
+            embed_latency_ms: 임베딩 호출당 지연 (ms)
+            translate_latency_ms: 번역 호출당 지연 (ms)
+        """
+        self.dim = dim
+        self.embed_latency_ms = embed_latency_ms
+        self.translate_latency_ms = translate_latency_ms
+        self.embed_calls = 0
+        self.translate_calls = 0
+
+    def complete(self, provider, model, api_key, prompt, max_tokens, temperature=0.3) -> str:
+        self.translate_calls += 1
+        if self.translate_latency_ms:
+            time.sleep(self.translate_latency_ms / 1000)
+
+        # 번역 프롬프트는 "지시문\n\n원문" (검색 쿼리는 "Query: " 접두사)
+        text = prompt.split("\n\n", 1)[-1]
+        return text[len("Query: "):] if text.startswith("Query: ") else text
+
+    def embed(self, provider, model, api_key, texts, input_type=None, dimensions=None) -> List[List[float]]:
+        self.embed_calls += 1
+        if self.embed_latency_ms:
+            time.sleep(self.embed_latency_ms / 1000)
+        return [stub_embedding(text, dimensions or self.dim) for text in texts]
+
+
+class LatencyStore(VectorStore):
+    """Supabase 대용: 다른 저장소(LocalStore)에 호출당 지연 시간을 더한다"""
+
+    def __init__(self, store: VectorStore, latency_ms: float = 0.0):
+        """
+        초기화
+
+        Args:
+            store: 실제로 저장/검색할 저장소
+            latency_ms: 호출당 지연 (ms, 네트워크 왕복 흉내)
+        """
+        self.store = store
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def _call(self, method: str, *args, **kwargs):
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return getattr(self.store, method)(*args, **kwargs)
+
+    def search(self, *args, **kwargs):
+        return self._call("search", *args, **kwargs)
+
+    def recency_search(self, *args, **kwargs):
+        return self._call("recency_search", *args, **kwargs)
+
+    def lexical_search(self, *args, **kwargs):
+        return self._call("lexical_search", *args, **kwargs)
+
+    def fetch_texts(self, *args, **kwargs):
+        return self._call("fetch_texts", *args, **kwargs)
+
+    def replace_rows(self, *args, **kwargs):
+        return self._call("replace_rows", *args, **kwargs)
+
+    def insert_rows(self, *args, **kwargs):
+        return self._call("insert_rows", *args, **kwargs)
+
+    def delete_file(self, *args, **kwargs):
+        return self._call("delete_file", *args, **kwargs)
+
+    def promote_file(self, *args, **kwargs):
+        return self._call("promote_file", *args, **kwargs)
+
+    def file_hashes(self, *args, **kwargs):
+        return self._call("file_hashes", *args, **kwargs)
+
+    def stats(self):
+        return self._call("stats")
+
+    def flush(self):
+        return self.store.flush()
+
+    def backfill_columns(self, *args, **kwargs):
+        return self._call("backfill_columns", *args, **kwargs)
+
+
+# 합성 vault 어휘 (주제별 한/영 단어)
+TOPICS = [
+    ("deployment", "배포", ["pipeline", "rollback", "canary", "release", "staging"], ["파이프라인", "롤백", "카나리", "릴리스", "스테이징"]),
+    ("database", "데이터베이스", ["index", "migration", "replica", "query", "vacuum"], ["인덱스", "마이그레이션", "복제본", "쿼리", "정리"]),
+    ("hiring", "채용", ["interview", "candidate", "offer", "onboarding", "referral"], ["면접", "후보자", "오퍼", "온보딩", "추천"]),
+    ("budget", "예산", ["forecast", "invoice", "vendor", "quarter", "approval"], ["예측", "청구서", "업체", "분기", "승인"]),
+    ("design", "디자인", ["wireframe", "prototype", "feedback", "typography", "palette"], ["와이어프레임", "프로토타입", "피드백", "타이포그래피", "팔레트"]),
+    ("security", "보안", ["token", "audit", "encryption", "incident", "patch"], ["토큰", "감사", "암호화", "사고", "패치"]),
+    ("travel", "여행", ["flight", "hotel", "itinerary", "visa", "luggage"], ["항공편", "호텔", "일정", "비자", "수하물"]),
+    ("research", "연구", ["paper", "experiment", "dataset", "baseline", "ablation"], ["논문", "실험", "데이터셋", "기준선", "절제"]),
+]
+
+FILLER_EN = (
+    "the team discussed next steps and agreed to follow up after the weekly sync with notes "
+    "for everyone who could not attend and a short summary of open questions"
+).split()
+FILLER_KO = "팀은 다음 단계를 논의했고 주간 회의 이후 참석하지 못한 사람을 위해 메모와 남은 질문을 정리하기로 했다".split()
+WEEKDAYS_KO = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"]
+
+
+def _sentence(rng: random.Random, words: List[str], filler: List[str], length: int) -> str:
+    return " ".join(rng.choice(words) if rng.random() < 0.3 else rng.choice(filler) for _ in range(length))
+
+
+def _bilingual_note(rng: random.Random, topic: Tuple, created) -> str:
+    """한/영 혼용 노트 (## 섹션마다 한국어/영어 문단)"""
+    en, ko, en_words, ko_words = topic
+    lines = [f"# {ko} / {en} notes", "", f"Created: {created:%Y-%m-%d}", ""]
+    for section in range(rng.randint(2, 6)):
+        lines += [f"## {rng.choice(ko_words)} {section + 1}", ""]
+        for _ in range(rng.randint(1, 4)):
+            lines.append(_sentence(rng, ko_words, FILLER_KO, rng.randint(8, 20)) + ".")
+            lines.append(_sentence(rng, en_words, FILLER_EN, rng.randint(10, 25)) + ".")
+            lines.append("")
+    return "\n".join(lines)
+
+
+def _english_note(rng: random.Random, topic: Tuple, created) -> str:
+    """영어 체크리스트 (가끔 코드 블록 포함)"""
+    en, _, en_words, _ = topic
+    lines = [f"# {en.title()} checklist", "", f"Created: {created:%Y-%m-%d}", ""]
+    for _ in range(rng.randint(3, 8)):
+        lines.append(f"- {_sentence(rng, en_words, FILLER_EN, rng.randint(6, 14))}")
+    if rng.random() < 0.5:
+        lines += ["", "```bash"]
+        lines += [f"ks {rng.choice(en_words)} --{rng.choice(en_words)} {i}" for i in range(rng.randint(5, 40))]
+        lines += ["```", "", _sentence(rng, en_words, FILLER_EN, rng.randint(20, 60)) + "."]
+    return "\n".join(lines)
+
+
+def _apple_note(rng: random.Random, topic: Tuple, created) -> str:
+    """긴 Apple Notes export (Category 첫 줄, 한국어 Created 헤더, HTML div)"""
+    en, ko, en_words, ko_words = topic
+    hour = created.hour % 12 or 12
+    meridiem = "오후" if created.hour >= 12 else "오전"
+    header = [
+        f"Category: {ko}",
+        f"Created: {created.year}년 {created.month}월 {created.day}일 {WEEKDAYS_KO[created.weekday()]} "
+        f"{meridiem} {hour}:{created.minute:02d}:{created.second:02d}",
+        f"Modified: {created.year}년 {created.month}월 {created.day}일",
+        "---",
+    ]
+    body = []
+    for _ in range(rng.randint(60, 160)):
+        if rng.random() < 0.6:
+            body.append(f"<div>{_sentence(rng, ko_words, FILLER_KO, rng.randint(10, 30))}</div>")
+        else:
+            body.append(f"<div>{_sentence(rng, en_words, FILLER_EN, rng.randint(10, 30))}</div>")
+    return "\n".join(header + body)
+
+
+def generate_vault(path: Path, notes: int = 200, seed: int = 42) -> Dict:
+    """
+    합성 Obsidian vault 생성 (같은 seed면 같은 내용)
+
+    노트 종류: 한/영 혼용 노트 (50%), 영어 체크리스트 (30%),
+    긴 Apple Notes export (20%, 한국어 "Created: 2016년 2월 26일 금요일 오전 2:42:56" 헤더)
+
+    Args:
+        path: vault 디렉터리 (이미 같은 설정으로 만들어져 있으면 그대로 사용)
+        notes: 노트 수
+        seed: 난수 seed
+
+    Returns:
+        {"path", "notes", "bytes", "queries": [검색 쿼리, ...]}
+    """
+    from datetime import datetime, timedelta
+
+    path = Path(path)
+    manifest_path = path / ".bench.json"
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+        if (manifest.get("notes"), manifest.get("seed"), manifest.get("version")) == (notes, seed, VAULT_VERSION):
+            return manifest
+
+    rng = random.Random(seed)
+    path.mkdir(parents=True, exist_ok=True)
+    for old in path.glob("*.md"):
+        old.unlink()
+
+    # 날짜는 고정 기준일에서 역산 (실행 날짜와 무관하게 같은 vault)
+    start = datetime(2025, 1, 1)
+    total_bytes = 0
+    for i in range(notes):
+        topic = TOPICS[i % len(TOPICS)]
+        created = start - timedelta(days=rng.randint(0, 1500), seconds=rng.randint(0, 86399))
+        kind = rng.random()
+        if kind < 0.5:
+            content = _bilingual_note(rng, topic, created)
+        elif kind < 0.8:
+            content = _english_note(rng, topic, created)
+        else:
+            content = _apple_note(rng, topic, created)
+
+        data = content.encode("utf-8")
+        (path / f"note-{i:05d}-{topic[0]}.md").write_bytes(data)
+        total_bytes += len(data)
+
+    queries = []
+    for i in range(max(notes, 1)):
+        en, ko, en_words, ko_words = TOPICS[i % len(TOPICS)]
+        kind = i % 4
+        if kind == 0:
+            queries.append(f"{en} {rng.choice(en_words)}")
+        elif kind == 1:
+            queries.append(f"{ko} {rng.choice(ko_words)} 정리")
+        elif kind == 2:
+            queries.append(f"최근 {ko} {rng.choice(ko_words)}")
+        else:
+            queries.append(f"latest {rng.choice(en_words)} for {en}")
+
+    manifest = {
+        "path": str(path), "notes": notes, "seed": seed, "version": VAULT_VERSION,
+        "bytes": total_bytes, "queries": queries
+    }
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False))
+    return manifest
+
+
+def percentile(values: List[float], p: float) -> float:
+    """nearest-rank 백분위수"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    프로세스 peak RSS (MB, 지원하지 않는 플랫폼은 None)
+
+    프로세스 시작부터의 최댓값이므로 첫 단계(ingest)에만 의미가 있다.
+    뒤 단계는 peak_alloc_mb()로 잰다.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def peak_alloc_mb(func: Callable[[], None]) -> float:
+    """
+    func 실행 중 Python/numpy 할당량의 최댓값 (MB, tracemalloc)
+
+    시작 전에 이미 잡혀 있던 메모리(저장소 memmap, 캐시 등)는 빼고 이 단계에서
+    늘어난 만큼만 잰다. tracemalloc은 할당마다 느려지므로 시간 측정과 따로 실행한다.
+    """
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return round((peak - base) / (1024 * 1024), 1)
+
+
+def legacy_chunks(encoding, text: str, chunk_size: int = 512, chunk_overlap: int = 128,
+                  min_chunk_size: int = 100) -> List[str]:
+    """이전 chunk_text (고정 토큰 창, 창마다 decode) - 청커 벤치마크 비교용"""
+    if len(text.split()) < 200:
+        return [text]
+
+    tokens = encoding.encode(text)
+    return [
+        encoding.decode(tokens[start:start + chunk_size]).strip()
+        for start in range(0, len(tokens), chunk_size - chunk_overlap)
+        if len(tokens[start:start + chunk_size]) >= min_chunk_size
+    ]
+
+
+def run_chunker_benchmark(ingestor, vault: Path, repeat: int = 3) -> Dict:
+    """
+    청커 처리량: KnowledgeIngest.chunk_text vs 이전 토큰 창 방식
+
+    파일은 미리 메모리에 읽어 두고, repeat번 중 가장 빠른 실행을 쓴다.
+    split_code_blocks는 코드 블록(```)이 중간에 잘린 청크 수.
+
+    Args:
+        ingestor: KnowledgeIngest (chunk_size/chunk_overlap/min_chunk_size, encoding)
+        vault: .md 파일 디렉터리
+        repeat: 반복 횟수
+
+    Returns:
+        {"files", "mb_per_sec", "chunks", "mean_tokens", "max_tokens", "split_code_blocks", "legacy": {...}}
+    """
+    texts = [path.read_text(encoding="utf-8") for path in sorted(Path(vault).glob("*.md"))]
+    size_mb = sum(len(text.encode("utf-8")) for text in texts) / (1024 * 1024)
+    encoding = ingestor.encoding
+
+    def measure(split) -> Tuple[float, List[str]]:
+        best = float("inf")
+        chunks = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            chunks = [chunk for text in texts for chunk in split(text)]
+            best = min(best, time.perf_counter() - start)
+        return best, chunks
+
+    def summary(elapsed: float, chunks: List[str]) -> Dict:
+        tokens = [len(encoding.encode(chunk)) for chunk in chunks] or [0]
+        return {
+            "mb_per_sec": round(size_mb / elapsed, 3) if elapsed else 0.0,
+            "chunks": len(chunks),
+            "mean_tokens": round(sum(tokens) / len(tokens), 1),
+            "max_tokens": max(tokens),
+            "split_code_blocks": sum(chunk.count("```") % 2 for chunk in chunks)
+        }
+
+    current = summary(*measure(lambda text: [chunk["text"] for chunk in ingestor.chunk_text(text, {})]))
+    legacy = summary(*measure(lambda text: legacy_chunks(
+        encoding, text, ingestor.chunk_size, ingestor.chunk_overlap, ingestor.min_chunk_size
+    )))
+    return {"files": len(texts), **current, "legacy": legacy}
+
+
+def _bench_config(workdir: Path, vault: Path) -> Dict:
+    """벤치마크용 config (로컬 저장소, stub provider 이름, 임시 캐시)"""
+    return {
+        "embedding": {"provider": "openai", "model": "stub-embedding", "api_key": "stub"},
+        "translation": {"provider": "openai", "model": "stub-translation", "api_key": "stub"},
+        "search": {"default_limit": 10, "min_similarity": 0.0},
+        "storage": {"backend": "local", "path": str(workdir / "store")},
+        "cache": {"enabled": True, "path": str(workdir / "cache")},
+        "sources": {"obsidian": {"path": str(vault.parent)}}
+    }
+
+
+def _latency_summary(timings: List[float], stages: List[Dict[str, float]]) -> Dict:
+    """지연 시간 백분위수 + 쿼리당 평균 단계별 시간 (tracing stages)"""
+    totals: Dict[str, float] = {}
+    for stage in stages:
+        for name, ms in stage.items():
+            totals[name] = totals.get(name, 0.0) + ms
+    return {
+        "queries": len(timings),
+        "mean_ms": round(sum(timings) / len(timings), 2),
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "stages": {name: round(ms / len(timings), 3) for name, ms in totals.items()}
+    }
+
+
+def run_benchmark(
+    notes: int = 200,
+    queries: int = 100,
+    seed: int = 42,
+    embed_latency_ms: float = 0.0,
+    translate_latency_ms: float = 0.0,
+    store_latency_ms: float = 0.0,
+    bench_dir: str = DEFAULT_BENCH_DIR
+) -> Dict:
+    """
+    ingest + 검색 벤치마크 실행
+
+    1. 합성 vault를 새 로컬 저장소에 ingest (chunks/sec) + 청커 처리량 (MB/sec)
+    2. 캐시 없이 검색 (p50/p95/p99, 쿼리당 평균 단계별 시간)
+    3. 같은 쿼리를 캐시를 켜고 두 번 검색해 두 번째 결과 측정 (search_cached)
+
+    peak RSS는 프로세스 전체의 최댓값이라 ingest 단계에만 기록하고, 검색 단계는
+    시간 측정이 끝난 뒤 같은 쿼리를 한 번 더 돌려 peak 할당량(peak_alloc_mb)을 잰다.
+
+    Args:
+        notes: 합성 노트 수
+        queries: 검색 쿼리 수
+        seed: vault/쿼리 seed
+        embed_latency_ms: 임베딩 호출당 지연
+        translate_latency_ms: 번역 호출당 지연
+        store_latency_ms: 저장소 호출당 지연 (Supabase 왕복 흉내)
+        bench_dir: vault와 임시 저장소를 만들 디렉터리
+
+    Returns:
+        {"params", "environment", "ingest", "chunker", "search", "search_cached"}
+    """
+    from ingest import KnowledgeIngest
+    from search import KnowledgeSearch
+
+    bench_path = Path(bench_dir).expanduser()
+    vault = bench_path / f"vault-{notes}-{seed}"
+    manifest = generate_vault(vault, notes=notes, seed=seed)
+    query_list = (manifest["queries"] * (queries // max(len(manifest["queries"]), 1) + 1))[:queries]
+
+    params = {
+        "notes": notes,
+        "queries": queries,
+        "seed": seed,
+        "embed_latency_ms": embed_latency_ms,
+        "translate_latency_ms": translate_latency_ms,
+        "store_latency_ms": store_latency_ms
+    }
+    report = {
+        "version": BASELINE_VERSION,
+        "params": params,
+        "environment": {"python": platform.python_version(), "platform": platform.platform()}
+    }
+
+    with tempfile.TemporaryDirectory(dir=bench_path) as tmp:
+        workdir = Path(tmp)
+        config_path = workdir / "config.json"
+        config_path.write_text(json.dumps(_bench_config(workdir, vault)))
+
+        def stub(component):
+            component.providers = StubProviders(
+                embed_latency_ms=embed_latency_ms, translate_latency_ms=translate_latency_ms
+            )
+            component.store = LatencyStore(component.store, store_latency_ms)
+            return component
+
+        # 1. ingest
+        ingestor = stub(KnowledgeIngest(str(config_path)))
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            ingestor.ingest_folder(vault.name)
+            elapsed = time.perf_counter() - start
+        chunks = ingestor.store.store.stats()["total_count"]
+        report["ingest"] = {
+            "files": notes,
+            "chunks": chunks,
+            "seconds": round(elapsed, 3),
+            "chunks_per_sec": round(chunks / elapsed, 1) if elapsed else 0.0,
+            "mb_per_sec": round(manifest["bytes"] / (1024 * 1024) / elapsed, 3) if elapsed else 0.0,
+            "embed_calls": ingestor.providers.embed_calls,
+            "translate_calls": ingestor.providers.translate_calls,
+            "store_calls": ingestor.store.calls,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": ingestor.last_trace.stages()
+        }
+        report["chunker"] = run_chunker_benchmark(ingestor, vault)
+
+        # 2. 캐시 없는 검색
+        searcher = stub(KnowledgeSearch(str(config_path), use_cache=False))
+        timings, stages = [], []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for query in query_list:
+                start = time.perf_counter()
+                searcher.search(query)
+                timings.append((time.perf_counter() - start) * 1000)
+                stages.append(searcher.last_trace.stages())
+            alloc = peak_alloc_mb(lambda: [searcher.search(query) for query in query_list])
+        report["search"] = {**_latency_summary(timings, stages), "peak_alloc_mb": alloc}
+
+        # 3. 캐시를 채운 뒤 다시 검색
+        searcher = stub(KnowledgeSearch(str(config_path)))
+        timings, stages = [], []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for query in query_list:
+                searcher.search(query)
+            for query in query_list:
+                start = time.perf_counter()
+                searcher.search(query)
+                timings.append((time.perf_counter() - start) * 1000)
+                stages.append(searcher.last_trace.stages())
+        report["search_cached"] = _latency_summary(timings, stages)
+
+    return report
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float = 0.2) -> List[Dict]:
+    """
+    baseline 대비 변화
+
+    Args:
+        report: run_benchmark() 결과
+        baseline: 저장된 baseline
+        tolerance: 허용 악화 비율 (0.2 = 20%)
+
+    Returns:
+        [{"metric", "baseline", "current", "change", "regression"}, ...]
+        (change는 좋아진 방향이 양수인 비율)
+    """
+    rows = []
+    for section, metric, higher_is_better, noise in TRACKED_METRICS:
+        before = baseline.get(section, {}).get(metric)
+        after = report.get(section, {}).get(metric)
+        if before is None or after is None:
+            continue
+
+        delta = after - before if higher_is_better else before - after
+        change = delta / before if before else 0.0
+        rows.append({
+            "metric": f"{section}.{metric}",
+            "baseline": before,
+            "current": after,
+            "change": round(change, 3),
+            "regression": change < -tolerance and abs(delta) > noise
+        })
+    return rows
+
+
+def load_baseline(path: Path) -> Optional[Dict]:
+    path = Path(path).expanduser()
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(report: Dict, path: Path):
+    path = Path(path).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,689 @@
+"""
+Knowledge Search - 로컬 캐시
+
+임베딩/번역 결과를 SQLite에 저장하여 같은 텍스트를 다시 처리하지 않도록 한다.
+스킬 폴더는 OpenClaw가 감시하므로 캐시는 ~/.cache 아래에 둔다.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+DEFAULT_CACHE_DIR = "~/.cache/knowledge-search"
+
+
+def text_hash(text: str) -> str:
+    """캐시 키로 쓰는 텍스트 해시 (sha256)"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class CacheStore:
+    """
+    SQLite 캐시 공통 기능
+
+    여러 프로세스(ks search, ks ingest)가 같은 파일을 쓰므로 WAL 모드를 사용하고,
+    한 프로세스 안에서는 lock으로 연결을 공유한다.
+    hit/miss 횟수는 stats 테이블에 누적된다.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path: Path, max_bytes: int):
+        """
+        초기화
+
+        Args:
+            path: SQLite 파일 경로
+            max_bytes: 저장 값 크기 합계 상한 (넘으면 오래 안 쓴 항목부터 삭제)
+        """
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+            + self.SCHEMA
+        )
+        self.conn.commit()
+
+    def _count(self, name: str, value: int):
+        """누적 카운터 증가 (lock 안에서 호출)"""
+        if value:
+            self.conn.execute(
+                "INSERT INTO stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, value)
+            )
+
+    def _counter(self, name: str) -> int:
+        """누적 카운터 조회 (lock 안에서 호출)"""
+        row = self.conn.execute("SELECT value FROM stats WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def _evict(self, table: str):
+        """
+        크기 상한을 넘으면 last_used가 오래된 항목부터 삭제 (lock 안에서 호출)
+
+        삭제할 때마다 다시 넘지 않도록 상한의 90%까지 줄인다.
+        """
+        total = self.conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        doomed = []
+        for rowid, size in self.conn.execute(f"SELECT rowid, size FROM {table} ORDER BY last_used"):
+            doomed.append((rowid,))
+            freed += size
+            if freed >= target:
+                break
+
+        self.conn.executemany(f"DELETE FROM {table} WHERE rowid = ?", doomed)
+        self._count(f"{table}_evictions", len(doomed))
+
+    def close(self):
+        """연결 종료"""
+        with self.lock:
+            self.conn.close()
+
+
+class EmbeddingCache(CacheStore):
+    """
+    (provider, model, input_type, sha256(text)) → 임베딩 벡터 캐시
+
+    벡터는 float32 바이트열로 저장한다.
+    input_type은 Cohere처럼 문서/쿼리 임베딩이 다른 provider를 위한 값이다.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS embeddings (
+            provider TEXT NOT NULL,
+            model TEXT NOT NULL,
+            input_type TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (provider, model, input_type, text_hash)
+        );
+        CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used);
+    """
+
+    def get_many(
+        self,
+        provider: str,
+        model: str,
+        texts: List[str],
+        input_type: str = ""
+    ) -> List[Optional[List[float]]]:
+        """
+        캐시 조회
+
+        Args:
+            provider: 임베딩 provider
+            model: 임베딩 모델
+            texts: 입력 텍스트 리스트
+            input_type: 입력 종류 (search_document / search_query, 없으면 "")
+
+        Returns:
+            texts와 같은 순서의 벡터 리스트 (캐시에 없으면 None)
+        """
+        hashes = [text_hash(text) for text in texts]
+        found = {}
+
+        with self.lock:
+            for h in set(hashes):
+                row = self.conn.execute(
+                    "SELECT vector FROM embeddings "
+                    "WHERE provider = ? AND model = ? AND input_type = ? AND text_hash = ?",
+                    (provider, model, input_type, h)
+                ).fetchone()
+                if row:
+                    vector = array('f')
+                    vector.frombytes(row[0])
+                    found[h] = vector.tolist()
+
+            if found:
+                now = time.time()
+                self.conn.executemany(
+                    "UPDATE embeddings SET last_used = ? "
+                    "WHERE provider = ? AND model = ? AND input_type = ? AND text_hash = ?",
+                    [(now, provider, model, input_type, h) for h in found]
+                )
+
+            hits = sum(1 for h in hashes if h in found)
+            self._count("embedding_hits", hits)
+            self._count("embedding_misses", len(hashes) - hits)
+            self.conn.commit()
+
+        return [found.get(h) for h in hashes]
+
+    def put_many(
+        self,
+        provider: str,
+        model: str,
+        texts: List[str],
+        vectors: List[List[float]],
+        input_type: str = ""
+    ):
+        """
+        캐시 저장
+
+        Args:
+            provider: 임베딩 provider
+            model: 임베딩 모델
+            texts: 입력 텍스트 리스트
+            vectors: texts와 같은 순서의 벡터 리스트
+            input_type: 입력 종류 (search_document / search_query, 없으면 "")
+        """
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            blob = array('f', vector).tobytes()
+            rows.append((provider, model, input_type, text_hash(text), blob, len(blob), now))
+
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings "
+                "(provider, model, input_type, text_hash, vector, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict("embeddings")
+            self.conn.commit()
+
+    def stats(self) -> Dict:
+        """
+        캐시 통계
+
+        Returns:
+            entries, size_bytes, hits, misses
+        """
+        with self.lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings"
+            ).fetchone()
+            return {
+                "entries": entries,
+                "size_bytes": size,
+                "hits": self._counter("embedding_hits"),
+                "misses": self._counter("embedding_misses")
+            }
+
+
+class TranslationCache(CacheStore):
+    """
+    (provider, model, kind, sha256(text)) → 번역문 캐시
+
+    kind는 프롬프트 종류 (document: 문서 청크, query: 검색 쿼리)
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS translations (
+            provider TEXT NOT NULL,
+            model TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            translated TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (provider, model, kind, text_hash)
+        );
+        CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used);
+    """
+
+    def get(self, provider: str, model: str, kind: str, text: str) -> Optional[str]:
+        """
+        캐시 조회
+
+        Args:
+            provider: 번역 provider
+            model: 번역 모델
+            kind: 프롬프트 종류 (document / query)
+            text: 원문
+
+        Returns:
+            번역문 (캐시에 없으면 None)
+        """
+        key = (provider, model, kind, text_hash(text))
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT translated FROM translations "
+                "WHERE provider = ? AND model = ? AND kind = ? AND text_hash = ?",
+                key
+            ).fetchone()
+
+            if row:
+                self.conn.execute(
+                    "UPDATE translations SET last_used = ? "
+                    "WHERE provider = ? AND model = ? AND kind = ? AND text_hash = ?",
+                    (time.time(), *key)
+                )
+            self._count("translation_hits" if row else "translation_misses", 1)
+            self.conn.commit()
+
+        return row[0] if row else None
+
+    def put(self, provider: str, model: str, kind: str, text: str, translated: str):
+        """
+        캐시 저장
+
+        Args:
+            provider: 번역 provider
+            model: 번역 모델
+            kind: 프롬프트 종류 (document / query)
+            text: 원문
+            translated: 번역문
+        """
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO translations "
+                "(provider, model, kind, text_hash, translated, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (provider, model, kind, text_hash(text), translated,
+                 len(translated.encode('utf-8')), time.time())
+            )
+            self._evict("translations")
+            self.conn.commit()
+
+    def stats(self) -> Dict:
+        """
+        캐시 통계
+
+        Returns:
+            entries, size_bytes, hits, misses, skipped (영어라서 번역 생략)
+        """
+        with self.lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM translations"
+            ).fetchone()
+            return {
+                "entries": entries,
+                "size_bytes": size,
+                "hits": self._counter("translation_hits"),
+                "misses": self._counter("translation_misses"),
+                "skipped": self._counter("translation_skipped")
+            }
+
+    def count_skipped(self):
+        """영어로 판단되어 번역을 생략한 횟수 기록"""
+        with self.lock:
+            self._count("translation_skipped", 1)
+            self.conn.commit()
+
+
+def normalize_query(query: str) -> str:
+    """
+    쿼리 캐시 키용 정규화
+
+    유니코드 NFKC, 대소문자 통일, 공백 정리 (재시도/옵션만 바꾼 재검색이 같은 키가 되도록)
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class QueryCache(CacheStore):
+    """
+    정규화된 검색 쿼리 → (번역된 쿼리, 임베딩) 캐시
+
+    메모리 LRU(프로세스 안, `ks serve`에서 효과가 크다)와 SQLite(프로세스 간)의 2단 구조이고,
+    두 단계 모두 TTL이 지난 항목은 쓰지 않는다.
+    namespace는 번역/임베딩 provider와 모델 조합이다.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS queries (
+            namespace TEXT NOT NULL,
+            query_hash TEXT NOT NULL,
+            translated TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            created REAL NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (namespace, query_hash)
+        );
+        CREATE INDEX IF NOT EXISTS idx_queries_last_used ON queries (last_used);
+    """
+
+    def __init__(self, path: Path, max_bytes: int, ttl_seconds: float, memory_entries: int = 256):
+        """
+        초기화
+
+        Args:
+            path: SQLite 파일 경로
+            max_bytes: 디스크 저장 크기 상한
+            ttl_seconds: 항목 유효 시간 (초)
+            memory_entries: 메모리 LRU 최대 항목 수
+        """
+        super().__init__(path, max_bytes)
+        self.ttl = ttl_seconds
+        self.memory_entries = memory_entries
+        self.memory: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+        # 이 프로세스에서의 조회 결과 (--benchmark 출력용)
+        self.session = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _remember(self, key: tuple, value: tuple):
+        """메모리 LRU에 저장 (lock 안에서 호출)"""
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, namespace: str, query: str) -> Optional[Tuple[str, List[float]]]:
+        """
+        캐시 조회
+
+        Args:
+            namespace: provider/모델 조합
+            query: 원래 검색 쿼리 (내부에서 정규화)
+
+        Returns:
+            (번역된 쿼리, 임베딩), 없거나 만료되었으면 None
+        """
+        key = (namespace, text_hash(normalize_query(query)))
+        now = time.time()
+
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry and now - entry[0] <= self.ttl:
+                self.memory.move_to_end(key)
+                self.session["memory_hits"] += 1
+                return entry[1], entry[2]
+
+            row = self.conn.execute(
+                "SELECT translated, vector, created FROM queries WHERE namespace = ? AND query_hash = ?",
+                key
+            ).fetchone()
+
+            if row and now - row[2] <= self.ttl:
+                vector = array('f')
+                vector.frombytes(row[1])
+                value = (row[2], row[0], vector.tolist())
+                self._remember(key, value)
+                self.conn.execute(
+                    "UPDATE queries SET last_used = ? WHERE namespace = ? AND query_hash = ?",
+                    (now, *key)
+                )
+                self.session["disk_hits"] += 1
+                self._count("query_hits", 1)
+                self.conn.commit()
+                return value[1], value[2]
+
+            self.memory.pop(key, None)
+            self.session["misses"] += 1
+            self._count("query_misses", 1)
+            self.conn.commit()
+            return None
+
+    def put(self, namespace: str, query: str, translated: str, embedding: List[float]):
+        """
+        캐시 저장
+
+        Args:
+            namespace: provider/모델 조합
+            query: 원래 검색 쿼리 (내부에서 정규화)
+            translated: 번역된 쿼리
+            embedding: 번역된 쿼리의 임베딩
+        """
+        key = (namespace, text_hash(normalize_query(query)))
+        now = time.time()
+        blob = array('f', embedding).tobytes()
+
+        with self.lock:
+            self._remember(key, (now, translated, list(embedding)))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO queries "
+                "(namespace, query_hash, translated, vector, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*key, translated, blob, len(blob) + len(translated.encode('utf-8')), now, now)
+            )
+            self.conn.execute("DELETE FROM queries WHERE created < ?", (now - self.ttl,))
+            self._evict("queries")
+            self.conn.commit()
+
+    def stats(self) -> Dict:
+        """
+        캐시 통계
+
+        Returns:
+            entries, size_bytes, hits, misses (디스크 조회 누적),
+            session (이 프로세스의 memory_hits, disk_hits, misses)
+        """
+        with self.lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM queries"
+            ).fetchone()
+            return {
+                "entries": entries,
+                "size_bytes": size,
+                "hits": self._counter("query_hits"),
+                "misses": self._counter("query_misses"),
+                "session": dict(self.session)
+            }
+
+
+class ResultCache(CacheStore):
+    """
+    검색 결과 캐시 (쿼리 임베딩 + 검색 옵션 → 최종 결과 리스트)
+
+    KnowledgeIngest가 저장할 때마다 ingest generation을 올리고,
+    다른 generation에서 만든 결과는 쓰지 않는다. 다른 기기에서 같은 Supabase에
+    ingest하는 경우처럼 generation이 안 바뀌는 변경은 TTL로 만료된다.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            key_hash TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL,
+            results TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created REAL NOT NULL,
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_results_last_used ON results (last_used);
+    """
+
+    def __init__(self, path: Path, max_bytes: int, ttl_seconds: float):
+        """
+        초기화
+
+        Args:
+            path: SQLite 파일 경로
+            max_bytes: 저장 크기 상한
+            ttl_seconds: 결과 유효 시간 (초)
+        """
+        super().__init__(path, max_bytes)
+        self.ttl = ttl_seconds
+
+    @staticmethod
+    def make_key(embedding: List[float], **options) -> str:
+        """
+        캐시 키
+
+        Args:
+            embedding: 쿼리 임베딩
+            **options: 결과에 영향을 주는 검색 옵션 (filters, limit, min_similarity 등)
+        """
+        vector_hash = hashlib.sha256(array('f', embedding).tobytes()).hexdigest()
+        return text_hash(json.dumps([vector_hash, options], sort_keys=True, default=str))
+
+    def generation(self) -> int:
+        """현재 ingest generation"""
+        with self.lock:
+            return self._counter("ingest_generation")
+
+    def bump_generation(self):
+        """ingest generation 증가 (저장소에 쓴 뒤 호출, 기존 결과는 모두 무효)"""
+        with self.lock:
+            self._count("ingest_generation", 1)
+            self.conn.commit()
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """
+        캐시 조회
+
+        Args:
+            key: make_key() 결과
+
+        Returns:
+            결과 리스트 (없거나, 만료되었거나, generation이 바뀌었으면 None)
+        """
+        now = time.time()
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT results, generation, created FROM results WHERE key_hash = ?", (key,)
+            ).fetchone()
+
+            hit = (
+                row is not None
+                and row[1] == self._counter("ingest_generation")
+                and now - row[2] <= self.ttl
+            )
+            if hit:
+                self.conn.execute("UPDATE results SET last_used = ? WHERE key_hash = ?", (now, key))
+            self._count("result_hits" if hit else "result_misses", 1)
+            self.conn.commit()
+
+        return json.loads(row[0]) if hit else None
+
+    def put(self, key: str, results: List[Dict]):
+        """
+        캐시 저장 (현재 generation으로 기록)
+
+        Args:
+            key: make_key() 결과
+            results: 최종 검색 결과 리스트
+        """
+        payload = json.dumps(results, ensure_ascii=False)
+        now = time.time()
+
+        with self.lock:
+            generation = self._counter("ingest_generation")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results (key_hash, generation, results, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, generation, payload, len(payload.encode('utf-8')), now, now)
+            )
+            # 다시 쓰일 일 없는 이전 generation/만료 결과 정리
+            self.conn.execute(
+                "DELETE FROM results WHERE generation != ? OR created < ?", (generation, now - self.ttl)
+            )
+            self._evict("results")
+            self.conn.commit()
+
+    def stats(self) -> Dict:
+        """
+        캐시 통계
+
+        Returns:
+            entries, size_bytes, hits, misses, generation
+        """
+        with self.lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+            return {
+                "entries": entries,
+                "size_bytes": size,
+                "hits": self._counter("result_hits"),
+                "misses": self._counter("result_misses"),
+                "generation": self._counter("ingest_generation")
+            }
+
+
+def open_embedding_cache(config: Dict) -> Optional[EmbeddingCache]:
+    """
+    config.json의 cache 설정으로 임베딩 캐시 열기
+
+    Args:
+        config: 전체 설정
+
+    Returns:
+        EmbeddingCache (cache.enabled가 false이면 None)
+    """
+    cache_config = config.get("cache", {})
+    if not cache_config.get("enabled", True):
+        return None
+
+    cache_dir = Path(cache_config.get("path", DEFAULT_CACHE_DIR)).expanduser()
+    max_mb = cache_config.get("embedding_max_mb", 256)
+    return EmbeddingCache(cache_dir / "embeddings.sqlite", max_bytes=max_mb * 1024 * 1024)
+
+
+def open_translation_cache(config: Dict) -> Optional[TranslationCache]:
+    """
+    config.json의 cache 설정으로 번역 캐시 열기
+
+    Args:
+        config: 전체 설정
+
+    Returns:
+        TranslationCache (cache.enabled가 false이면 None)
+    """
+    cache_config = config.get("cache", {})
+    if not cache_config.get("enabled", True):
+        return None
+
+    cache_dir = Path(cache_config.get("path", DEFAULT_CACHE_DIR)).expanduser()
+    max_mb = cache_config.get("translation_max_mb", 64)
+    return TranslationCache(cache_dir / "translations.sqlite", max_bytes=max_mb * 1024 * 1024)
+
+
+def open_query_cache(config: Dict) -> Optional[QueryCache]:
+    """
+    config.json의 cache 설정으로 쿼리 캐시 열기
+
+    Args:
+        config: 전체 설정
+
+    Returns:
+        QueryCache (cache.enabled가 false이면 None)
+    """
+    cache_config = config.get("cache", {})
+    if not cache_config.get("enabled", True):
+        return None
+
+    cache_dir = Path(cache_config.get("path", DEFAULT_CACHE_DIR)).expanduser()
+    return QueryCache(
+        cache_dir / "queries.sqlite",
+        max_bytes=cache_config.get("query_max_mb", 32) * 1024 * 1024,
+        ttl_seconds=cache_config.get("query_ttl_hours", 168) * 3600,
+        memory_entries=cache_config.get("query_memory_entries", 256)
+    )
+
+
+def open_result_cache(config: Dict) -> Optional[ResultCache]:
+    """
+    config.json의 cache 설정으로 검색 결과 캐시 열기
+
+    Args:
+        config: 전체 설정
+
+    Returns:
+        ResultCache (cache.enabled가 false이면 None)
+    """
+    cache_config = config.get("cache", {})
+    if not cache_config.get("enabled", True):
+        return None
+
+    cache_dir = Path(cache_config.get("path", DEFAULT_CACHE_DIR)).expanduser()
+    return ResultCache(
+        cache_dir / "results.sqlite",
+        max_bytes=cache_config.get("result_max_mb", 64) * 1024 * 1024,
+        ttl_seconds=cache_config.get("result_ttl_minutes", 30) * 60
+    )
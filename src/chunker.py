@@ -0,0 +1,225 @@
+"""
+Knowledge Search - 마크다운 청커
+
+문서를 블록(제목, 문단, 코드 블록) 경계에서 나누고, 토큰 수 기준으로
+블록을 청크에 채워 넣는다. 청크 텍스트는 원문 문자열을 offset으로 잘라 만들므로
+토큰을 다시 디코딩하지 않고, 서식(줄바꿈, 코드 들여쓰기)이 그대로 남는다.
+
+한 블록이 청크보다 크면 줄 → 문장 → 토큰 창 순서로 더 잘게 나눈다.
+겹침(overlap)은 앞 청크의 마지막 블록들을 다음 청크 앞에 다시 넣어 만든다.
+"""
+
+import re
+from itertools import islice
+from typing import List, NamedTuple
+
+
+# 줄 단위 순회 (줄바꿈 포함)
+LINE = re.compile(r"[^\n]*\n|[^\n]+")
+FENCE = re.compile(r" {0,3}(`{3,}|~{3,})")
+HEADING = re.compile(r" {0,3}#{1,6}(?:\s|$)")
+# 문장 끝 (. ! ? 。 뒤 공백) - 긴 문단을 나눌 때만 사용
+SENTENCE_END = re.compile(r"[.!?。！？](?=\s)\s*")
+WORD = re.compile(r"\S+")
+
+
+class Piece(NamedTuple):
+    """원문의 [start, end) 구간과 토큰 수"""
+    start: int
+    end: int
+    tokens: int
+    heading: bool = False
+
+
+def count_words(text: str, limit: int) -> int:
+    """단어 수 (limit에서 멈춤, 단어 리스트를 만들지 않음)"""
+    return sum(1 for _ in islice(WORD.finditer(text), limit))
+
+
+class MarkdownChunker:
+    """마크다운 구조를 따라 토큰 수 제한에 맞춰 청크 분할"""
+
+    def __init__(self, encoding, chunk_size: int = 512, chunk_overlap: int = 128, min_chunk_size: int = 100):
+        """
+        초기화
+
+        Args:
+            encoding: tiktoken encoder (encode_ordinary, decode_with_offsets)
+            chunk_size: 청크 최대 토큰 수
+            chunk_overlap: 앞 청크와 겹치는 최대 토큰 수
+            min_chunk_size: 이보다 작은 마지막 청크는 앞 청크에 붙인다
+        """
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.min_chunk_size = min_chunk_size
+        # 토큰 창으로 자를 때의 크기 (겹침 단위와 같게 해서 겹침이 블록 단위로 맞도록)
+        self.window = chunk_overlap if 0 < chunk_overlap < chunk_size else chunk_size
+
+    def split(self, text: str) -> List[str]:
+        """
+        텍스트를 청크 문자열 리스트로 분할
+
+        Args:
+            text: 원본 텍스트
+
+        Returns:
+            앞뒤 공백을 제거한 청크 텍스트 리스트 (문서 순서)
+        """
+        return [
+            chunk for chunk in (text[start:end].strip() for start, end in self._pack(self._pieces(text)))
+            if chunk
+        ]
+
+    def _count(self, text: str) -> int:
+        # encode_ordinary: 특수 토큰 검사 없이 (문서 안의 "<|endoftext|>"도 일반 텍스트)
+        return len(self.encoding.encode_ordinary(text))
+
+    def _pieces(self, text: str) -> List[Piece]:
+        """
+        블록 단위 구간 (원문 전체를 빈틈없이 덮는다)
+
+        블록: 제목 한 줄, 코드 블록(``` ~ ```), 빈 줄로 나뉜 문단.
+        빈 줄은 앞 블록에 붙는다. 토큰은 줄마다 한 번만 세고, chunk_size보다 큰
+        블록은 다시 encode하지 않고 줄 단위 구간으로 내보낸다.
+        """
+        pieces: List[Piece] = []
+        lines: List[Piece] = []  # 현재 블록의 줄
+        fence = None
+        new_block = True
+        has_content = False  # 현재 블록에 빈 줄이 아닌 줄이 있는지
+
+        def close_block():
+            nonlocal has_content
+            has_content = False
+            if not lines:
+                return
+            tokens = sum(line.tokens for line in lines)
+            if tokens <= self.chunk_size:
+                pieces.append(Piece(lines[0].start, lines[-1].end, tokens, lines[0].heading))
+            else:
+                for line in lines:
+                    pieces.extend(self._fit(text, line))
+            lines.clear()
+
+        for match in LINE.finditer(text):
+            content = match.group()
+            line = Piece(match.start(), match.end(), self._count(content))
+
+            if fence is not None:
+                # 코드 블록 안: 닫는 fence까지 한 블록
+                lines.append(line)
+                if content.strip().startswith(fence):
+                    fence = None
+                    new_block = True
+                continue
+
+            if not content.strip():
+                # 빈 줄은 앞 블록에 붙인다 (첫 블록 앞이면 첫 블록에)
+                lines.append(line)
+                new_block = True
+                continue
+
+            opening = FENCE.match(content)
+            heading = bool(HEADING.match(content))
+            if opening or heading or new_block:
+                if has_content:
+                    close_block()
+                has_content = True
+                lines.append(line._replace(heading=heading))
+                if opening:
+                    fence = opening.group(1)
+                new_block = heading
+            else:
+                lines.append(line)
+
+        close_block()
+        return pieces
+
+    def _fit(self, text: str, piece: Piece) -> List[Piece]:
+        """chunk_size보다 긴 줄을 문장 → 토큰 창 순서로 나누기"""
+        if piece.tokens <= self.chunk_size:
+            return [piece]
+
+        bounds = [match.end() for match in SENTENCE_END.finditer(text, piece.start, piece.end)]
+        bounds = [bound for bound in bounds if piece.start < bound < piece.end] + [piece.end]
+        if len(bounds) == 1:
+            return self._windows(text, piece)
+
+        parts = []
+        for start, end in zip([piece.start] + bounds[:-1], bounds):
+            part = Piece(start, end, self._count(text[start:end]), piece.heading and start == piece.start)
+            parts.extend(self._windows(text, part) if part.tokens > self.chunk_size else [part])
+        return parts
+
+    def _windows(self, text: str, piece: Piece) -> List[Piece]:
+        """
+        토큰 창으로 자르기 (문장 경계가 없는 긴 줄)
+
+        토큰 offset으로 원문 위치를 찾으므로 창마다 decode하지 않는다.
+        """
+        tokens = self.encoding.encode_ordinary(text[piece.start:piece.end])
+        _, offsets = self.encoding.decode_with_offsets(tokens)
+
+        parts = []
+        for i in range(0, len(tokens), self.window):
+            start = piece.start + offsets[i]
+            end = piece.start + offsets[i + self.window] if i + self.window < len(tokens) else piece.end
+            if end > start:
+                parts.append(Piece(start, end, min(self.window, len(tokens) - i)))
+        return parts
+
+    def _pack(self, pieces: List[Piece]) -> List[tuple]:
+        """
+        구간들을 chunk_size 토큰까지 채워 청크 (start, end) 목록 만들기
+
+        - 제목은 현재 청크가 절반 이상 찼으면 새 청크를 시작한다.
+          그보다 짧은 섹션은 다음 섹션과 한 청크로 묶는다
+        - 청크 끝에 제목만 남으면 (제목 뒤 내용이 넘칠 때) 제목을 다음 청크로 넘긴다
+        - 제목으로 시작하는 청크에는 앞 섹션 내용을 겹쳐 넣지 않는다. 그 외에는
+          앞 청크 끝의 구간들을 chunk_overlap 토큰까지 다음 청크 앞에 다시 넣는다
+        - min_chunk_size보다 작은 마지막 청크는 앞 청크에 붙인다
+        """
+        chunks = []  # [start, end, tokens]
+        current: List[Piece] = []
+        tokens = 0
+        fresh = False  # 겹침 외에 새 내용이 있는지
+        overlap = 0  # current 앞쪽의 겹침 구간 수
+
+        for piece in pieces:
+            section_break = piece.heading and tokens >= self.chunk_size // 2
+            if current and fresh and (tokens + piece.tokens > self.chunk_size or section_break):
+                heading = None
+                if current[-1].heading and current[-1].tokens + piece.tokens <= self.chunk_size:
+                    heading = current.pop()
+                    tokens -= heading.tokens
+                # 제목을 빼고 겹침만 남았으면 그 내용은 이미 앞 청크에 있다
+                if len(current) > overlap:
+                    chunks.append([current[0].start, current[-1].end, tokens])
+
+                carried: List[Piece] = []
+                if heading is None and not piece.heading:
+                    budget = min(self.chunk_overlap, self.chunk_size - piece.tokens)
+                    for previous in reversed(current):
+                        if previous.tokens > budget:
+                            break
+                        carried.insert(0, previous)
+                        budget -= previous.tokens
+                overlap = len(carried)
+                current = carried + ([heading] if heading else [])
+                tokens = sum(part.tokens for part in current)
+                fresh = heading is not None
+
+            current.append(piece)
+            tokens += piece.tokens
+            fresh = True
+
+        if current and fresh:
+            new_tokens = sum(part.tokens for part in current if part.start >= (chunks[-1][1] if chunks else 0))
+            if chunks and new_tokens < self.min_chunk_size and chunks[-1][2] + new_tokens <= self.chunk_size + self.min_chunk_size:
+                chunks[-1][1] = current[-1].end
+                chunks[-1][2] += new_tokens
+            else:
+                chunks.append([current[0].start, current[-1].end, tokens])
+
+        return [(start, end) for start, end, _ in chunks]
@@ -14,12 +14,114 @@ from pathlib import Path
 # Add path for src module imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from search import KnowledgeSearch
-from ingest import KnowledgeIngest
+# search/ingest (and openai, supabase, tiktoken, anthropic behind them) are
+# imported inside the commands that need them, so `ks --version`, `ks --help`
+# and daemon-backed searches start without loading them.
+
+# Modules timed by --profile-startup, in the order a command would load them
+STARTUP_MODULES = [
+    'cli', 'client', 'storage', 'cache', 'tracing', 'search', 'ingest',
+    'numpy', 'supabase', 'openai', 'anthropic', 'cohere', 'tiktoken'
+]
+
+STARTUP_PROFILE_SCRIPT = """
+import importlib, json, sys, time
+sys.path.insert(0, sys.argv[1])
+steps = []
+for name in sys.argv[2:]:
+    start = time.perf_counter()
+    try:
+        importlib.import_module(name)
+        ok = True
+    except Exception:
+        ok = False
+    steps.append([name, (time.perf_counter() - start) * 1000, ok])
+try:
+    import tiktoken
+    start = time.perf_counter()
+    tiktoken.get_encoding("cl100k_base")
+    steps.append(["tiktoken cl100k_base", (time.perf_counter() - start) * 1000, True])
+except Exception:
+    pass
+print(json.dumps(steps))
+"""
+
+
+def profile_startup(ctx, param, value):
+    """
+    Print an import-time breakdown measured in a fresh interpreter and exit
+    
+    Each module's time is incremental: dependencies already loaded by an
+    earlier step are not counted again.
+    """
+    if not value or ctx.resilient_parsing:
+        return
+    
+    import json
+    import subprocess
+    
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    interpreter_ms = (time.perf_counter() - start) * 1000
+    
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_PROFILE_SCRIPT,
+         str(Path(__file__).parent), *STARTUP_MODULES],
+        capture_output=True, text=True
+    )
+    total_ms = (time.perf_counter() - start) * 1000
+    steps = json.loads(proc.stdout)
+    
+    # -X importtime lines: "import time: <self us> | <cumulative us> | <module>"
+    package_ms = {}
+    for line in proc.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[0].startswith('import time:'):
+            continue
+        try:
+            self_us = int(parts[0].split(':')[1])
+        except ValueError:
+            continue
+        package = parts[2].strip().split('.')[0]
+        package_ms[package] = package_ms.get(package, 0.0) + self_us / 1000
+    
+    click.echo("⏱️  Startup profile (fresh interpreter)\n")
+    click.echo(f"Python interpreter: {interpreter_ms:.0f} ms")
+    click.echo(f"All modules: {total_ms:.0f} ms\n")
+    
+    click.echo("Import time by step (incremental):")
+    for name, ms, ok in steps:
+        click.echo(f"  {name:<22} {ms:>8.1f} ms" + ("" if ok else "  (not installed)"))
+    
+    click.echo("\nSlowest packages (self time):")
+    for package, ms in sorted(package_ms.items(), key=lambda x: -x[1])[:10]:
+        click.echo(f"  {package:<22} {ms:>8.1f} ms")
+    
+    ctx.exit()
+
+
+def format_query_cache_stats(stats) -> str:
+    """One-line query cache summary for --benchmark"""
+    if not stats:
+        return "🗄️  Query cache: disabled"
+    
+    session = stats['session']
+    hits = session['memory_hits'] + session['disk_hits']
+    lookups = hits + session['misses']
+    disk_lookups = stats['hits'] + stats['misses']
+    return (
+        f"🗄️  Query cache: {hits}/{lookups} hits this process "
+        f"({session['memory_hits']} memory, {session['disk_hits']} disk) | "
+        f"on disk: {stats['entries']} entries, "
+        f"{stats['hits'] / disk_lookups * 100 if disk_lookups else 0.0:.1f}% hit rate"
+    )
 
 
 @click.group()
 @click.version_option(version='0.1.0')
+@click.option('--profile-startup', is_flag=True, expose_value=False, is_eager=True,
+              callback=profile_startup, help='Show an import-time breakdown and exit')
 def cli():
     """
     Knowledge Search - Semantic search for your documents
@@ -34,10 +136,17 @@ def cli():
 @click.option('--limit', default=5, help='Number of results (default: 5)')
 @click.option('--source', help='Filter by source (e.g., obsidian)')
 @click.option('--author', help='Filter by author')
+@click.option('--category', help='Filter by category')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), help='Only documents dated on or after YYYY-MM-DD')
+@click.option('--until', type=click.DateTime(formats=['%Y-%m-%d']), help='Only documents dated on or before YYYY-MM-DD')
 @click.option('--min-similarity', type=float, help='Minimum similarity % (default: from config)')
-@click.option('--benchmark', is_flag=True, help='Show search timing')
+@click.option('--ef-search', type=click.IntRange(min=1), help='HNSW search width (local hnsw index only)')
+@click.option('--no-daemon', is_flag=True, help='Search in-process even if `ks serve` is running')
+@click.option('--no-cache', is_flag=True, help='Bypass the query/embedding/translation caches')
+@click.option('--benchmark', is_flag=True, help='Show search timing, per-stage breakdown and cache hit rates')
 @click.option('--format', type=click.Choice(['text', 'json']), default='text', help='Output format: text (preview) or json (full content for AI)')
-def search(query, limit, source, author, min_similarity, benchmark, format):
+@click.option('--fields', help='Comma-separated result fields for JSON output (e.g., path,similarity,date)')
+def search(query, limit, source, author, category, since, until, min_similarity, ef_search, no_daemon, no_cache, benchmark, format, fields):
     """
     Search your knowledge base
     
@@ -48,22 +157,51 @@ def search(query, limit, source, author, min_similarity, benchmark, format):
       ks search "task priority" --limit 10
       
       ks search "meeting notes" --author John
+      
+      ks search "release plan" --since 2024-01-01 --category Work
+      
+      ks search "release plan" --format json --fields path,similarity,date
     """
+    if fields and format != 'json':
+        raise click.UsageError("--fields requires --format json")
+    
     try:
-        # Initialize KnowledgeSearch
         config_path = Path(__file__).parent.parent / 'config.json'
-        ks = KnowledgeSearch(str(config_path))
-        
-        # Execute search
-        start = time.time()
-        results = ks.search(
-            query, 
-            limit=limit, 
-            source=source, 
+        params = dict(
+            limit=limit,
+            source=source,
             author=author,
-            min_similarity=min_similarity
+            min_similarity=min_similarity,
+            category=category,
+            date_from=since.date().isoformat() if since else None,
+            date_to=until.date().isoformat() if until else None,
+            ef_search=ef_search,
+            fields=[field.strip() for field in fields.split(',') if field.strip()] if fields else None
         )
+        
+        # Use the warm `ks serve` daemon when it is running
+        # (the daemon always uses its caches, so --no-cache searches in-process)
+        start = time.time()
+        response = None
+        if not no_daemon and not no_cache:
+            from client import daemon_search
+            response = daemon_search(str(config_path), query, **params)
+        
+        # Otherwise search in-process
+        if response is None:
+            from search import KnowledgeSearch
+            
+            ks = KnowledgeSearch(str(config_path), use_cache=not no_cache)
+            start = time.time()
+            response = {
+                'results': ks.search(query, **params),
+                'stages': ks.last_trace.stages(),
+                'query_cache': ks.query_cache.stats() if ks.query_cache else None
+            }
         elapsed = time.time() - start
+        results = response['results']
+        stages = response.get('stages')
+        cache_stats = response.get('query_cache')
         
         # JSON output (for AI - includes full content)
         if format == 'json':
@@ -72,8 +210,11 @@ def search(query, limit, source, author, min_similarity, benchmark, format):
                 'query': query,
                 'count': len(results),
                 'results': results,
-                'elapsed_ms': round(elapsed * 1000, 1) if benchmark else None
+                'elapsed_ms': round(elapsed * 1000, 1) if benchmark else None,
+                'stages': stages
             }
+            if benchmark:
+                output['query_cache'] = cache_stats
             click.echo(json.dumps(output, ensure_ascii=False, indent=2))
             return
         
@@ -138,7 +279,11 @@ def search(query, limit, source, author, min_similarity, benchmark, format):
         # Benchmark info
         if benchmark:
             click.echo(f"⏱️  Search time: {elapsed*1000:.0f}ms")
+            if stages:
+                from tracing import format_stages
+                click.echo(f"🧭 Stages: {format_stages(stages)}")
             click.echo(f"📊 Average similarity: {sum(r['similarity'] for r in results) / len(results):.1f}%")
+            click.echo(format_query_cache_stats(cache_stats))
     
     except FileNotFoundError:
         click.echo("❌ config.json not found.")
@@ -160,35 +305,64 @@ def status():
     Display total documents, source distribution, etc.
     """
     try:
+        from search import KnowledgeSearch
+        
         config_path = Path(__file__).parent.parent / 'config.json'
         ks = KnowledgeSearch(str(config_path))
         
-        # Get total document count
-        result = ks.supabase.table("embeddings").select("*", count='exact').execute()
-        total = result.count
+        # Server-side aggregate (no rows are downloaded)
+        index_stats = ks.store.stats()
+        total = index_stats['total_count']
         
         click.echo("📊 Knowledge Search Status\n")
         click.echo(f"Total documents: {total}")
         
         if total > 0:
-            # Statistics by source
-            sources = {}
-            authors = {}
-            for doc in result.data:
-                meta = doc.get('metadata', {})
-                source = meta.get('source', 'unknown')
-                author = meta.get('author', 'unknown')
-                
-                sources[source] = sources.get(source, 0) + 1
-                authors[author] = authors.get(author, 0) + 1
+            click.echo(f"Index size: {index_stats['table_size'] / 1024 / 1024:.1f} MB "
+                       f"(indexes: {index_stats['index_size'] / 1024 / 1024:.1f} MB)")
+            click.echo(f"Last ingest: {index_stats['last_ingest']}")
+            
+            for title, key in [
+                ("By source", 'sources'),
+                ("By author", 'authors'),
+                ("By category", 'categories'),
+                ("By folder", 'folders')
+            ]:
+                click.echo(f"\n{title}:")
+                for name, count in sorted(index_stats[key].items(), key=lambda x: -x[1]):
+                    click.echo(f"  {name}: {count}")
+        
+        # Embedding cache statistics
+        if ks.embedding_cache:
+            stats = ks.embedding_cache.stats()
+            lookups = stats['hits'] + stats['misses']
+            hit_rate = stats['hits'] / lookups * 100 if lookups else 0.0
+            
+            click.echo("\nEmbedding cache:")
+            click.echo(f"  Entries: {stats['entries']} ({stats['size_bytes'] / 1024 / 1024:.1f} MB)")
+            click.echo(f"  Hits: {stats['hits']} | Misses: {stats['misses']} ({hit_rate:.1f}% hit rate)")
+        
+        # Translation cache statistics
+        if ks.translation_cache:
+            stats = ks.translation_cache.stats()
+            lookups = stats['hits'] + stats['misses']
+            hit_rate = stats['hits'] / lookups * 100 if lookups else 0.0
             
-            click.echo("\nBy source:")
-            for source, count in sorted(sources.items(), key=lambda x: -x[1]):
-                click.echo(f"  {source}: {count}")
+            click.echo("\nTranslation cache:")
+            click.echo(f"  Entries: {stats['entries']} ({stats['size_bytes'] / 1024 / 1024:.1f} MB)")
+            click.echo(f"  Hits: {stats['hits']} | Misses: {stats['misses']} ({hit_rate:.1f}% hit rate)")
+            click.echo(f"  Skipped (already English): {stats['skipped']}")
+        
+        # Search result cache statistics
+        if ks.result_cache:
+            stats = ks.result_cache.stats()
+            lookups = stats['hits'] + stats['misses']
+            hit_rate = stats['hits'] / lookups * 100 if lookups else 0.0
             
-            click.echo("\nBy author:")
-            for author, count in sorted(authors.items(), key=lambda x: -x[1]):
-                click.echo(f"  {author}: {count}")
+            click.echo("\nResult cache:")
+            click.echo(f"  Entries: {stats['entries']} ({stats['size_bytes'] / 1024 / 1024:.1f} MB), "
+                       f"ingest generation {stats['generation']}")
+            click.echo(f"  Hits: {stats['hits']} | Misses: {stats['misses']} ({hit_rate:.1f}% hit rate)")
         
         click.echo("\n✅ System operational")
     
@@ -201,22 +375,33 @@ def status():
 @click.argument('folder')
 @click.option('--source', default='obsidian', help='Source name')
 @click.option('--author', default='unknown', help='Author name')
-def ingest(folder, source, author):
+@click.option('--force', is_flag=True, help='Re-index all files, even unchanged ones')
+@click.option('--workers', default=1, type=click.IntRange(min=1), help='Parallel translation workers (default: 1)')
+def ingest(folder, source, author, force, workers):
     """
     Index documents from a folder
     
+    Unchanged files (same file hash) are skipped; changed files
+    replace their previously indexed chunks.
+    
     Examples:
     
       ks ingest Projects
       
       ks ingest Notes/Work --author John
+      
+      ks ingest Projects --force
+      
+      ks ingest Projects --workers 8
     """
     try:
+        from ingest import KnowledgeIngest
+        
         config_path = Path(__file__).parent.parent / 'config.json'
         ingestor = KnowledgeIngest(str(config_path))
         
         click.echo(f"📥 Indexing folder: {folder}\n")
-        ingestor.ingest_folder(folder, source=source, author=author)
+        ingestor.ingest_folder(folder, source=source, author=author, force=force, workers=workers)
         click.echo("\n✅ Indexing complete!")
     
     except Exception as e:
@@ -226,6 +411,326 @@ def ingest(folder, source, author):
         sys.exit(1)
 
 
+@cli.command()
+@click.option('--host', help='Bind address (default: server.host in config or 127.0.0.1)')
+@click.option('--port', type=int, help='Port (default: server.port in config or 8765)')
+def serve(host, port):
+    """
+    Run a persistent search daemon
+    
+    Keeps the search clients, caches and index loaded so that
+    `ks search` only pays for the embedding call. `ks search`
+    uses the daemon automatically while it is running.
+    
+    Examples:
+    
+      ks serve
+      
+      ks serve --port 9000
+    """
+    try:
+        from server import serve as run_server
+        
+        config_path = Path(__file__).parent.parent / 'config.json'
+        run_server(str(config_path), host=host, port=port)
+    
+    except FileNotFoundError:
+        click.echo("❌ config.json not found.")
+        click.echo("   Check your installation directory")
+        sys.exit(1)
+    except Exception as e:
+        click.echo(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--queries', default=100, help='Number of sample queries (default: 100)')
+@click.option('--k', default=10, help='Top-k for recall (default: 10)')
+@click.option('--ef', 'ef_values', default='16,32,64,128,256', help='Comma-separated ef_search values')
+@click.option('--rescore', 'rescore_values', default='1,2,4,10', help='Comma-separated rescore factors (two-stage scan)')
+def index_report(queries, k, ef_values, rescore_values):
+    """
+    Compare approximate search recall and latency against exact search
+    
+    Uses stored vectors as sample queries. Requires the local
+    storage backend with "index": "hnsw" (HNSW graph vs exact scan)
+    and/or "quantization" / "prefix_dimensions" (two-stage scan: compact
+    first pass + rescoring vs full-precision scan).
+    
+    Examples:
+    
+      ks index-report
+      
+      ks index-report --queries 500 --ef 32,64,128
+      
+      ks index-report --rescore 2,4,8
+    """
+    try:
+        from search import KnowledgeSearch
+        from storage import LocalStore
+        
+        config_path = Path(__file__).parent.parent / 'config.json'
+        ks = KnowledgeSearch(str(config_path))
+        
+        store = ks.store
+        if not isinstance(store, LocalStore) or (store.index != 'hnsw' and not store.two_stage):
+            click.echo("❌ index-report requires storage.backend \"local\" with storage.index \"hnsw\", "
+                       "storage.quantization or storage.prefix_dimensions")
+            sys.exit(1)
+        
+        sample = min(queries, store.stats()['total_count'])
+        if sample == 0:
+            click.echo("❌ Index is empty.")
+            return
+        
+        if store.index == 'hnsw':
+            ef_list = [int(v) for v in ef_values.split(',') if v.strip()]
+            report = store.index_report(queries=queries, k=k, ef_values=ef_list)
+            
+            click.echo(f"📈 HNSW recall@{k} vs exact search ({sample} queries)\n")
+            click.echo(f"{'ef_search':>10}  {'recall':>7}  {'p50 ms':>8}  {'p95 ms':>8}")
+            for row in report:
+                click.echo(f"{row['ef_search']:>10}  {row['recall']:>7.3f}  {row['p50_ms']:>8.2f}  {row['p95_ms']:>8.2f}")
+        
+        if store.two_stage:
+            factors = [int(v) for v in rescore_values.split(',') if v.strip()]
+            report = store.rescore_report(queries=queries, k=k, factors=factors)
+            
+            first_pass = " ".join(filter(None, [
+                store.quantization, f"{store.scan_dim}d" if store.scan_dim != store.dim else None
+            ]))
+            if store.index == 'hnsw':
+                click.echo("")
+            click.echo(f"📈 Two-stage scan ({first_pass}) recall@{k} vs full-precision scan ({sample} queries)\n")
+            click.echo(f"{'rescore':>8}  {'recall':>7}  {'p50 ms':>8}  {'p95 ms':>8}  {'bytes/vector':>12}")
+            for row in report:
+                click.echo(
+                    f"{row['rescore_factor']:>8}  {row['recall']:>7.3f}  {row['p50_ms']:>8.2f}  "
+                    f"{row['p95_ms']:>8.2f}  {row['scan_bytes']:>12}"
+                )
+    
+    except Exception as e:
+        click.echo(f"❌ Error: {e}")
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--notes', default=200, type=click.IntRange(min=1), help='Synthetic vault size (default: 200)')
+@click.option('--queries', default=100, type=click.IntRange(min=1), help='Number of search queries (default: 100)')
+@click.option('--seed', default=42, help='Vault/query seed (default: 42)')
+@click.option('--embed-latency-ms', default=0.0, type=click.FloatRange(min=0), help='Simulated latency per embedding call')
+@click.option('--translate-latency-ms', default=0.0, type=click.FloatRange(min=0), help='Simulated latency per translation call')
+@click.option('--store-latency-ms', default=0.0, type=click.FloatRange(min=0), help='Simulated latency per store call (Supabase round trip)')
+@click.option('--dir', 'bench_dir', help='Vault and scratch directory (default: ~/.cache/knowledge-search/bench)')
+@click.option('--baseline', 'baseline_path', help='Baseline JSON (default: <dir>/baseline.json)')
+@click.option('--save-baseline', 'save', is_flag=True, help='Save this run as the new baseline')
+@click.option('--tolerance', default=0.2, type=click.FloatRange(min=0), help='Allowed regression vs baseline (default: 0.2 = 20%)')
+@click.option('--format', type=click.Choice(['text', 'json']), default='text', help='Output format')
+def bench(notes, queries, seed, embed_latency_ms, translate_latency_ms, store_latency_ms,
+          bench_dir, baseline_path, save, tolerance, format):
+    """
+    Offline ingest/search benchmark
+    
+    Ingests a synthetic Obsidian vault (bilingual notes, long Apple
+    Notes exports, Korean Created: headers) into a scratch local store
+    with deterministic stand-ins for the embedding, translation and
+    Supabase layers, then measures ingest chunks/sec and peak RSS,
+    search p50/p95/p99 and peak allocations. No API keys or network needed
+    (tiktoken's cl100k_base must already be cached).
+    
+    Compares against the saved baseline and exits 1 on a regression.
+    
+    Examples:
+    
+      ks bench --save-baseline
+    
+      ks bench
+    
+      ks bench --notes 1000 --embed-latency-ms 150 --store-latency-ms 40
+    """
+    import json
+    from bench import DEFAULT_BENCH_DIR, compare, load_baseline, run_benchmark, save_baseline
+    from tracing import format_stages
+    
+    bench_dir = bench_dir or DEFAULT_BENCH_DIR
+    baseline_path = Path(baseline_path or Path(bench_dir) / 'baseline.json').expanduser()
+    
+    try:
+        report = run_benchmark(
+            notes=notes,
+            queries=queries,
+            seed=seed,
+            embed_latency_ms=embed_latency_ms,
+            translate_latency_ms=translate_latency_ms,
+            store_latency_ms=store_latency_ms,
+            bench_dir=bench_dir
+        )
+    except Exception as e:
+        click.echo(f"❌ Error: {e}")
+        sys.exit(1)
+    
+    baseline = None if save else load_baseline(baseline_path)
+    comparison = compare(report, baseline, tolerance) if baseline else []
+    regressions = [row for row in comparison if row['regression']]
+    
+    if format == 'json':
+        click.echo(json.dumps({**report, 'comparison': comparison}, ensure_ascii=False, indent=2))
+    else:
+        ingest = report['ingest']
+        click.echo(f"📦 Ingest: {ingest['files']} files → {ingest['chunks']} chunks in {ingest['seconds']:.2f}s")
+        click.echo(f"   {ingest['chunks_per_sec']:.1f} chunks/sec, {ingest['mb_per_sec']:.2f} MB/sec, "
+                   f"{ingest['embed_calls']} embedding / {ingest['translate_calls']} translation calls")
+        click.echo(f"   🧭 {format_stages(ingest['stages'])}")
+        chunker, legacy = report['chunker'], report['chunker']['legacy']
+        click.echo(f"✂️  Chunker: {chunker['mb_per_sec']:.2f} MB/sec, {chunker['chunks']} chunks "
+                   f"(mean {chunker['mean_tokens']:.0f} tokens, {chunker['split_code_blocks']} split code blocks) | "
+                   f"fixed windows: {legacy['mb_per_sec']:.2f} MB/sec, {legacy['chunks']} chunks "
+                   f"({legacy['split_code_blocks']} split code blocks)")
+        for name, label in (('search', 'Search (uncached)'), ('search_cached', 'Search (cached)')):
+            row = report[name]
+            click.echo(f"🔍 {label}: p50 {row['p50_ms']:.2f}ms  p95 {row['p95_ms']:.2f}ms  "
+                       f"p99 {row['p99_ms']:.2f}ms  ({row['queries']} queries)")
+            click.echo(f"   🧭 per query: {format_stages(row['stages'])}")
+        memory = [f"search peak allocations {report['search']['peak_alloc_mb']:.1f} MB"]
+        if report['ingest']['peak_rss_mb'] is not None:
+            memory.insert(0, f"ingest peak RSS {report['ingest']['peak_rss_mb']:.1f} MB")
+        click.echo(f"💾 Memory: {', '.join(memory)}")
+    
+        if baseline:
+            if baseline.get('params') != report['params']:
+                click.echo("\n⚠️  Baseline was recorded with different parameters")
+            click.echo(f"\n📈 vs baseline ({baseline_path}):")
+            for row in comparison:
+                mark = '❌' if row['regression'] else '  '
+                click.echo(f"  {mark} {row['metric']:<24} {row['baseline']:>10} → {row['current']:>10}  ({row['change']:+.0%})")
+    
+    if save:
+        save_baseline(report, baseline_path)
+        if format == 'text':
+            click.echo(f"\n💾 Baseline saved: {baseline_path}")
+    elif not baseline and format == 'text':
+        click.echo(f"\nNo baseline at {baseline_path} (run with --save-baseline)")
+    
+    if regressions:
+        if format == 'text':
+            click.echo(f"\n❌ {len(regressions)} metric(s) regressed more than {tolerance:.0%}")
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--batch-size', default=1000, type=click.IntRange(min=1), help='Rows updated per batch (default: 1000)')
+def backfill(batch_size):
+    """
+    Fill typed metadata columns for existing rows
+    
+    Filters and incremental sync read typed columns (source, author,
+    path, date, category, file_hash, chunk_index) instead of the
+    metadata JSON. Run once after re-running schema.sql on an existing
+    Supabase project; it is safe to interrupt and re-run.
+    `ks ingest` and `ks setup-db` also run it.
+    
+    Examples:
+    
+      ks backfill
+      
+      ks backfill --batch-size 5000
+    """
+    try:
+        import json
+        from storage import open_store
+        
+        config_path = Path(__file__).parent.parent / 'config.json'
+        with open(config_path) as f:
+            config = json.load(f)
+        
+        store = open_store(config)
+        filled = store.backfill_columns(
+            batch_size, progress=lambda total: click.echo(f"   🗂️  {total} rows filled...")
+        )
+        click.echo(f"✅ Backfilled {filled} rows" if filled else "✅ Typed columns are up to date")
+    
+    except FileNotFoundError:
+        click.echo("❌ config.json not found.")
+        click.echo("   Check your installation directory")
+        sys.exit(1)
+    except Exception as e:
+        click.echo(f"❌ Error: {e}")
+        click.echo("   Re-run schema.sql first if backfill_typed_columns is missing")
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('dimensions', type=click.IntRange(min=1))
+@click.option('--force', is_flag=True, help='Migrate even if embedding.dimensions in config.json differs')
+@click.option('--yes', '-y', is_flag=True, help='Do not ask for confirmation')
+def migrate_dimensions(dimensions, force, yes):
+    """
+    Shrink stored embeddings to fewer (Matryoshka) dimensions
+    
+    text-embedding-3-* vectors keep their meaning when cut to the first
+    N dimensions, so existing rows are migrated without re-embedding.
+    Set embedding.dimensions in config.json to the same value first
+    (or pass --force), so new documents and queries match.
+    
+    The local store is rewritten through a temporary file; the previous
+    vectors are kept as vectors.bin.bak. For Supabase this prints the
+    SQL to run in the SQL Editor (changing the column needs the owner role).
+    
+    Examples:
+    
+      ks migrate-dimensions 512
+      ks migrate-dimensions 512 --yes
+    """
+    try:
+        import json
+        from storage import LocalStore, open_store
+        
+        config_path = Path(__file__).parent.parent / 'config.json'
+        with open(config_path) as f:
+            config = json.load(f)
+        
+        configured = config["embedding"].get("dimensions")
+        if configured != dimensions:
+            # 검색/ingest가 옛 차원으로 임베딩하면 마이그레이션한 저장소와 맞지 않는다
+            click.echo(f"{'⚠️ ' if force else '❌'} embedding.dimensions in config.json is "
+                       f"{configured or 'not set (model default)'}, not {dimensions}")
+            if not force:
+                click.echo(f"   Set it to {dimensions} first, or pass --force")
+                sys.exit(1)
+        
+        store = open_store(config)
+        if isinstance(store, LocalStore):
+            if store.dim is None:
+                click.echo("✅ Index is empty; nothing to migrate")
+                return
+            if not yes and not click.confirm(
+                f"Rewrite {store.dir} from {store.dim} to {dimensions} dimensions? "
+                f"(the current vectors are kept as vectors.bin.bak)"
+            ):
+                click.echo("Aborted")
+                return
+            rows = store.reduce_dimensions(dimensions)
+            click.echo(f"✅ Rewrote {rows} vectors to {dimensions} dimensions")
+            click.echo(f"   Previous vectors: {store.vectors_path}.bak (delete once searches look right)")
+            return
+        
+        def sql_value(value):
+            return "NULL" if value is None else f"'{value}'" if isinstance(value, str) else str(value)
+        
+        click.echo("Run in the Supabase SQL Editor (after re-running schema.sql):\n")
+        click.echo(f"   SELECT set_embedding_dimensions({dimensions});")
+        if store.two_stage:
+            click.echo(f"   SELECT create_rescore_index({sql_value(store.quantization)}, {sql_value(store.prefix_dimensions)});")
+    
+    except FileNotFoundError:
+        click.echo("❌ config.json not found.")
+        click.echo("   Check your installation directory")
+        sys.exit(1)
+    except Exception as e:
+        click.echo(f"❌ Error: {e}")
+        sys.exit(1)
+
+
 @cli.command()
 def setup_db():
     """
@@ -0,0 +1,97 @@
+"""
+Knowledge Search - 검색 데몬 클라이언트
+
+`ks search`가 실행 중인 `ks serve` 데몬에 검색을 넘기는 thin client.
+매 호출의 시작 시간을 줄이기 위해 urllib/http.client 대신 socket으로 HTTP 요청을 직접 보낸다.
+"""
+
+import json
+import socket
+import sys
+from typing import Dict, Optional
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def server_address(config: Dict) -> tuple:
+    """config.json의 server 설정 → (host, port)"""
+    server_config = config.get("server", {})
+    return server_config.get("host", DEFAULT_HOST), server_config.get("port", DEFAULT_PORT)
+
+
+def daemon_search(config_path: str, query: str, timeout: float = 60.0, **params) -> Optional[Dict]:
+    """
+    실행 중인 데몬으로 검색
+
+    Args:
+        config_path: config.json 경로 (server.host/port 확인용)
+        query: 검색 쿼리
+        timeout: 응답 대기 시간 (초)
+        **params: KnowledgeSearch.search() 인자
+
+    Returns:
+        데몬 응답 {"results", "elapsed_ms", "stages", "query_cache"},
+        데몬이 없거나 포트의 프로세스가 데몬이 아니면 None
+        (호출 측에서 in-process 검색으로 대체)
+
+    Raises:
+        RuntimeError: 데몬이 검색 중 오류를 돌려준 경우
+    """
+    with open(config_path) as f:
+        config = json.load(f)
+    host, port = server_address(config)
+    if host in ("0.0.0.0", "::"):
+        host = DEFAULT_HOST
+
+    body = json.dumps({"query": query, **params}).encode("utf-8")
+    request = (
+        f"POST /search HTTP/1.1\r\n"
+        f"Host: {host}:{port}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n"
+    ).encode("ascii") + body
+
+    try:
+        sock = socket.create_connection((host, port), timeout=1.0)
+    except OSError:
+        # 데몬이 떠 있지 않음
+        return None
+
+    try:
+        with sock:
+            sock.settimeout(timeout)
+            sock.sendall(request)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except OSError:
+        # 연결이 끊기거나 응답이 없음 (데몬이 아닌 프로세스일 수 있다)
+        return _not_daemon(host, port)
+
+    head, _, payload = b"".join(chunks).partition(b"\r\n\r\n")
+    try:
+        status = int(head.split(b" ", 2)[1])
+        data = json.loads(payload)
+    except (IndexError, ValueError):
+        return _not_daemon(host, port)
+
+    # ks serve 응답인지 확인 (성공: results 리스트, 실패: 400/500 + error)
+    if not isinstance(data, dict):
+        return _not_daemon(host, port)
+    if status == 200 and isinstance(data.get("results"), list):
+        return data
+    if status in (400, 500) and "error" in data:
+        raise RuntimeError(f"search daemon error: {data['error']}")
+    return _not_daemon(host, port)
+
+
+def _not_daemon(host: str, port: int) -> None:
+    """포트를 다른 프로세스가 쓰고 있을 때: 경고만 출력하고 in-process 검색으로 대체"""
+    print(f"⚠️  {host}:{port} is not a ks search daemon, searching in-process", file=sys.stderr)
+    return None
@@ -23,6 +23,10 @@ class DatabaseSetup:
         with open(config_path) as f:
             config = json.load(f)
         
+        self.backend = config.get("storage", {}).get("backend", "supabase")
+        if self.backend != "supabase":
+            return
+        
         self.supabase_url = config["supabase"]["url"]
         self.supabase_key = config["supabase"]["key"]
         self.supabase = create_client(self.supabase_url, self.supabase_key)
@@ -134,6 +138,40 @@ class DatabaseSetup:
         status = "✅" if checks['search_function'] else "❌"
         print(f"{status} search_embeddings function")
         
+        checks['lexical_function'] = self.check_function_exists('search_lexical')
+        status = "✅" if checks['lexical_function'] else "❌"
+        print(f"{status} search_lexical function")
+        
+        checks['recency_function'] = self.check_function_exists('search_recent')
+        status = "✅" if checks['recency_function'] else "❌"
+        print(f"{status} search_recent function")
+        
+        checks['texts_function'] = self.check_function_exists('get_chunk_texts')
+        status = "✅" if checks['texts_function'] else "❌"
+        print(f"{status} get_chunk_texts function")
+        
+        # Check ingest functions
+        checks['file_hashes_function'] = self.check_function_exists('get_file_hashes')
+        status = "✅" if checks['file_hashes_function'] else "❌"
+        print(f"{status} get_file_hashes function")
+        
+        checks['replace_function'] = self.check_function_exists('replace_embeddings')
+        status = "✅" if checks['replace_function'] else "❌"
+        print(f"{status} replace_embeddings function")
+        
+        checks['promote_function'] = self.check_function_exists('promote_file_version')
+        status = "✅" if checks['promote_function'] else "❌"
+        print(f"{status} promote_file_version function")
+        
+        checks['backfill_function'] = self.check_function_exists('backfill_typed_columns')
+        status = "✅" if checks['backfill_function'] else "❌"
+        print(f"{status} backfill_typed_columns function")
+        
+        # Check stats function (ks status)
+        checks['stats_function'] = self.check_function_exists('get_stats')
+        status = "✅" if checks['stats_function'] else "❌"
+        print(f"{status} get_stats function")
+        
         return checks
     
     def setup(self) -> bool:
@@ -145,6 +183,10 @@ class DatabaseSetup:
         """
         print("🚀 Knowledge Search - Database Setup\n")
         
+        if self.backend != "supabase":
+            print(f"✅ Storage backend '{self.backend}' needs no database setup.")
+            return True
+        
         # Test connection
         print("1️⃣  Testing connection...")
         if not self.test_connection():
@@ -159,6 +201,17 @@ class DatabaseSetup:
         all_ok = all(checks.values())
         
         if all_ok:
+            # Fill typed metadata columns of rows stored before they existed
+            print("\n3️⃣  Backfilling typed metadata columns...")
+            total = 0
+            while True:
+                updated = self.supabase.rpc('backfill_typed_columns', {'batch_size': 1000}).execute().data
+                if not updated:
+                    break
+                total += updated
+                print(f"   {total} rows filled...")
+            print(f"✅ {total} rows backfilled" if total else "✅ Typed columns are up to date")
+            
             print("\n✅ Database is fully configured!")
             return True
         else:
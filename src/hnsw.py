@@ -0,0 +1,363 @@
+"""
+Knowledge Search - HNSW 근사 최근접 이웃 인덱스
+
+로컬 저장소용 in-process HNSW (Hierarchical Navigable Small World) 그래프
+(Malkov & Yashunin, 2016). NumPy만 사용하며 코사인 유사도(정규화 벡터 내적) 기준이다.
+"""
+
+import heapq
+import math
+import os
+import pickle
+import random
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class HNSWIndex:
+    """
+    HNSW 그래프 인덱스
+
+    - add(): 점진적 삽입
+    - delete(): tombstone 방식 삭제 (그래프 탐색에는 쓰이고 결과에서는 제외)
+    - search(): 쿼리별 ef_search 조절 가능
+    - save()/load(): 디스크 저장
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        M: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        seed: int = 42
+    ):
+        """
+        초기화
+
+        Args:
+            dim: 벡터 차원
+            M: 노드당 이웃 수 (0층은 2*M)
+            ef_construction: 삽입 시 탐색 폭 (클수록 정확, 느린 빌드)
+            ef_search: 기본 검색 탐색 폭 (클수록 recall↑, latency↑)
+            seed: 층 배정 난수 seed
+        """
+        import numpy as np
+
+        self.np = np
+        self.dim = dim
+        self.M = M
+        self.M0 = 2 * M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.level_mult = 1 / math.log(M)
+        self.rng = random.Random(seed)
+
+        self.vectors = np.zeros((1024, dim), dtype=np.float32)
+        self.count = 0
+        self.labels: List[int] = []
+        self.label_to_node: Dict[int, int] = {}
+        self.links: List[List[List[int]]] = []
+        self.deleted = set()
+        self.entry_point: Optional[int] = None
+        self.max_level = -1
+
+    def __len__(self) -> int:
+        return len(self.label_to_node)
+
+    def __contains__(self, label: int) -> bool:
+        return label in self.label_to_node
+
+    @property
+    def tombstones(self) -> int:
+        """삭제 표시만 된 노드 수"""
+        return len(self.deleted)
+
+    def _normalize(self, vector):
+        np = self.np
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _grow(self):
+        np = self.np
+        grown = np.zeros((len(self.vectors) * 2, self.dim), dtype=np.float32)
+        grown[:self.count] = self.vectors[:self.count]
+        self.vectors = grown
+
+    def _search_layer(self, query, entry_points: List[int], ef: int, level: int) -> List[Tuple[float, int]]:
+        """
+        한 층에서 best-first 탐색
+
+        Returns:
+            (유사도, 노드) 리스트 (최대 ef개, 정렬 안 됨)
+        """
+        visited = set(entry_points)
+        sims = (self.vectors[entry_points] @ query).tolist()
+
+        candidates = [(-s, n) for s, n in zip(sims, entry_points)]
+        heapq.heapify(candidates)
+        results = [(s, n) for s, n in zip(sims, entry_points)]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if -neg_sim < results[0][0] and len(results) >= ef:
+                break
+
+            neighbors = [n for n in self.links[node][level] if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+
+            for sim, neighbor in zip((self.vectors[neighbors] @ query).tolist(), neighbors):
+                if len(results) < ef or sim > results[0][0]:
+                    heapq.heappush(candidates, (-sim, neighbor))
+                    heapq.heappush(results, (sim, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return results
+
+    def _select_neighbors(self, candidates: List[Tuple[float, int]], m: int) -> List[int]:
+        """
+        이웃 선택 휴리스틱
+
+        이미 고른 이웃보다 기준점에 더 가까운 후보만 남겨 여러 방향으로
+        연결되도록 한다. 모자라면 남은 후보 중 가까운 순으로 채운다.
+        """
+        ordered = sorted(candidates, reverse=True)
+        if len(ordered) <= m:
+            return [node for _, node in ordered]
+
+        nodes = [node for _, node in ordered]
+        candidate_vectors = self.vectors[nodes]
+        # 후보끼리의 유사도를 한 번에 계산
+        gram = candidate_vectors @ candidate_vectors.T
+
+        selected: List[int] = []
+        pruned: List[int] = []
+
+        for i, (sim, node) in enumerate(ordered):
+            if len(selected) >= m:
+                break
+            if selected and (gram[i, selected] > sim).any():
+                pruned.append(i)
+                continue
+            selected.append(i)
+
+        for i in pruned:
+            if len(selected) >= m:
+                break
+            selected.append(i)
+
+        return [nodes[i] for i in selected]
+
+    def add(self, label: int, vector):
+        """
+        벡터 삽입
+
+        Args:
+            label: 외부 식별자 (LocalStore의 chunk id)
+            vector: 벡터 (내부에서 정규화)
+        """
+        if label in self.label_to_node:
+            self.delete(label)
+
+        query = self._normalize(vector)
+        if self.count == len(self.vectors):
+            self._grow()
+
+        node = self.count
+        self.vectors[node] = query
+        self.count += 1
+        self.labels.append(label)
+        self.label_to_node[label] = node
+
+        level = int(-math.log(1.0 - self.rng.random()) * self.level_mult)
+        self.links.append([[] for _ in range(level + 1)])
+
+        if self.entry_point is None:
+            self.entry_point = node
+            self.max_level = level
+            return
+
+        entry = [self.entry_point]
+        for lc in range(self.max_level, level, -1):
+            best = max(self._search_layer(query, entry, 1, lc))
+            entry = [best[1]]
+
+        for lc in range(min(level, self.max_level), -1, -1):
+            candidates = self._search_layer(query, entry, self.ef_construction, lc)
+            max_links = self.M0 if lc == 0 else self.M
+            neighbors = self._select_neighbors(candidates, self.M)
+            self.links[node][lc] = neighbors
+
+            for neighbor in neighbors:
+                links = self.links[neighbor][lc]
+                links.append(node)
+                if len(links) > max_links:
+                    sims = (self.vectors[links] @ self.vectors[neighbor]).tolist()
+                    self.links[neighbor][lc] = self._select_neighbors(list(zip(sims, links)), max_links)
+
+            entry = [n for _, n in candidates]
+
+        if level > self.max_level:
+            self.max_level = level
+            self.entry_point = node
+
+    def add_items(self, labels: Sequence[int], vectors):
+        """여러 벡터 삽입"""
+        for label, vector in zip(labels, vectors):
+            self.add(int(label), vector)
+
+    def delete(self, label: int):
+        """
+        벡터 삭제 (tombstone)
+
+        노드는 그래프 연결을 유지하기 위해 남겨 두고 검색 결과에서만 제외한다.
+        tombstone이 많아지면 rebuild()로 다시 만든다.
+        """
+        node = self.label_to_node.pop(label, None)
+        if node is not None:
+            self.deleted.add(node)
+
+    def search(self, query, k: int, ef_search: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        근사 top-k 검색
+
+        Args:
+            query: 쿼리 벡터
+            k: 결과 수
+            ef_search: 탐색 폭 (기본: 인덱스 설정값, 최소 k)
+
+        Returns:
+            (label, 코사인 유사도) 리스트 (유사도 내림차순)
+        """
+        if self.entry_point is None or k <= 0:
+            return []
+
+        query = self._normalize(query)
+        ef = max(ef_search or self.ef_search, k)
+
+        entry = [self.entry_point]
+        for lc in range(self.max_level, 0, -1):
+            best = max(self._search_layer(query, entry, 1, lc))
+            entry = [best[1]]
+
+        # 삭제된 노드는 결과에서 빠지므로 그만큼 더 넓게 탐색
+        found = self._search_layer(query, entry, ef + min(len(self.deleted), ef), 0)
+        found = sorted(((s, n) for s, n in found if n not in self.deleted), reverse=True)[:k]
+        return [(self.labels[n], s) for s, n in found]
+
+    def rebuild(self) -> "HNSWIndex":
+        """tombstone 없이 살아 있는 벡터만으로 새 인덱스 생성"""
+        index = HNSWIndex(self.dim, self.M, self.ef_construction, self.ef_search)
+        for label, node in self.label_to_node.items():
+            index.add(label, self.vectors[node])
+        return index
+
+    def save(self, path: Path):
+        """디스크에 저장 (임시 파일에 쓴 뒤 교체)"""
+        path = Path(path)
+        state = {
+            "dim": self.dim,
+            "M": self.M,
+            "ef_construction": self.ef_construction,
+            "ef_search": self.ef_search,
+            "vectors": self.vectors[:self.count].copy(),
+            "labels": self.labels,
+            "links": self.links,
+            "deleted": self.deleted,
+            "entry_point": self.entry_point,
+            "max_level": self.max_level
+        }
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "HNSWIndex":
+        """save()로 저장한 인덱스 읽기"""
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+
+        index = cls(state["dim"], state["M"], state["ef_construction"], state["ef_search"])
+        index.vectors = state["vectors"]
+        index.count = len(state["vectors"])
+        index.labels = state["labels"]
+        index.links = state["links"]
+        index.deleted = state["deleted"]
+        index.entry_point = state["entry_point"]
+        index.max_level = state["max_level"]
+        index.label_to_node = {
+            label: node for node, label in enumerate(index.labels) if node not in index.deleted
+        }
+        if index.count == 0:
+            index.vectors = index.np.zeros((1024, index.dim), dtype=index.np.float32)
+        return index
+
+
+def percentile(values: List[float], p: float) -> float:
+    """nearest-rank 백분위수"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def recall_report(
+    index: HNSWIndex,
+    exact_search: Callable,
+    queries: Sequence,
+    k: int = 10,
+    ef_values: Sequence[int] = (16, 32, 64, 128, 256)
+) -> List[Dict]:
+    """
+    HNSW 검색과 정확한 검색의 recall@k / latency 비교
+
+    Args:
+        index: HNSW 인덱스
+        exact_search: (query, k) -> label 리스트 를 돌려주는 정확한 검색 함수
+        queries: 쿼리 벡터 리스트
+        k: top-k
+        ef_values: 비교할 ef_search 값들
+
+    Returns:
+        [{"ef_search", "recall", "p50_ms", "p95_ms"}, ...]
+        첫 항목은 정확한 검색 ({"ef_search": "exact", "recall": 1.0, ...})
+    """
+    truth = []
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        truth.append(set(exact_search(query, k)))
+        timings.append((time.perf_counter() - start) * 1000)
+
+    report = [{
+        "ef_search": "exact",
+        "recall": 1.0,
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95)
+    }]
+
+    for ef in ef_values:
+        hits = 0
+        timings = []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            found = index.search(query, k, ef_search=ef)
+            timings.append((time.perf_counter() - start) * 1000)
+            hits += len(expected & {label for label, _ in found})
+
+        total = sum(len(expected) for expected in truth)
+        report.append({
+            "ef_search": ef,
+            "recall": hits / total if total else 1.0,
+            "p50_ms": percentile(timings, 50),
+            "p95_ms": percentile(timings, 95)
+        })
+
+    return report
@@ -5,15 +5,213 @@ Obsidian 문서를 청크로 분할하여 Vector DB에 저장
 """
 
 import json
-import openai
-from supabase import create_client
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Iterator, Tuple, Set
 from pathlib import Path
 import hashlib
-import tiktoken
 import re
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from cache import open_embedding_cache, open_result_cache, open_translation_cache
+from chunker import MarkdownChunker, count_words
+from language import is_english
+from providers import embedding_model_key, open_providers
+from ratelimit import RateLimiter, retry_with_backoff
+from storage import VectorStore, open_store
+from tracing import bind, format_stages, open_tracer, span
+
+
+# 나눠 저장하는 동안 새 행에 붙이는 file_hash 접미사 (promote_file로 확정하기 전 표시)
+STAGED_SUFFIX = ".staged"
+
+
+class EmbeddingWriter:
+    """
+    embeddings 테이블 버퍼 writer
+    
+    행을 모아 두었다가 VectorStore.replace_rows() 한 번으로 저장한다.
+    replace_rows는 같은 path의 기존 행을 지우고 새 행을 넣는 작업을 하나의
+    트랜잭션으로 처리하므로, 재임베딩해도 중복 행이 쌓이지 않는다.
+    버퍼에는 파일 단위로만 들어가므로, 실패한 파일의 청크 일부만
+    테이블에 남는 일이 없다 (파일 단위 원자성).
+    """
+    
+    def __init__(
+        self,
+        store: VectorStore,
+        max_rows: int = 200,
+        max_bytes: int = 5_000_000,
+        on_flush: Optional[Callable[[], None]] = None
+    ):
+        """
+        초기화
+        
+        Args:
+            store: 벡터 저장소
+            max_rows: 한 번의 insert 요청에 담을 최대 행 수
+            max_bytes: 한 번의 insert 요청에 담을 최대 payload 크기 (bytes)
+            on_flush: 저장소에 쓴 flush마다 호출 (검색 결과 캐시 무효화)
+        """
+        self.store = store
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.on_flush = on_flush
+        
+        # (파일 경로, 행 리스트, payload 크기)
+        self.pending: List[Tuple[Path, List[Dict], int]] = []
+        self.pending_rows = 0
+        self.pending_bytes = 0
+        
+        # 통계
+        self.requests = 0
+        self.written_files = 0
+        self.failed_files: List[Path] = []
+    
+    @staticmethod
+    def _row_size(row: Dict) -> int:
+        """insert payload에서 행 하나가 차지하는 크기 (bytes)"""
+        return len(json.dumps(row, ensure_ascii=False).encode('utf-8'))
+    
+    def add_file(self, file_path: Path, rows: List[Dict]):
+        """
+        한 파일의 행 전체를 버퍼에 추가 (제한을 넘으면 먼저 flush)
+        
+        Args:
+            file_path: 파일 경로
+            rows: {"embedding": [...], "metadata": {...}} 형태의 행 리스트
+        """
+        if not rows:
+            return
+        
+        size = sum(self._row_size(row) for row in rows)
+        
+        if self.pending and (
+            self.pending_rows + len(rows) > self.max_rows
+            or self.pending_bytes + size > self.max_bytes
+        ):
+            self.flush()
+        
+        self.pending.append((file_path, rows, size))
+        self.pending_rows += len(rows)
+        self.pending_bytes += size
+        
+        if self.pending_rows >= self.max_rows or self.pending_bytes >= self.max_bytes:
+            self.flush()
+    
+    def flush(self):
+        """버퍼에 쌓인 행을 multi-row insert로 저장 (저장소에 썼으면 on_flush 호출)"""
+        pending = self.pending
+        self.pending = []
+        self.pending_rows = 0
+        self.pending_bytes = 0
+        
+        if not pending:
+            return
+        
+        requests = self.requests
+        try:
+            self._flush(pending)
+        finally:
+            # 실패/rollback한 flush도 일부를 썼을 수 있다
+            if self.on_flush and self.requests != requests:
+                self.on_flush()
+    
+    def _flush(self, pending: List[Tuple[Path, List[Dict], int]]):
+        """flush() 본체"""
+        if len(pending) == 1:
+            file_path, rows, _ = pending[0]
+            self._write_file(file_path, rows)
+            return
+        
+        try:
+            self._replace([row for _, rows, _ in pending for row in rows])
+        except Exception as e:
+            # 한 요청은 하나의 트랜잭션이므로 아무것도 저장되지 않았다.
+            # 문제가 있는 파일만 골라내기 위해 파일별로 다시 저장
+            print(f"   ⚠️  일괄 저장 실패, 파일별로 재시도: {str(e)[:100]}")
+            for file_path, rows, _ in pending:
+                self._write_file(file_path, rows)
+            return
+        
+        for file_path, _, _ in pending:
+            self.written_files += 1
+            print(f"   ✅ {file_path.name} 저장 완료")
+    
+    def _replace(self, rows: List[Dict]):
+        """행 리스트를 한 번의 요청으로 저장 (같은 path의 기존 행은 교체)"""
+        with span("store.replace_rows", rows=len(rows)):
+            self.store.replace_rows(rows)
+        self.requests += 1
+    
+    def _insert(self, rows: List[Dict]):
+        """행 리스트를 한 번의 요청으로 추가 (기존 행 유지)"""
+        with span("store.insert_rows", rows=len(rows)):
+            self.store.insert_rows(rows)
+        self.requests += 1
+    
+    def _split(self, rows: List[Dict]) -> Iterator[List[Dict]]:
+        """한 파일의 행을 요청 크기 제한에 맞게 분할"""
+        batch = []
+        batch_bytes = 0
+        
+        for row in rows:
+            size = self._row_size(row)
+            if batch and (len(batch) >= self.max_rows or batch_bytes + size > self.max_bytes):
+                yield batch
+                batch = []
+                batch_bytes = 0
+            batch.append(row)
+            batch_bytes += size
+        
+        if batch:
+            yield batch
+    
+    def _write_file(self, file_path: Path, rows: List[Dict]):
+        """
+        한 파일의 행을 저장
+        
+        한 요청에 들어가면 replace_rows 한 번으로 교체한다. 요청 크기 제한 때문에
+        나눠야 하면 새 행을 임시 file_hash로 모두 추가한 뒤 promote_file로
+        이전 버전 삭제와 확정을 한 번에 한다. 중간에 실패하면 임시 행만
+        삭제하므로 이전 버전이 그대로 남는다 (파일 단위 원자성).
+        """
+        metadata = rows[0]["metadata"]
+        staged_hash = f"{metadata['file_hash']}{STAGED_SUFFIX}"
+        batches = list(self._split([
+            {**row, "metadata": {**row["metadata"], "file_hash": staged_hash}} for row in rows
+        ]))
+        written = False
+        try:
+            if len(batches) == 1:
+                self._replace(rows)
+            else:
+                for batch in batches:
+                    self._insert(batch)
+                    written = True
+                with span("store.promote_file"):
+                    promoted = self.store.promote_file(metadata["path"], staged_hash, metadata["file_hash"])
+                self.requests += 1
+                if promoted != len(rows):
+                    raise RuntimeError(f"promoted {promoted} of {len(rows)} staged rows")
+        except Exception as e:
+            if written:
+                self._rollback(metadata["path"], staged_hash)
+            self.failed_files.append(file_path)
+            print(f"   ❌ 오류: {file_path.name} - {str(e)[:100]}")
+            return
+        
+        self.written_files += 1
+        print(f"   ✅ {file_path.name} 저장 완료")
+    
+    def _rollback(self, path: str, staged_hash: str):
+        """부분 저장된 임시 행 삭제 (path + 임시 file_hash 기준)"""
+        try:
+            self.store.delete_file(path, staged_hash)
+        except Exception as e:
+            print(f"   ⚠️  롤백 실패 ({path}): {str(e)[:100]}")
+
 
 class KnowledgeIngest:
     """데이터 임베딩 및 저장"""
@@ -25,28 +223,80 @@ class KnowledgeIngest:
         
         self.config = config
         
-        self.supabase = create_client(
-            config["supabase"]["url"],
-            config["supabase"]["key"]
-        )
+        # Vector store (Supabase 또는 로컬)
+        self.store = open_store(config)
         
         # Embedding configuration
         self.embedding_provider = config["embedding"]["provider"]
         self.embedding_model = config["embedding"]["model"]
         self.embedding_api_key = config["embedding"]["api_key"]
+        # Reduced (Matryoshka) dimensions for text-embedding-3-* (None = model default)
+        self.embedding_dimensions = config["embedding"].get("dimensions")
+        self.embedding_key = embedding_model_key(self.embedding_model, self.embedding_dimensions)
         
         # Translation configuration
         self.translation_provider = config["translation"]["provider"]
         self.translation_model = config["translation"].get("model", "")
         self.translation_api_key = config["translation"].get("api_key", "")
         
+        # Embedding batch configuration
+        # (OpenAI: 최대 2048개/300k 토큰, Cohere: 최대 96개 입력)
+        self.embedding_batch_size = config["embedding"].get("batch_size", 96)
+        self.embedding_batch_tokens = config["embedding"].get("batch_tokens", 100000)
+        
+        # Rate limit configuration (None = 제한 없음, 429 응답은 항상 backoff 재시도)
+        self.embedding_limiter = RateLimiter(
+            config["embedding"].get("requests_per_minute"),
+            config["embedding"].get("tokens_per_minute")
+        )
+        self.translation_limiter = RateLimiter(
+            config["translation"].get("requests_per_minute"),
+            config["translation"].get("tokens_per_minute")
+        )
+        
+        # DB write batch configuration (multi-row insert)
+        self.insert_batch_rows = config.get("supabase", {}).get("insert_batch_rows", 200)
+        self.insert_batch_bytes = config.get("supabase", {}).get("insert_batch_bytes", 5_000_000)
+        
         # Chunking configuration
         self.chunk_size = 512
         self.chunk_overlap = 128
         self.min_chunk_size = 100
         
-        # tiktoken encoder
-        self.encoding = tiktoken.get_encoding("cl100k_base")
+        # tiktoken encoder (처음 쓸 때 로드)
+        self._encoding = None
+        self._encoding_lock = threading.Lock()
+        
+        # Embedding cache (~/.cache/knowledge-search)
+        self.embedding_cache = open_embedding_cache(config)
+        
+        # 검색 결과 캐시 (저장할 때마다 ingest generation을 올려 무효화)
+        self.result_cache = open_result_cache(config)
+        
+        # Translation cache + 영어 청크 번역 생략
+        self.translation_cache = open_translation_cache(config)
+        self.skip_english = config["translation"].get("skip_english", True)
+        
+        # Provider clients (프로세스당 한 번 생성, keep-alive 연결 재사용)
+        self.providers = open_providers(config)
+        
+        # 단계별 시간 측정 (tracing.enabled면 파일로 내보냄)
+        self.tracer = open_tracer(config)
+        self.last_trace = None
+    
+    @property
+    def encoding(self):
+        """
+        tiktoken cl100k_base encoder
+        
+        로딩에 수백 ms가 걸리므로 (BPE 파일 읽기) 청크 분할/토큰 계산에서 처음 쓸 때 만든다.
+        """
+        with self._encoding_lock:
+            if self._encoding is None:
+                import tiktoken
+                
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+            return self._encoding
     
     def translate_text(self, text: str) -> str:
         """
@@ -61,51 +311,48 @@ class KnowledgeIngest:
         if self.translation_provider == "none":
             return text
         
+        # 이미 영어인 청크는 번역 생략
+        if self.skip_english and is_english(text):
+            if self.translation_cache:
+                self.translation_cache.count_skipped()
+            return text
+        
+        if self.translation_cache:
+            cached = self.translation_cache.get(
+                self.translation_provider, self.translation_model, "document", text
+            )
+            if cached is not None:
+                return cached
+        
         try:
-            if self.translation_provider == "anthropic":
-                from anthropic import Anthropic
-                
-                anthropic = Anthropic(api_key=self.translation_api_key)
-                
-                response = anthropic.messages.create(
-                    model=self.translation_model,
-                    max_tokens=4096,
-                    temperature=0.3,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": f"You are a professional translator. Translate the following text to English. Preserve formatting, markdown, and technical terms. Keep it natural and accurate.\n\n{text}"
-                        }
-                    ]
-                )
-                
-                return response.content[0].text
-            
-            elif self.translation_provider == "openai":
-                import openai as oai
-                
-                oai.api_key = self.translation_api_key
-                
-                response = oai.chat.completions.create(
-                    model=self.translation_model,
-                    max_tokens=4096,
-                    temperature=0.3,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": f"You are a professional translator. Translate the following text to English. Preserve formatting, markdown, and technical terms. Keep it natural and accurate.\n\n{text}"
-                        }
-                    ]
-                )
-                
-                return response.choices[0].message.content
-            
-            else:
-                return text
+            with span("translate"):
+                tokens = len(self.encoding.encode(text)) if self.translation_limiter.limits_tokens else 0
+                self.translation_limiter.acquire(tokens)
+                translated = retry_with_backoff(self._request_translation, text)
         
         except Exception as e:
             print(f"      ⚠️  번역 실패, 원문 사용: {str(e)[:100]}")
             return text
+        
+        if self.translation_cache:
+            self.translation_cache.put(
+                self.translation_provider, self.translation_model, "document", text, translated
+            )
+        
+        return translated
+    
+    def _request_translation(self, text: str) -> str:
+        """번역 API 호출 (1회)"""
+        if self.translation_provider not in ("anthropic", "openai"):
+            return text
+        
+        return self.providers.complete(
+            self.translation_provider,
+            self.translation_model,
+            self.translation_api_key,
+            f"You are a professional translator. Translate the following text to English. Preserve formatting, markdown, and technical terms. Keep it natural and accurate.\n\n{text}",
+            max_tokens=4096
+        )
     
     def get_embedding(self, text: str) -> List[float]:
         """
@@ -117,33 +364,118 @@ class KnowledgeIngest:
         Returns:
             임베딩 벡터
         """
-        if self.embedding_provider == "openai":
-            openai.api_key = self.embedding_api_key
-            
-            response = openai.embeddings.create(
-                model=self.embedding_model,
-                input=text
+        return self.get_embeddings([text])[0]
+    
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        여러 텍스트를 한 번의 API 호출로 벡터로 변환
+        
+        Args:
+            texts: 입력 텍스트 리스트
+        
+        Returns:
+            입력 순서와 같은 순서의 임베딩 벡터 리스트
+        """
+        if not texts:
+            return []
+        
+        # 캐시에 있는 텍스트는 API 호출 생략
+        input_type = "search_document" if self.embedding_provider == "cohere" else ""
+        if self.embedding_cache:
+            vectors = self.embedding_cache.get_many(
+                self.embedding_provider, self.embedding_key, texts, input_type
             )
-            return response.data[0].embedding
+        else:
+            vectors = [None] * len(texts)
+        
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if not missing:
+            return vectors
+        
+        # 같은 배치 안의 중복 텍스트(보일러플레이트 청크 등)는 한 번만 요청
+        missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+        with span("embed", texts=len(missing_texts)):
+            tokens = sum(len(self.encoding.encode(text)) for text in missing_texts) if self.embedding_limiter.limits_tokens else 0
+            self.embedding_limiter.acquire(tokens)
+            fetched = retry_with_backoff(self._request_embeddings, missing_texts)
+        
+        if self.embedding_cache:
+            self.embedding_cache.put_many(
+                self.embedding_provider, self.embedding_key, missing_texts, fetched, input_type
+            )
+        
+        fetched_by_text = dict(zip(missing_texts, fetched))
+        for i in missing:
+            vectors[i] = fetched_by_text[texts[i]]
+        
+        return vectors
+    
+    def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """임베딩 API 호출 (1회)"""
+        return self.providers.embed(
+            self.embedding_provider,
+            self.embedding_model,
+            self.embedding_api_key,
+            texts,
+            input_type="search_document",
+            dimensions=self.embedding_dimensions
+        )
+    
+    def batch_rows(self, rows: List[Dict]) -> Iterator[List[Dict]]:
+        """
+        저장할 행을 개수/토큰 제한에 맞는 임베딩 배치로 묶기
+        
+        Args:
+            rows: load_file()이 만든 행 리스트 (여러 파일이 섞여도 됨)
         
-        elif self.embedding_provider == "cohere":
-            import cohere
+        Yields:
+            embedding_batch_size개, embedding_batch_tokens 토큰을 넘지 않는 배치
+        """
+        batch = []
+        batch_tokens = 0
+        
+        for row in rows:
+            tokens = len(self.encoding.encode(row["metadata"]["text"]))
             
-            co = cohere.Client(self.embedding_api_key)
-            response = co.embed(
-                texts=[text],
-                model=self.embedding_model,
-                input_type="search_document"
-            )
-            return response.embeddings[0]
+            if batch and (
+                len(batch) >= self.embedding_batch_size
+                or batch_tokens + tokens > self.embedding_batch_tokens
+            ):
+                yield batch
+                batch = []
+                batch_tokens = 0
+            
+            batch.append(row)
+            batch_tokens += tokens
         
-        else:
-            raise ValueError(f"Unknown embedding provider: {self.embedding_provider}")
+        if batch:
+            yield batch
+    
+    def embed_rows(self, rows: List[Dict]):
+        """
+        행 리스트에 임베딩을 배치 단위로 채워 넣기 (row["embedding"])
+        
+        Args:
+            rows: load_file()이 만든 행 리스트 (번역 완료)
+        """
+        for batch in self.batch_rows(rows):
+            embeddings = self.get_embeddings([row["metadata"]["text"] for row in batch])
+            
+            if len(embeddings) != len(batch):
+                raise ValueError(f"임베딩 개수 불일치: {len(batch)}개 요청, {len(embeddings)}개 응답")
+            
+            for row, embedding in zip(batch, embeddings):
+                row["embedding"] = embedding
+            
+            print(f"      🧮 {len(batch)}개 청크 임베딩 완료")
     
     def chunk_text(self, text: str, metadata: dict) -> List[Dict]:
         """
         텍스트를 청크로 분할
         
+        제목/문단/코드 블록 경계에서 나누고 chunk_size 토큰까지 채운다
+        (chunker.MarkdownChunker). 청크는 원문을 잘라 만들므로 서식이 유지된다.
+        
         Args:
             text: 원본 텍스트
             metadata: 메타데이터
@@ -151,11 +483,8 @@ class KnowledgeIngest:
         Returns:
             청크 리스트
         """
-        # Check word count
-        word_count = len(text.split())
-        
-        # 짧은 문서는 전체 임베딩
-        if word_count < 200:
+        # 짧은 문서는 전체 임베딩 (200단어까지만 센다)
+        if count_words(text, 200) < 200:
             return [{
                 "text": text,
                 "chunk_index": 0,
@@ -163,38 +492,23 @@ class KnowledgeIngest:
                 **metadata
             }]
         
-        # 토큰화
-        tokens = self.encoding.encode(text)
-        
-        # 청크 분할
-        chunks = []
-        start = 0
-        chunk_index = 0
-        
-        while start < len(tokens):
-            end = min(start + self.chunk_size, len(tokens))
-            chunk_tokens = tokens[start:end]
-            
-            # 토큰을 텍스트로 디코딩
-            chunk_text = self.encoding.decode(chunk_tokens)
-            
-            # 최소 크기 확인
-            if len(chunk_tokens) >= self.min_chunk_size:
-                chunks.append({
-                    "text": chunk_text.strip(),
-                    "chunk_index": chunk_index,
-                    **metadata
-                })
-                chunk_index += 1
-            
-            # 다음 청크 시작 (겹침 고려)
-            start += (self.chunk_size - self.chunk_overlap)
-        
-        # total_chunks 추가
-        for chunk in chunks:
-            chunk["total_chunks"] = len(chunks)
+        chunker = MarkdownChunker(
+            self.encoding,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            min_chunk_size=self.min_chunk_size
+        )
+        texts = chunker.split(text)
         
-        return chunks
+        return [
+            {
+                "text": chunk_text,
+                "chunk_index": chunk_index,
+                "total_chunks": len(texts),
+                **metadata
+            }
+            for chunk_index, chunk_text in enumerate(texts)
+        ]
     
     def parse_creation_date(self, content: str) -> Optional[str]:
         """
@@ -264,14 +578,25 @@ class KnowledgeIngest:
         
         return None
     
-    def ingest_file(self, file_path: Path, source: str = "obsidian", author: str = "unknown"):
+    def load_file(
+        self,
+        file_path: Path,
+        source: str = "obsidian",
+        author: str = "unknown",
+        stored_hashes: Optional[Set[str]] = None
+    ) -> List[Dict]:
         """
-        파일을 읽어서 임베딩
+        파일을 읽어서 청킹까지 마친 저장용 행 생성 (번역/임베딩 제외)
         
         Args:
             file_path: 파일 경로
             source: 소스 이름
             author: 작성자
+            stored_hashes: DB에 저장된 이 파일의 file_hash 집합 (증분 모드)
+        
+        Returns:
+            {"metadata": {...}} 형태의 행 리스트 (metadata.text는 아직 원문)
+            (빈 파일이거나 저장된 내용과 같으면 빈 리스트)
         """
         # 파일 읽기
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -279,7 +604,14 @@ class KnowledgeIngest:
         
         if not content.strip():
             print(f"   ⏭️  빈 파일: {file_path.name}")
-            return
+            return []
+        
+        file_hash = hashlib.md5(content.encode()).hexdigest()
+        
+        # 증분 모드: 저장된 내용과 같으면 번역/임베딩 생략
+        if stored_hashes == {file_hash}:
+            print(f"   ⏭️  변경 없음: {file_path.name}")
+            return []
         
         # 생성일 파싱
         created_date = self.parse_creation_date(content)
@@ -289,11 +621,11 @@ class KnowledgeIngest:
         
         # 메타데이터
         metadata = {
-            "path": str(file_path.relative_to(Path.home())),
+            "path": self.stored_path(file_path),
             "source": source,
             "author": author,
             "folder": file_path.parent.name,
-            "file_hash": hashlib.md5(content.encode()).hexdigest()
+            "file_hash": file_hash
         }
         
         # 생성일이 있으면 추가
@@ -308,45 +640,280 @@ class KnowledgeIngest:
         
         # 청킹
         chunks = self.chunk_text(content, metadata)
-        print(f"   📝 {len(chunks)}개 청크")
+        print(f"   📝 {file_path.name}: {len(chunks)}개 청크")
+        
+        # 메타데이터 구성 (text는 번역 단계에서 교체)
+        return [
+            {
+                "metadata": {
+                    **chunk,
+                    "text_original": chunk["text"]
+                }
+            }
+            for chunk in chunks
+        ]
+    
+    @staticmethod
+    def stored_path(path: Path) -> str:
+        """
+        metadata.path 값
         
-        # 각 청크 처리
-        for i, chunk in enumerate(chunks, 1):
-            # 원문 저장
-            text_original = chunk["text"]
-            
-            # 번역
-            text_translated = self.translate_text(text_original)
-            if self.translation_provider != "none":
-                print(f"      [{i}/{len(chunks)}] 번역 완료")
-            
-            # 임베딩
-            embedding = self.get_embedding(text_translated)
-            print(f"      [{i}/{len(chunks)}] 임베딩 완료")
+        홈 기준 상대 경로라서 같은 vault를 다른 기기(다른 홈)에서 ingest해도
+        같은 행으로 교체된다. 홈 밖의 파일은 절대 경로를 쓴다.
+        """
+        path = Path(path).absolute()
+        try:
+            return str(path.relative_to(Path.home()))
+        except ValueError:
+            return str(path)
+    
+    def fetch_file_hashes(self, folder_path: Path) -> Dict[str, Set[str]]:
+        """
+        폴더 아래 파일들의 저장된 file_hash 조회 (한 번의 조회)
+        
+        Args:
+            folder_path: 폴더 경로
+        
+        Returns:
+            {path: {file_hash, ...}} (path는 metadata.path와 같은 stored_path())
+        """
+        return self.store.file_hashes(self.stored_path(folder_path) + "/")
+    
+    def backfill_columns(self):
+        """
+        typed 메타데이터 컬럼(path, file_hash, ...)이 비어 있는 기존 행 채우기
+        
+        get_file_hashes와 path 단위 교체가 typed 컬럼을 쓰므로, 비어 있는 행이
+        남아 있으면 이미 저장된 파일을 새 파일로 보고 중복 저장하게 된다.
+        채울 행이 없으면 조회 한 번으로 끝난다.
+        """
+        try:
+            filled = self.store.backfill_columns()
+        except Exception as e:
+            # schema.sql 업데이트 전: RPC들도 아직 metadata JSONB 기준이므로 그대로 진행
+            print(f"⚠️  typed 컬럼 backfill 건너뜀 (schema.sql 업데이트 필요): {str(e)[:100]}")
+            return
+        
+        if filled:
+            print(f"🗂️  typed 메타데이터 컬럼 채움: {filled}개 행")
+    
+    def create_writer(self) -> EmbeddingWriter:
+        """설정값으로 버퍼 writer 생성"""
+        return EmbeddingWriter(
+            self.store,
+            max_rows=self.insert_batch_rows,
+            max_bytes=self.insert_batch_bytes,
+            on_flush=self.result_cache.bump_generation if self.result_cache else None
+        )
+    
+    def ingest_file(self, file_path: Path, source: str = "obsidian", author: str = "unknown"):
+        """
+        파일을 읽어서 임베딩
+        
+        Args:
+            file_path: 파일 경로
+            source: 소스 이름
+            author: 작성자
+        """
+        self.ingest_files([file_path], source, author)
+    
+    def _embed_pending(self, pending: List[Tuple[Path, List[Dict]]]) -> List[Tuple[Path, List[Dict]]]:
+        """
+        여러 파일의 청크를 한꺼번에 배치 임베딩
+        
+        배치 임베딩이 실패하면 파일 단위로 다시 시도하여
+        문제가 있는 파일만 건너뛴다.
+        
+        Args:
+            pending: (파일 경로, 행 리스트) 목록
+        
+        Returns:
+            임베딩에 성공한 (파일 경로, 행 리스트) 목록
+        """
+        try:
+            self.embed_rows([row for _, rows in pending for row in rows])
+            return pending
+        except Exception as e:
+            print(f"   ⚠️  배치 임베딩 실패, 파일별로 재시도: {str(e)[:100]}")
+        
+        embedded = []
+        for file_path, rows in pending:
+            try:
+                self.embed_rows(rows)
+                embedded.append((file_path, rows))
+            except Exception as e:
+                print(f"   ❌ 오류: {file_path.name} - {str(e)[:100]}")
+        
+        return embedded
+    
+    def ingest_files(
+        self,
+        file_paths: List[Path],
+        source: str = "obsidian",
+        author: str = "unknown",
+        stored: Optional[Dict[str, Set[str]]] = None,
+        workers: int = 1
+    ):
+        """
+        파일 목록을 번역 → 임베딩 → 저장 파이프라인으로 처리
+        
+        - 번역: workers개 스레드가 청크 단위로 병렬 번역
+        - 임베딩: 파일 경계를 넘어 embedding_batch_size 단위 배치로 호출
+        - 저장: EmbeddingWriter가 multi-row insert로 저장
+        
+        단계 사이는 크기가 제한된 큐로 연결되어, 뒤 단계가 밀리면
+        앞 단계가 기다린다 (backpressure). 단계별 시간(load/translate/
+        embed/store)은 trace 하나로 모아 끝에 출력하고 self.last_trace에 남긴다.
+        
+        Args:
+            file_paths: 파일 경로 리스트
+            source: 소스 이름
+            author: 작성자
+            stored: 증분 모드용 {path: {file_hash, ...}} (없으면 모두 처리)
+            workers: 번역 스레드 수
+        """
+        with self.tracer.trace("ingest", files=len(file_paths), workers=workers) as trace:
+            self.last_trace = trace
+            self._run_pipeline(file_paths, source, author, stored, workers)
+        
+        print(f"   ⏱️  단계별 시간 (스레드 합계): {format_stages(trace.stages())}")
+    
+    def _run_pipeline(
+        self,
+        file_paths: List[Path],
+        source: str,
+        author: str,
+        stored: Optional[Dict[str, Set[str]]],
+        workers: int
+    ):
+        """ingest_files()의 파이프라인 본체 (trace 안에서 실행)"""
+        stored = stored or {}
+        workers = max(1, workers)
+        
+        embed_queue = queue.Queue(maxsize=workers * 2)
+        write_queue = queue.Queue(maxsize=workers * 2)
+        writer = self.create_writer()
+        
+        # 캐시된 검색 결과 무효화: 시작할 때, flush마다 (writer.on_flush), 끝날 때.
+        # 저장 도중의 검색이 새 generation으로 캐시한 결과도 마지막 bump로 버려진다.
+        if self.result_cache:
+            self.result_cache.bump_generation()
+        
+        def embed_stage():
+            pending = []
+            pending_rows = 0
             
-            # 메타데이터 구성
-            final_metadata = {
-                **chunk,
-                "text": text_translated,
-                "text_original": text_original
-            }
+            while True:
+                item = embed_queue.get()
+                
+                try:
+                    if item is not None:
+                        file_path, rows, futures = item
+                        for row, future in zip(rows, futures):
+                            row["metadata"]["text"] = future.result()
+                        if self.translation_provider != "none":
+                            print(f"      🌐 {file_path.name}: {len(rows)}개 청크 번역 완료")
+                        
+                        pending.append((file_path, rows))
+                        pending_rows += len(rows)
+                    
+                    if pending and (item is None or pending_rows >= self.embedding_batch_size):
+                        for embedded in self._embed_pending(pending):
+                            write_queue.put(embedded)
+                        pending = []
+                        pending_rows = 0
+                except Exception as e:
+                    # 단계가 멈추면 앞 단계가 큐에서 영원히 기다리므로 계속 진행
+                    print(f"   ❌ 임베딩 단계 오류: {str(e)[:100]}")
+                    pending = []
+                    pending_rows = 0
+                
+                if item is None:
+                    write_queue.put(None)
+                    return
+        
+        def write_stage():
+            while True:
+                item = write_queue.get()
+                try:
+                    if item is None:
+                        writer.flush()
+                    else:
+                        writer.add_file(*item)
+                except Exception as e:
+                    print(f"   ❌ 저장 단계 오류: {str(e)[:100]}")
+                if item is None:
+                    return
+        
+        stages = [
+            threading.Thread(target=bind(embed_stage), name="ks-embed", daemon=True),
+            threading.Thread(target=bind(write_stage), name="ks-write", daemon=True)
+        ]
+        for stage in stages:
+            stage.start()
+        
+        translate = bind(self.translate_text)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ks-translate") as pool:
+                for file_path in file_paths:
+                    try:
+                        with span("load"):
+                            rows = self.load_file(
+                                file_path, source, author,
+                                stored_hashes=stored.get(self.stored_path(file_path))
+                            )
+                    except Exception as e:
+                        print(f"   ❌ 오류: {file_path.name} - {str(e)[:100]}")
+                        continue
+                    
+                    if not rows:
+                        continue
+                    
+                    futures = [
+                        pool.submit(translate, row["metadata"]["text_original"])
+                        for row in rows
+                    ]
+                    # 큐가 가득 차면 여기서 대기 (backpressure)
+                    embed_queue.put((file_path, rows, futures))
+        finally:
+            embed_queue.put(None)
+            for stage in stages:
+                stage.join()
             
-            # Supabase에 저장
-            self.supabase.table("embeddings").insert({
-                "embedding": embedding,
-                "metadata": final_metadata
-            }).execute()
+            if writer.requests and self.result_cache:
+                self.result_cache.bump_generation()
         
-        print(f"   ✅ {file_path.name} 저장 완료")
+        # 근사 인덱스(로컬 HNSW)가 있으면 새 행을 반영해 저장
+        if writer.written_files:
+            with span("store.flush"):
+                self.store.flush()
+        
+        print(f"   💾 {writer.written_files}개 파일 저장 ({writer.requests}회 insert 요청)")
     
-    def ingest_folder(self, folder_name: str, source: str = "obsidian", author: str = "unknown"):
+    def ingest_folder(
+        self,
+        folder_name: str,
+        source: str = "obsidian",
+        author: str = "unknown",
+        force: bool = False,
+        workers: int = 1
+    ):
         """
         폴더 내 모든 .md 파일 임베딩
         
+        여러 파일의 청크를 모아 embedding_batch_size 단위로 임베딩하므로
+        API 호출 수는 청크 수가 아니라 배치 수에 비례한다.
+        
+        기본은 증분 모드: 저장된 file_hash와 같은 파일은 건너뛰고,
+        바뀐 파일은 기존 행을 새 행으로 교체한다.
+        
         Args:
             folder_name: 폴더 이름
             source: 소스 이름
             author: 작성자
+            force: True면 변경 여부와 관계없이 모든 파일을 다시 임베딩
+            workers: 번역 스레드 수 (ingest_files 참고)
         """
         # Obsidian 경로
         obsidian_path = Path(self.config["sources"]["obsidian"]["path"]).expanduser()
@@ -365,11 +932,13 @@ class KnowledgeIngest:
         
         print(f"📂 {folder_name} ({len(md_files)}개 파일)")
         
-        for file_path in md_files:
-            try:
-                self.ingest_file(file_path, source, author)
-            except Exception as e:
-                print(f"   ❌ 오류: {file_path.name} - {str(e)[:100]}")
+        # 조회/교체가 typed 컬럼 기준이므로 비어 있는 기존 행을 먼저 채운다
+        self.backfill_columns()
+        
+        # 증분 모드: 저장된 (path, file_hash)를 한 번에 조회
+        stored = {} if force else self.fetch_file_hashes(folder_path)
+        
+        self.ingest_files(md_files, source, author, stored=stored, workers=workers)
 
 
 def main():
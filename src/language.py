@@ -0,0 +1,88 @@
+"""
+Knowledge Search - 언어 감지
+
+번역 API를 부르기 전에 이미 영어인 텍스트를 걸러내는 가벼운 휴리스틱
+(문자 체계 비율 + 영어 기능어 비율, 외부 라이브러리 없음)
+"""
+
+import re
+from typing import List
+
+
+# 영어에서 가장 흔한 기능어 (영어 문장이면 단어의 30~50%가 여기에 속한다)
+ENGLISH_STOPWORDS = frozenset("""
+a about after all also an and any are as at be because been but by can could
+did do does for from had has have he her his how i if in into is it its just
+like more my no not of on one or our out she so some than that the their them
+then there these they this to up was we were what when which who will with
+would you your
+""".split())
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+# 전문 검색어에서 빼는 짧은 토큰 ('x', '1' 같은 한 글자는 거의 모든 청크와 일치)
+MIN_LEXICAL_WORD_LENGTH = 2
+
+# 비ASCII 글자가 이 비율을 넘으면 (한글, 한자, 가나, 악센트 문자 등) 번역 대상
+MAX_NON_ASCII_RATIO = 0.02
+
+# 이 단어 수 이상인 텍스트는 기능어 비율도 확인 (짧은 검색어는 기능어가 없는 경우가 많음)
+MIN_WORDS_FOR_STOPWORDS = 8
+MIN_STOPWORD_RATIO = 0.1
+
+
+def is_english(text: str) -> bool:
+    """
+    텍스트가 이미 영어인지 판단
+
+    1. 글자 중 비ASCII 글자 비율이 2% 이하여야 한다 (한국어가 섞인 청크는 번역)
+    2. 단어가 8개 이상이면 영어 기능어 비율이 10% 이상이어야 한다
+       (라틴 문자를 쓰는 다른 언어 구분)
+
+    Args:
+        text: 판단할 텍스트
+
+    Returns:
+        영어로 보이면 True (번역 생략 가능)
+    """
+    letters = 0
+    non_ascii = 0
+    for char in text:
+        if char.isalpha():
+            letters += 1
+            if not char.isascii():
+                non_ascii += 1
+
+    # 글자가 없는 텍스트 (숫자, 기호, 코드 조각)는 번역할 필요 없음
+    if letters == 0:
+        return True
+
+    if non_ascii / letters > MAX_NON_ASCII_RATIO:
+        return False
+
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < MIN_WORDS_FOR_STOPWORDS:
+        return True
+
+    stopwords = sum(1 for word in words if word in ENGLISH_STOPWORDS)
+    return stopwords / len(words) >= MIN_STOPWORD_RATIO
+
+
+def lexical_terms(text: str) -> List[str]:
+    """
+    전문 검색(하이브리드 검색)에 쓸 단어 목록
+
+    영어 기능어와 MIN_LEXICAL_WORD_LENGTH보다 짧은 토큰을 빼고, 중복 없이
+    처음 나온 순서대로 돌려준다. 남는 단어가 없으면 전문 검색을 건너뛴다.
+
+    Args:
+        text: 검색어
+
+    Returns:
+        소문자 단어 리스트
+    """
+    words = re.findall(r"\w+", text.lower())
+    return list(dict.fromkeys(
+        word for word in words
+        if len(word) >= MIN_LEXICAL_WORD_LENGTH and word not in ENGLISH_STOPWORDS
+    ))
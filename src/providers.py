@@ -0,0 +1,222 @@
+"""
+Knowledge Search - API provider 클라이언트
+
+OpenAI / Anthropic / Cohere 클라이언트를 프로세스당 한 번만 만들어 공유한다.
+클라이언트마다 keep-alive 연결 풀(httpx)을 가지므로 호출할 때마다
+새 연결과 TLS handshake를 하지 않는다. KnowledgeSearch와 KnowledgeIngest가 함께 쓴다.
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_MAX_CONNECTIONS = 20
+
+# (provider, api_key, timeout, connect_timeout, max_connections) → SDK 클라이언트
+_clients: Dict[tuple, object] = {}
+_clients_lock = threading.Lock()
+
+
+class ProviderClients:
+    """
+    provider 호출 공통 계층
+
+    SDK 자체 재시도는 끄고 (max_retries=0), 재시도는 호출 측의
+    ratelimit.retry_with_backoff로 한 곳에서 처리한다.
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS
+    ):
+        """
+        초기화
+
+        Args:
+            timeout: 요청 timeout (초)
+            connect_timeout: 연결 timeout (초)
+            max_connections: provider별 최대 동시 연결 수 (keep-alive 풀 크기)
+        """
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+
+    def _http_client(self):
+        """keep-alive 연결 풀을 가진 httpx 클라이언트"""
+        import httpx
+
+        return httpx.Client(
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            ),
+            follow_redirects=True
+        )
+
+    def client(self, provider: str, api_key: str):
+        """
+        provider SDK 클라이언트 (같은 설정이면 프로세스 안에서 재사용)
+
+        Args:
+            provider: openai / anthropic / cohere
+            api_key: API 키
+
+        Returns:
+            openai.OpenAI / anthropic.Anthropic / cohere.Client
+        """
+        key = (provider, api_key, self.timeout, self.connect_timeout, self.max_connections)
+
+        with _clients_lock:
+            if key in _clients:
+                return _clients[key]
+
+            if provider == "openai":
+                import openai
+
+                client = openai.OpenAI(
+                    api_key=api_key,
+                    timeout=self.timeout,
+                    max_retries=0,
+                    http_client=self._http_client()
+                )
+            elif provider == "anthropic":
+                import anthropic
+
+                client = anthropic.Anthropic(
+                    api_key=api_key,
+                    timeout=self.timeout,
+                    max_retries=0,
+                    http_client=self._http_client()
+                )
+            elif provider == "cohere":
+                import cohere
+
+                client = cohere.Client(
+                    api_key=api_key,
+                    timeout=self.timeout,
+                    httpx_client=self._http_client()
+                )
+            else:
+                raise ValueError(f"Unknown provider: {provider}")
+
+            _clients[key] = client
+            return client
+
+    def complete(
+        self,
+        provider: str,
+        model: str,
+        api_key: str,
+        prompt: str,
+        max_tokens: int,
+        temperature: float = 0.3
+    ) -> str:
+        """
+        단일 user 메시지 텍스트 생성 (번역용)
+
+        Args:
+            provider: openai / anthropic
+            model: 모델 이름
+            api_key: API 키
+            prompt: user 메시지
+            max_tokens: 최대 출력 토큰
+            temperature: temperature
+
+        Returns:
+            응답 텍스트
+        """
+        messages = [{"role": "user", "content": prompt}]
+
+        if provider == "anthropic":
+            response = self.client(provider, api_key).messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=messages
+            )
+            return response.content[0].text
+
+        elif provider == "openai":
+            response = self.client(provider, api_key).chat.completions.create(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=messages
+            )
+            return response.choices[0].message.content
+
+        else:
+            raise ValueError(f"Unknown translation provider: {provider}")
+
+    def embed(
+        self,
+        provider: str,
+        model: str,
+        api_key: str,
+        texts: List[str],
+        input_type: Optional[str] = None,
+        dimensions: Optional[int] = None
+    ) -> List[List[float]]:
+        """
+        임베딩 API 호출 (1회)
+
+        Args:
+            provider: openai / cohere
+            model: 모델 이름
+            api_key: API 키
+            texts: 입력 텍스트 리스트
+            input_type: Cohere 입력 종류 (search_document / search_query)
+            dimensions: 축소 차원 (OpenAI text-embedding-3-*, None이면 모델 기본값)
+
+        Returns:
+            texts와 같은 순서의 벡터 리스트
+        """
+        if provider == "openai":
+            response = self.client(provider, api_key).embeddings.create(
+                model=model,
+                input=texts,
+                **({"dimensions": dimensions} if dimensions else {})
+            )
+            # 응답 순서는 보장되지 않으므로 index로 정렬
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+        elif provider == "cohere":
+            if dimensions:
+                raise ValueError("embedding.dimensions is only supported by OpenAI text-embedding-3 models")
+            response = self.client(provider, api_key).embed(
+                texts=texts,
+                model=model,
+                input_type=input_type or "search_document"
+            )
+            return list(response.embeddings)
+
+        else:
+            raise ValueError(f"Unknown embedding provider: {provider}")
+
+
+def embedding_model_key(model: str, dimensions: Optional[int] = None) -> str:
+    """캐시 키용 임베딩 모델 이름 (차원이 다르면 다른 벡터이므로 구분한다)"""
+    return f"{model}@{dimensions}" if dimensions else model
+
+
+def open_providers(config: Dict) -> ProviderClients:
+    """
+    config.json의 http 설정으로 provider 계층 만들기
+
+    Args:
+        config: 전체 설정 (http.timeout, http.connect_timeout, http.max_connections)
+
+    Returns:
+        ProviderClients
+    """
+    http_config = config.get("http", {})
+    return ProviderClients(
+        timeout=http_config.get("timeout", DEFAULT_TIMEOUT),
+        connect_timeout=http_config.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT),
+        max_connections=http_config.get("max_connections", DEFAULT_MAX_CONNECTIONS)
+    )
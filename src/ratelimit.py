@@ -0,0 +1,152 @@
+"""
+Knowledge Search - API 호출 속도 제한
+
+Token bucket 방식의 호출 제한과 429 응답 재시도(backoff)
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+
+# 재시도할 HTTP 상태 코드 (rate limit, 일시적 서버 오류, Anthropic overloaded)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+
+
+class TokenBucket:
+    """분당 허용량을 일정 속도로 채우는 token bucket (thread-safe)"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        초기화
+
+        Args:
+            rate_per_minute: 분당 채워지는 토큰 수
+            capacity: 최대 저장 토큰 수 (기본: 분당 허용량)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1):
+        """
+        토큰을 얻을 때까지 대기
+
+        Args:
+            tokens: 필요한 토큰 수 (capacity보다 크면 capacity로 제한)
+        """
+        tokens = min(tokens, self.capacity)
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+
+                wait = (tokens - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """요청 수(RPM)와 토큰 수(TPM) 제한을 함께 적용"""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None
+    ):
+        """
+        초기화 (None이면 해당 제한 없음)
+
+        Args:
+            requests_per_minute: 분당 최대 요청 수
+            tokens_per_minute: 분당 최대 토큰 수
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    @property
+    def limits_tokens(self) -> bool:
+        """토큰 수 제한이 설정되어 있는지 (호출 측에서 토큰 계산 생략용)"""
+        return self.tokens is not None
+
+    def acquire(self, tokens: int = 0):
+        """
+        요청 1회 + 토큰 tokens개를 쓸 수 있을 때까지 대기
+
+        Args:
+            tokens: 이번 요청이 사용할 토큰 수
+        """
+        if self.requests:
+            self.requests.acquire(1)
+        if self.tokens and tokens:
+            self.tokens.acquire(tokens)
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    """OpenAI/Anthropic/Cohere/httpx 예외에서 HTTP 상태 코드 추출"""
+    for attr in ("status_code", "http_status"):
+        code = getattr(error, attr, None)
+        if isinstance(code, int):
+            return code
+
+    response = getattr(error, "response", None)
+    code = getattr(response, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """응답의 Retry-After 헤더 (초)"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_with_backoff(
+    func: Callable,
+    *args,
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    **kwargs
+):
+    """
+    rate limit(429)/일시적 오류 시 지수 backoff로 재시도
+
+    Args:
+        func: 호출할 함수
+        max_retries: 최대 재시도 횟수
+        base_delay: 첫 재시도 대기 시간 (초)
+        max_delay: 최대 대기 시간 (초)
+
+    Returns:
+        func의 반환값
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= max_retries or get_status_code(e) not in RETRYABLE_STATUS_CODES:
+                raise
+
+            delay = get_retry_after(e)
+            if delay is None:
+                delay = min(max_delay, base_delay * (2 ** attempt))
+                delay *= random.uniform(0.5, 1.0)  # jitter
+
+            print(f"      ⏳ 호출 제한, {delay:.1f}초 후 재시도 ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
@@ -4,22 +4,33 @@ Knowledge Search - Search Logic
 Core search functionality used by OpenClaw agents
 """
 
+import contextvars
 import json
-import openai
-from supabase import create_client
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 
+from cache import open_embedding_cache, open_query_cache, open_result_cache, open_translation_cache
+from language import is_english, lexical_terms
+from providers import embedding_model_key, open_providers
+from ratelimit import retry_with_backoff
+from storage import DEFAULT_LOCAL_PATH, open_store
+from tracing import bind, open_tracer, span
+
+
+# Result keys selectable with `fields` (search(), ks search --fields)
+RESULT_FIELDS = ('id', 'path', 'text', 'text_en', 'similarity', 'final_score', 'author', 'source', 'date')
+
 
 class KnowledgeSearch:
     """Vector DB-based knowledge search"""
     
-    def __init__(self, config_path: str = "config.json"):
+    def __init__(self, config_path: str = "config.json", use_cache: bool = True):
         """
         Initialize
         
         Args:
             config_path: Configuration file path
+            use_cache: False bypasses the query/result/embedding/translation caches
         """
         # Load configuration
         with open(config_path) as f:
@@ -27,16 +38,25 @@ class KnowledgeSearch:
         
         self.config = config
         
-        # Supabase client
-        self.supabase = create_client(
-            config["supabase"]["url"],
-            config["supabase"]["key"]
-        )
+        # Vector store (Supabase or local)
+        self.store = open_store(config)
+        # Result cache key part: which store (location + index/quantization settings) answered
+        storage = config.get('storage', {})
+        self.store_key = {
+            **storage,
+            'location': (
+                config.get('supabase', {}).get('url') if storage.get('backend', 'supabase') == 'supabase'
+                else str(Path(storage.get('path', DEFAULT_LOCAL_PATH)).expanduser())
+            )
+        }
         
         # Embedding configuration
         self.embedding_provider = config["embedding"]["provider"]
         self.embedding_model = config["embedding"]["model"]
         self.embedding_api_key = config["embedding"]["api_key"]
+        # Reduced (Matryoshka) dimensions for text-embedding-3-* (None = model default)
+        self.embedding_dimensions = config["embedding"].get("dimensions")
+        self.embedding_key = embedding_model_key(self.embedding_model, self.embedding_dimensions)
         
         # Translation configuration
         self.translation_provider = config["translation"]["provider"]
@@ -46,6 +66,72 @@ class KnowledgeSearch:
         # Search configuration
         self.default_limit = config["search"]["default_limit"]
         self.min_similarity = config["search"]["min_similarity"]
+        
+        # Hybrid search: full-text candidates fused with vector candidates (RRF)
+        self.hybrid = config["search"].get("hybrid", True)
+        self.rrf_k = config["search"].get("rrf_k", 60)
+        # Full-text-only matches may score this many points below min_similarity
+        self.lexical_margin = config["search"].get("lexical_margin", 10.0)
+        
+        # Temporal queries: similarity + recency blended by the store (search_recent)
+        self.recency_weight = config["search"].get("recency_weight", 0.4)
+        self.recency_half_life_days = config["search"].get("recency_half_life_days", 180)
+        self.store_recency = True
+        
+        # Store searches return lean rows (no text); only the final top-k are hydrated
+        self.store_lean = True
+        
+        # Query/embedding/translation caches (~/.cache/knowledge-search)
+        self.query_cache = open_query_cache(config) if use_cache else None
+        self.result_cache = open_result_cache(config) if use_cache else None
+        self.embedding_cache = open_embedding_cache(config) if use_cache else None
+        self.translation_cache = open_translation_cache(config) if use_cache else None
+        self.query_namespace = (
+            f"{self.translation_provider}:{self.translation_model}|"
+            f"{self.embedding_provider}:{self.embedding_key}"
+        )
+        self.skip_english = config["translation"].get("skip_english", True)
+        
+        # Shared provider clients (one connection pool per provider)
+        self.providers = open_providers(config)
+        
+        # Per-stage timing (exported when tracing.enabled)
+        self.tracer = open_tracer(config)
+        # Per thread and per asyncio task, so concurrent asearch() calls keep their own trace
+        self._trace: contextvars.ContextVar = contextvars.ContextVar("ks_last_trace", default=None)
+    
+    @property
+    def last_trace(self):
+        """Trace of the last search in this thread or asyncio task (stages(), to_dict()), or None"""
+        return self._trace.get()
+    
+    def prepare_query(self, query: str) -> Tuple[str, List[float]]:
+        """
+        Translate and embed a query, using the query cache
+        
+        Retries of the same query (or the same query with different
+        limit/threshold/filters) skip both API calls. Queries whose
+        translation failed are not cached, so the next search retries it.
+        
+        Args:
+            query: Original query
+        
+        Returns:
+            (translated query, embedding of the translated query)
+        """
+        if self.query_cache:
+            with span("query_cache"):
+                cached = self.query_cache.get(self.query_namespace, query)
+            if cached is not None:
+                return cached
+        
+        translated_query, translated_ok = self._translate(query)
+        query_embedding = self.get_embedding(translated_query)
+        
+        if self.query_cache and translated_ok:
+            self.query_cache.put(self.query_namespace, query, translated_query, query_embedding)
+        
+        return translated_query, query_embedding
     
     def translate_query(self, query: str) -> str:
         """
@@ -57,54 +143,61 @@ class KnowledgeSearch:
         Returns:
             Translated query (English) or original
         """
+        return self._translate(query)[0]
+    
+    def _translate(self, query: str) -> Tuple[str, bool]:
+        """
+        translate_query() + whether the result may be cached
+        
+        Returns:
+            (translated query or original, False if the translation API failed)
+        """
         if self.translation_provider == "none":
-            return query
+            return query, True
+        
+        # English queries need no translation
+        if self.skip_english and is_english(query):
+            if self.translation_cache:
+                self.translation_cache.count_skipped()
+            return query, True
+        
+        if self.translation_cache:
+            cached = self.translation_cache.get(
+                self.translation_provider, self.translation_model, "query", query
+            )
+            if cached is not None:
+                return cached, True
+        
+        with span("translate"):
+            translated, ok = self._request_translation(query)
+        
+        if self.translation_cache and ok and translated != query:
+            self.translation_cache.put(
+                self.translation_provider, self.translation_model, "query", query, translated
+            )
+        
+        return translated, ok
+    
+    def _request_translation(self, query: str) -> Tuple[str, bool]:
+        """Call the translation API (no cache); on error returns (original, False)"""
+        if self.translation_provider not in ("anthropic", "openai"):
+            return query, True
         
         try:
-            if self.translation_provider == "anthropic":
-                from anthropic import Anthropic
-                
-                anthropic = Anthropic(api_key=self.translation_api_key)
-                
-                response = anthropic.messages.create(
-                    model=self.translation_model,
-                    max_tokens=100,
-                    temperature=0.3,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": f"You are a search query translator. Translate the following search query to English. Keep it short and natural. Preserve technical terms.\n\nQuery: {query}"
-                        }
-                    ]
-                )
-                
-                return response.content[0].text.strip()
-            
-            elif self.translation_provider == "openai":
-                import openai as oai
-                
-                oai.api_key = self.translation_api_key
-                
-                response = oai.chat.completions.create(
-                    model=self.translation_model,
-                    max_tokens=100,
-                    temperature=0.3,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": f"You are a search query translator. Translate the following search query to English. Keep it short and natural. Preserve technical terms.\n\nQuery: {query}"
-                        }
-                    ]
-                )
-                
-                return response.choices[0].message.content.strip()
-            
-            else:
-                return query
+            translated = retry_with_backoff(
+                self.providers.complete,
+                self.translation_provider,
+                self.translation_model,
+                self.translation_api_key,
+                f"You are a search query translator. Translate the following search query to English. Keep it short and natural. Preserve technical terms.\n\nQuery: {query}",
+                max_tokens=100,
+                max_retries=2
+            )
+            return translated.strip(), True
         
         except Exception as e:
             print(f"      ⚠️  번역 실패, 원문 사용: {str(e)[:100]}")
-            return query
+            return query, False
     
     def get_embedding(self, text: str) -> List[float]:
         """
@@ -116,28 +209,52 @@ class KnowledgeSearch:
         Returns:
             임베딩 벡터
         """
-        if self.embedding_provider == "openai":
-            openai.api_key = self.embedding_api_key
-            
-            response = openai.embeddings.create(
-                model=self.embedding_model,
-                input=text
+        return self.get_embeddings([text])[0]
+    
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        여러 쿼리를 한 번의 API 호출로 벡터로 변환
+        
+        Args:
+            texts: 입력 텍스트 리스트
+        
+        Returns:
+            입력 순서와 같은 순서의 임베딩 벡터 리스트
+        """
+        input_type = "search_query" if self.embedding_provider == "cohere" else ""
+        if self.embedding_cache:
+            vectors = self.embedding_cache.get_many(
+                self.embedding_provider, self.embedding_key, texts, input_type
             )
-            return response.data[0].embedding
+        else:
+            vectors = [None] * len(texts)
         
-        elif self.embedding_provider == "cohere":
-            import cohere
-            
-            co = cohere.Client(self.embedding_api_key)
-            response = co.embed(
-                texts=[text],
-                model=self.embedding_model,
-                input_type="search_query"
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if not missing:
+            return vectors
+        
+        with span("embed", texts=len(missing)):
+            fetched = dict(zip(missing, self._request_embeddings(missing)))
+        
+        if self.embedding_cache:
+            self.embedding_cache.put_many(
+                self.embedding_provider, self.embedding_key, missing, [fetched[t] for t in missing], input_type
             )
-            return response.embeddings[0]
         
-        else:
-            raise ValueError(f"Unknown embedding provider: {self.embedding_provider}")
+        return [vector if vector is not None else fetched[text] for text, vector in zip(texts, vectors)]
+    
+    def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Call the embedding API (no cache)"""
+        return retry_with_backoff(
+            self.providers.embed,
+            self.embedding_provider,
+            self.embedding_model,
+            self.embedding_api_key,
+            texts,
+            input_type="search_query",
+            dimensions=self.embedding_dimensions,
+            max_retries=2
+        )
     
     def detect_temporal_intent(self, query: str) -> bool:
         """
@@ -162,109 +279,575 @@ class KnowledgeSearch:
         limit: int = None,
         source: Optional[str] = None,
         author: Optional[str] = None,
-        min_similarity: Optional[float] = None
+        min_similarity: Optional[float] = None,
+        category: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        ef_search: Optional[int] = None,
+        fields: Optional[List[str]] = None
     ) -> List[Dict]:
         """
         자연어 검색
         
+        All filters are applied by the vector store (inside the
+        search_embeddings RPC for Supabase), so it returns exactly
+        `limit` matching rows.
+        
         Args:
             query: 검색 쿼리
             limit: Number of results
             source: Source filter (e.g., "obsidian", "github")
             author: Author filter
             min_similarity: Minimum similarity %
+            category: Category filter
+            date_from: Earliest document date (YYYY-MM-DD, inclusive)
+            date_to: Latest document date (YYYY-MM-DD, inclusive)
+            ef_search: HNSW search width (local hnsw index only; higher = better recall, slower)
+            fields: Result keys to return (RESULT_FIELDS; default: all).
+                Without text/text_en the chunk text is never fetched.
         
         Returns:
             List of search results
         """
-        # Set defaults
+        with_text = self._check_fields(fields)
+        
+        with self.tracer.trace("search", query=query) as trace:
+            self._trace.set(trace)
+            
+            # Set defaults
+            if limit is None:
+                limit = self.default_limit
+            if min_similarity is None:
+                min_similarity = self.min_similarity
+            
+            # Translate + embed query (cached)
+            translated_query, query_embedding = self.prepare_query(query)
+            if translated_query != query:
+                print(f"🔍 Searching: '{query}' → EN: '{translated_query}'")
+            else:
+                print(f"🔍 Searching: '{query}'")
+            
+            # Temporal queries are ranked by similarity + recency
+            is_temporal = self.detect_temporal_intent(query)
+            
+            # Search the vector store (filters are applied by the store)
+            results = self._retrieve(
+                query_embedding, limit, min_similarity, is_temporal,
+                self._filters(source, author, category, date_from, date_to), ef_search,
+                lexical_query=self._lexical_query(query, translated_query),
+                with_text=with_text
+            )
+            return self._project(results, fields)
+    
+    @staticmethod
+    def _check_fields(fields: Optional[List[str]]) -> bool:
+        """Validate `fields`; returns whether the chunk text is needed"""
+        if fields is None:
+            return True
+        
+        unknown = [field for field in fields if field not in RESULT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown result fields: {', '.join(unknown)} (available: {', '.join(RESULT_FIELDS)})")
+        return 'text' in fields or 'text_en' in fields
+    
+    @staticmethod
+    def _project(results: List[Dict], fields: Optional[List[str]]) -> List[Dict]:
+        if fields is None:
+            return results
+        return [{field: result[field] for field in fields if field in result} for result in results]
+    
+    @staticmethod
+    def _filters(source, author, category, date_from, date_to) -> Dict:
+        return {
+            'source': source,
+            'author': author,
+            'category': category,
+            'date_from': date_from,
+            'date_to': date_to
+        }
+    
+    @staticmethod
+    def _lexical_query(query: str, translated_query: str) -> str:
+        """Full-text keywords: words of the original and translated query, minus stopwords and 1-char tokens"""
+        return " ".join(lexical_terms(f"{query} {translated_query}"))
+    
+    def _candidate_count(self, limit: int, is_temporal: bool) -> int:
+        """
+        Rows to fetch per retriever
+        
+        Temporal queries are ranked by the store, unless it lacks
+        search_recent (then 5x are fetched for re-ranking here); hybrid
+        search fetches 2x so that fusion can promote rows below the top `limit`.
+        """
+        count = limit * 5 if is_temporal and not self.store_recency else limit
+        return count * 2 if self.hybrid else count
+    
+    def _search_store(
+        self,
+        query_embedding: List[float],
+        limit: int,
+        min_similarity: float,
+        is_temporal: bool,
+        filters: Dict,
+        ef_search: Optional[int] = None
+    ) -> List[Dict]:
+        """Vector store search (temporal queries: similarity + recency, scored by the store)"""
+        if is_temporal and self.store_recency:
+            try:
+                return self._lean(
+                    self.store.recency_search,
+                    query_embedding,
+                    match_threshold=min_similarity / 100.0,
+                    match_count=self._candidate_count(limit, is_temporal),
+                    recency_weight=self.recency_weight,
+                    half_life_days=self.recency_half_life_days,
+                    filters=filters
+                )
+            except Exception as e:
+                # e.g. schema.sql without search_recent: re-rank vector results here
+                print(f"⚠️  Recency search unavailable, re-ranking locally: {str(e)[:100]}")
+                self.store_recency = False
+        
+        return self._lean(
+            self.store.search,
+            query_embedding,
+            match_threshold=min_similarity / 100.0,
+            match_count=self._candidate_count(limit, is_temporal),
+            filters=filters,
+            ef_search=ef_search
+        )
+    
+    def _lean(self, method, *args, **kwargs) -> List[Dict]:
+        """Store search returning lean rows (full rows if the schema predates include_text)"""
+        with span(f"store.{method.__name__}"):
+            if self.store_lean:
+                try:
+                    return method(*args, include_text=False, **kwargs)
+                except Exception as e:
+                    if 'include_text' not in str(e):
+                        raise
+                    print("⚠️  Store returns full rows; re-run schema.sql for lean search results")
+                    self.store_lean = False
+            
+            return method(*args, **kwargs)
+    
+    def _search_lexical(
+        self,
+        lexical_query: str,
+        query_embedding: List[float],
+        limit: int,
+        is_temporal: bool,
+        filters: Dict
+    ) -> List[Dict]:
+        """Full-text store search (no similarity threshold; disables hybrid search if unsupported)"""
+        if not self.hybrid or not lexical_query:
+            return []
+        
+        try:
+            return self._lean(
+                self.store.lexical_search,
+                lexical_query, query_embedding, self._candidate_count(limit, is_temporal), filters
+            )
+        except Exception as e:
+            # e.g. schema.sql without search_lexical: fall back to vector-only search
+            print(f"⚠️  Full-text search unavailable, using vector search only: {str(e)[:100]}")
+            self.hybrid = False
+            return []
+    
+    @staticmethod
+    def _row_key(row: Dict):
+        return row.get('id') or (row['metadata'].get('path'), row['metadata'].get('text'))
+    
+    def _fuse(self, vector_rows: List[Dict], lexical_rows: List[Dict]) -> List[Dict]:
+        """
+        Reciprocal rank fusion of vector and full-text candidates
+        
+        score(row) = Σ 1 / (rrf_k + rank in each list). Rows found by
+        full-text search are marked `lexical` so that the similarity
+        threshold (lowered by lexical_margin) keeps exact keyword matches
+        just below it.
+        
+        Returns:
+            Rows ordered by fused score
+        """
+        rows = {}
+        scores = {}
+        with span("fuse"):
+            for ranked, lexical in ((vector_rows, False), (lexical_rows, True)):
+                for rank, row in enumerate(ranked, 1):
+                    key = self._row_key(row)
+                    scores[key] = scores.get(key, 0.0) + 1.0 / (self.rrf_k + rank)
+                    merged = rows.setdefault(key, dict(row))
+                    if lexical:
+                        merged['lexical'] = True
+            
+            return [rows[key] for key in sorted(rows, key=lambda key: scores[key], reverse=True)]
+    
+    def _retrieve(
+        self,
+        query_embedding: List[float],
+        limit: int,
+        min_similarity: float,
+        is_temporal: bool,
+        filters: Dict,
+        ef_search: Optional[int] = None,
+        lexical_query: str = "",
+        with_text: bool = True
+    ) -> List[Dict]:
+        """
+        Store search (vector + full-text) + ranking, through the result cache
+        
+        Cached results are only reused within the same ingest generation
+        (KnowledgeIngest bumps it when it starts, after every flush and when
+        it ends), so a re-index never serves stale results (see _result_key).
+        """
+        key = self._result_key(
+            query_embedding, limit, min_similarity, is_temporal, filters, ef_search, lexical_query, with_text
+        )
+        cached = self._cached_results(key)
+        if cached is not None:
+            return cached
+        
+        rows = self._search_store(query_embedding, limit, min_similarity, is_temporal, filters, ef_search)
+        lexical_rows = self._search_lexical(lexical_query, query_embedding, limit, is_temporal, filters)
+        if lexical_rows:
+            results = self._rank(
+                self._fuse(rows, lexical_rows), limit, min_similarity, is_temporal, fused=True, with_text=with_text
+            )
+        else:
+            results = self._rank(rows, limit, min_similarity, is_temporal, with_text=with_text)
+        
+        self._cache_results(key, results)
+        return results
+    
+    def _result_key(
+        self,
+        query_embedding: List[float],
+        limit: int,
+        min_similarity: float,
+        is_temporal: bool,
+        filters: Dict,
+        ef_search: Optional[int],
+        lexical_query: str,
+        with_text: bool,
+        original_embedding: Optional[List[float]] = None
+    ) -> Optional[str]:
+        """
+        Result cache key (None without the result cache)
+        
+        The key covers the store location and index settings, and the
+        fusion parameters. asearch() also searches the original query's
+        embedding, so it is part of its key.
+        """
+        if not self.result_cache:
+            return None
+        return self.result_cache.make_key(
+            query_embedding,
+            store=self.store_key,
+            limit=limit,
+            min_similarity=min_similarity,
+            temporal=is_temporal,
+            recency=(self.recency_weight, self.recency_half_life_days) if is_temporal else None,
+            filters=filters,
+            ef_search=ef_search,
+            lexical=(lexical_query, self.rrf_k, self.lexical_margin) if self.hybrid else None,
+            text=with_text,
+            original=self.result_cache.make_key(original_embedding) if original_embedding is not None else None
+        )
+    
+    def _cached_results(self, key: Optional[str]) -> Optional[List[Dict]]:
+        if key is None:
+            return None
+        with span("result_cache"):
+            return self.result_cache.get(key)
+    
+    def _cache_results(self, key: Optional[str], results: List[Dict]):
+        if key is None:
+            return
+        with span("result_cache"):
+            self.result_cache.put(key, results)
+    
+    def _rank(
+        self,
+        rows: List[Dict],
+        limit: int,
+        min_similarity: float,
+        is_temporal: bool,
+        fused: bool = False,
+        with_text: bool = True
+    ) -> List[Dict]:
+        """
+        Format store rows into results and order them
+        
+        Temporal queries are ordered by the blended similarity + recency
+        score (from the store, or computed here for rows without one).
+        Fused (hybrid) rows keep their RRF order, and full-text matches
+        are kept down to min_similarity - lexical_margin. Lean rows (no text)
+        are hydrated after the cut, so only the returned rows are fetched.
+        """
+        with span("rank", rows=len(rows)):
+            # Format
+            filtered = []
+            lean = set()
+            for row in rows:
+                metadata = row['metadata']
+                
+                # Calculate similarity
+                similarity = round(row['similarity'] * 100, 1)
+                
+                # Minimum similarity filter (exact keyword matches get a lower floor)
+                floor = min_similarity - self.lexical_margin if row.get('lexical') else min_similarity
+                if similarity < floor:
+                    continue
+                
+                # Prefer original language (Korean if available, else English)
+                text_original = metadata.get('text_original', '')
+                text_en = metadata.get('text', '')
+                if 'text' not in metadata and 'text_original' not in metadata:
+                    lean.add(row.get('id'))
+                
+                result = {
+                    'id': row.get('id'),
+                    'path': metadata['path'],
+                    'text': text_original if text_original else text_en,  # Original first!
+                    'text_en': text_en,  # English translation (provided separately)
+                    'similarity': similarity,
+                    'author': metadata.get('author', 'unknown'),
+                    'source': metadata.get('source', 'unknown'),
+                    'date': metadata.get('date', '')
+                }
+                
+                if is_temporal:
+                    score = row.get('score')
+                    if score is None:
+                        # Full-text rows (or a store without search_recent): same formula as the store
+                        score = (1 - self.recency_weight) * row['similarity'] + self.recency_weight * self._recency(result['date'])
+                    result['final_score'] = round(score * 100, 1)
+                
+                filtered.append(result)
+            
+            # Sort by similarity, or by the blended score for temporal queries
+            if is_temporal:
+                filtered.sort(key=lambda x: x['final_score'], reverse=True)
+            elif not fused:
+                # Default: sort by similarity only
+                filtered.sort(key=lambda x: x['similarity'], reverse=True)
+        
+        top = filtered[:limit]
+        if with_text:
+            self._hydrate([result for result in top if result['id'] in lean])
+        return top
+    
+    def _hydrate(self, results: List[Dict]):
+        """Fill text/text_en of lean results with one batched store fetch"""
+        if not results:
+            return
+        
+        with span("store.fetch_texts", rows=len(results)):
+            texts = self.store.fetch_texts([result['id'] for result in results])
+        for result in results:
+            text = texts.get(result['id'], {})
+            text_original = text.get('text_original') or ''
+            text_en = text.get('text') or ''
+            result['text'] = text_original if text_original else text_en
+            result['text_en'] = text_en
+    
+    def _recency(self, date_str: str) -> float:
+        """Recency in [0, 1]: halves every recency_half_life_days, 0 without a date"""
+        from datetime import date
+        
+        try:
+            days_ago = (date.today() - date.fromisoformat(date_str[:10])).days
+        except (TypeError, ValueError):
+            return 0.0
+        return 0.5 ** (max(days_ago, 0) / self.recency_half_life_days)
+    
+    async def asearch(
+        self,
+        query: str,
+        limit: int = None,
+        source: Optional[str] = None,
+        author: Optional[str] = None,
+        min_similarity: Optional[float] = None,
+        category: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        ef_search: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        자연어 검색 (async)
+        
+        Same arguments as search(), without blocking the event loop
+        (API and store calls run in worker threads).
+        
+        The original query is embedded while its translation is in
+        flight. Unlike search(), when the translation differs both
+        embeddings are searched concurrently and each row keeps its best
+        similarity, so a poor translation cannot hide matches for the
+        original. Repeated queries take the same path: the translation
+        comes from the query cache, the original embedding from the
+        embedding cache, and the merged results from the result cache.
+        
+        Returns:
+            List of search results
+        """
+        import asyncio
+        
+        with_text = self._check_fields(fields)
         if limit is None:
             limit = self.default_limit
         if min_similarity is None:
             min_similarity = self.min_similarity
         
-        # Translate query
-        translated_query = self.translate_query(query)
-        if translated_query != query:
-            print(f"🔍 Searching: '{query}' → EN: '{translated_query}'")
-        else:
-            print(f"🔍 Searching: '{query}'")
-        
-        # Generate embedding
-        query_embedding = self.get_embedding(translated_query)
+        is_temporal = self.detect_temporal_intent(query)
+        filters = self._filters(source, author, category, date_from, date_to)
         
-        # Search Supabase
-        results = self.supabase.rpc('search_embeddings', {
-            'query_embedding': query_embedding,
-            'match_threshold': min_similarity / 100.0,
-            'match_count': limit * 5
-        }).execute()
-        
-        # Filter and format
-        filtered = []
-        for row in results.data:
-            metadata = row['metadata']
-            
-            # Source filter
-            if source and metadata.get('source') != source:
-                continue
+        with self.tracer.trace("search", query=query) as trace:
+            self._trace.set(trace)
             
-            # Author filter
-            if author and metadata.get('author') != author:
-                continue
+            cached = None
+            if self.query_cache:
+                with span("query_cache"):
+                    cached = await asyncio.to_thread(self.query_cache.get, self.query_namespace, query)
             
-            # Calculate similarity
-            similarity = round(row['similarity'] * 100, 1)
+            if cached is not None:
+                translated_query, query_embedding = cached
+                original_embedding = (
+                    await asyncio.to_thread(self.get_embedding, query) if translated_query != query else None
+                )
+            else:
+                (translated_query, translated_ok), original_embedding = await asyncio.gather(
+                    asyncio.to_thread(self._translate, query),
+                    asyncio.to_thread(self.get_embedding, query)
+                )
+                if translated_query != query:
+                    query_embedding = await asyncio.to_thread(self.get_embedding, translated_query)
+                else:
+                    query_embedding, original_embedding = original_embedding, None
+                
+                if self.query_cache and translated_ok:
+                    await asyncio.to_thread(
+                        self.query_cache.put, self.query_namespace, query, translated_query, query_embedding
+                    )
             
-            # Minimum similarity filter
-            if similarity < min_similarity:
-                continue
+            lexical_query = self._lexical_query(query, translated_query)
+            key = self._result_key(
+                query_embedding, limit, min_similarity, is_temporal, filters, ef_search, lexical_query, with_text,
+                original_embedding=original_embedding
+            )
+            results = await asyncio.to_thread(self._cached_results, key)
+            if results is not None:
+                return self._project(results, fields)
             
-            # Prefer original language (Korean if available, else English)
-            text_original = metadata.get('text_original', '')
-            text_en = metadata.get('text', '')
+            embeddings = [query_embedding] if original_embedding is None else [original_embedding, query_embedding]
+            *row_sets, lexical_rows = await asyncio.gather(*(
+                asyncio.to_thread(
+                    self._search_store, embedding, limit, min_similarity, is_temporal, filters, ef_search
+                )
+                for embedding in embeddings
+            ), asyncio.to_thread(
+                self._search_lexical, lexical_query, query_embedding, limit, is_temporal, filters
+            ))
             
-            filtered.append({
-                'path': metadata['path'],
-                'text': text_original if text_original else text_en,  # Original first!
-                'text_en': text_en,  # English translation (provided separately)
-                'similarity': similarity,
-                'author': metadata.get('author', 'unknown'),
-                'source': metadata.get('source', 'unknown'),
-                'date': metadata.get('date', '')
-            })
-        
-        # Sort by similarity, with date consideration for temporal queries
-        is_temporal = self.detect_temporal_intent(query)
+            rows = self._merge_rows(row_sets)
+            if lexical_rows:
+                rows = self._fuse(rows, lexical_rows)
+            # Ranking hydrates the top rows from the store, so it runs in a thread too
+            results = await asyncio.to_thread(
+                self._rank, rows, limit, min_similarity, is_temporal, bool(lexical_rows), with_text
+            )
+            await asyncio.to_thread(self._cache_results, key, results)
+            return self._project(results, fields)
+    
+    @staticmethod
+    def _merge_rows(row_sets: List[List[Dict]]) -> List[Dict]:
+        """Union of store results, keeping the highest similarity per row"""
+        best = {}
+        for rows in row_sets:
+            for row in rows:
+                key = KnowledgeSearch._row_key(row)
+                if key not in best or row['similarity'] > best[key]['similarity']:
+                    best[key] = row
+        return sorted(best.values(), key=lambda row: row['similarity'], reverse=True)
+    
+    def search_many(
+        self,
+        queries: List[str],
+        max_workers: int = 8,
+        limit: int = None,
+        source: Optional[str] = None,
+        author: Optional[str] = None,
+        min_similarity: Optional[float] = None,
+        category: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        ef_search: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[List[Dict]]:
+        """
+        여러 쿼리를 한 번에 검색 (e.g., agent sub-queries)
+        
+        Translations and store searches run concurrently, and all
+        queries are embedded with a single batched API call.
+        
+        Args:
+            queries: 검색 쿼리 리스트
+            max_workers: Concurrent translation/search threads
+            limit, source, author, min_similarity, category, date_from,
+            date_to, ef_search, fields: search() options, applied to every query
+        
+        Returns:
+            Result lists in the same order as queries
+        """
+        from concurrent.futures import ThreadPoolExecutor
         
-        if is_temporal and filtered:
-            # For temporal queries: weighted scoring (70% similarity + 30% recency)
-            from datetime import datetime
+        if not queries:
+            return []
+        
+        if limit is None:
+            limit = self.default_limit
+        if min_similarity is None:
+            min_similarity = self.min_similarity
+        filters = self._filters(source, author, category, date_from, date_to)
+        with_text = self._check_fields(fields)
+        temporal = [self.detect_temporal_intent(query) for query in queries]
+        
+        with self.tracer.trace("search_many", queries=len(queries)) as trace:
+            self._trace.set(trace)
             
-            for result in filtered:
-                date_str = result.get('date', '')
-                
-                if date_str:
-                    try:
-                        doc_date = datetime.fromisoformat(date_str[:10])
-                        days_ago = (datetime.now() - doc_date).days
-                        # Recency score: 100 at 0 days, decreases gradually
-                        recency_score = max(0, 100 - (days_ago / 10))
-                    except:
-                        recency_score = 0
-                else:
-                    recency_score = 0
-                
-                # Weighted final score: 60% similarity + 40% recency
-                result['final_score'] = result['similarity'] * 0.6 + recency_score * 0.4
+            cached = [
+                self.query_cache.get(self.query_namespace, query) if self.query_cache else None
+                for query in queries
+            ]
+            missing = [i for i, entry in enumerate(cached) if entry is None]
             
-            # Sort by final score
-            filtered.sort(key=lambda x: x.get('final_score', x['similarity']), reverse=True)
-        else:
-            # Default: sort by similarity only
-            filtered.sort(key=lambda x: x['similarity'], reverse=True)
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as pool:
+                embeddings = [entry[1] if entry else None for entry in cached]
+                translations = [entry[0] if entry else None for entry in cached]
+                if missing:
+                    translated = list(pool.map(bind(self._translate), [queries[i] for i in missing]))
+                    texts = [text for text, _ in translated]
+                    for i, (text, ok), embedding in zip(missing, translated, self.get_embeddings(texts)):
+                        embeddings[i] = embedding
+                        translations[i] = text
+                        if self.query_cache and ok:
+                            self.query_cache.put(self.query_namespace, queries[i], text, embedding)
+                
+                return list(pool.map(
+                    bind(lambda query, translated_query, embedding, is_temporal: self._project(self._retrieve(
+                        embedding, limit, min_similarity, is_temporal, filters, ef_search,
+                        lexical_query=self._lexical_query(query, translated_query),
+                        with_text=with_text
+                    ), fields)),
+                    queries, translations, embeddings, temporal
+                ))
+    
+    async def asearch_many(self, queries: List[str], **kwargs) -> List[List[Dict]]:
+        """search_many() for async callers (runs in a worker thread)"""
+        import asyncio
         
-        return filtered[:limit]
+        return await asyncio.to_thread(self.search_many, queries, **kwargs)
     
     def format_results(self, results: List[Dict]) -> str:
         """
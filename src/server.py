@@ -0,0 +1,177 @@
+"""
+Knowledge Search - 검색 데몬 (ks serve)
+
+KnowledgeSearch 하나를 프로세스에 띄워 두고 localhost HTTP로 검색 요청을 받는다.
+import, config 로딩, Supabase/provider 클라이언트 생성, 캐시 연결을 한 번만 하므로
+데몬이 떠 있으면 `ks search`의 지연 시간은 임베딩 호출이 대부분을 차지한다.
+(클라이언트 쪽은 client.py)
+"""
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+
+from client import server_address
+
+
+# 브라우저 페이지가 localhost 데몬을 부르는 것(DNS rebinding 등)을 막기 위해 허용하는 Host
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "[::1]"}
+
+# KnowledgeSearch.search()에 그대로 넘기는 요청 필드
+SEARCH_PARAMS = (
+    "limit", "source", "author", "min_similarity", "category",
+    "date_from", "date_to", "ef_search", "fields"
+)
+
+
+class SearchDaemon:
+    """
+    검색 상태(KnowledgeSearch)를 유지하는 데몬
+
+    config.json이 바뀌면 다음 요청에서 KnowledgeSearch를 다시 만든다.
+    """
+
+    def __init__(self, config_path: str):
+        """
+        초기화
+
+        Args:
+            config_path: config.json 경로
+        """
+        self.config_path = Path(config_path)
+        self.started = time.time()
+        self.requests = 0
+        self.lock = threading.Lock()
+        self._searcher = None
+        self._config_mtime = None
+
+    def searcher(self):
+        """현재 config.json 기준 KnowledgeSearch (바뀌었으면 다시 생성)"""
+        from search import KnowledgeSearch
+
+        mtime = self.config_path.stat().st_mtime
+        with self.lock:
+            if self._searcher is None or mtime != self._config_mtime:
+                self._searcher = KnowledgeSearch(str(self.config_path))
+                self._config_mtime = mtime
+            return self._searcher
+
+    def search(self, params: Dict) -> Dict:
+        """
+        검색 요청 처리
+
+        Args:
+            params: {"query": ..., limit/source/author/... (SEARCH_PARAMS)}
+
+        Returns:
+            {"results": [...], "elapsed_ms": ..., "stages": 단계별 시간 (ms), "query_cache": 쿼리 캐시 통계}
+        """
+        query = params.get("query")
+        if not isinstance(query, str) or not query:
+            raise ValueError("query is required")
+
+        searcher = self.searcher()
+        start = time.time()
+        results = searcher.search(
+            query, **{key: params[key] for key in SEARCH_PARAMS if params.get(key) is not None}
+        )
+        self.requests += 1
+
+        return {
+            "results": results,
+            "elapsed_ms": round((time.time() - start) * 1000, 1),
+            "stages": searcher.last_trace.stages() if searcher.last_trace else None,
+            "query_cache": searcher.query_cache.stats() if searcher.query_cache else None
+        }
+
+    def health(self) -> Dict:
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": self.requests
+        }
+
+
+class SearchRequestHandler(BaseHTTPRequestHandler):
+    """GET /health, POST /search (JSON)"""
+
+    daemon: SearchDaemon = None
+
+    def _send_json(self, status: int, body: Dict):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _is_local(self) -> bool:
+        host = self.headers.get("Host", "")
+        if host.startswith("["):
+            host = host.split("]")[0] + "]"
+        else:
+            host = host.split(":")[0]
+        return host in LOCAL_HOSTS
+
+    def do_GET(self):
+        if not self._is_local():
+            return self._send_json(403, {"error": "forbidden"})
+        if self.path != "/health":
+            return self._send_json(404, {"error": "not found"})
+        self._send_json(200, self.daemon.health())
+
+    def do_POST(self):
+        # JSON Content-Type을 요구하면 브라우저의 단순 cross-origin 요청이 막힌다
+        if not self._is_local() or not self.headers.get("Content-Type", "").startswith("application/json"):
+            return self._send_json(403, {"error": "forbidden"})
+        if self.path != "/search":
+            return self._send_json(404, {"error": "not found"})
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+            self._send_json(200, self.daemon.search(params))
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        # 요청마다 stderr에 찍지 않음
+        pass
+
+
+def serve(config_path: str, host: Optional[str] = None, port: Optional[int] = None):
+    """
+    검색 데몬 실행 (Ctrl+C까지 블록)
+
+    Args:
+        config_path: config.json 경로
+        host: 바인드 주소 (기본: config의 server.host 또는 127.0.0.1)
+        port: 포트 (기본: config의 server.port 또는 8765)
+    """
+    with open(config_path) as f:
+        config = json.load(f)
+    default_host, default_port = server_address(config)
+
+    daemon = SearchDaemon(config_path)
+    # 첫 요청 전에 import와 클라이언트 생성을 끝내 둔다
+    daemon.searcher()
+
+    handler = type("Handler", (SearchRequestHandler,), {"daemon": daemon})
+    httpd = ThreadingHTTPServer((host or default_host, port or default_port), handler)
+    httpd.daemon_threads = True
+
+    print(f"🚀 Knowledge Search daemon listening on http://{httpd.server_address[0]}:{httpd.server_address[1]}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
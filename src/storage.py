@@ -0,0 +1,1375 @@
+"""
+Knowledge Search - 벡터 저장소
+
+임베딩 저장/검색 백엔드 인터페이스와 구현
+- SupabaseStore: Supabase pgvector (schema.sql의 RPC 사용)
+- LocalStore: 로컬 파일 (벡터는 memory-mapped 행렬, 메타데이터는 SQLite)
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Set
+
+from language import lexical_terms
+
+
+DEFAULT_LOCAL_PATH = "~/.local/share/knowledge-search/index"
+
+# 검색 필터 키 (search_embeddings RPC의 filter_* 인자와 대응)
+FILTER_KEYS = ("source", "author", "category", "date_from", "date_to")
+
+# 2단계 검색 (양자화 코드 / 앞쪽 prefix_dimensions 차원): 1차 검색으로 match_count * factor개
+# 후보를 고르고 원본 벡터로 다시 점수를 매긴다 (halfvec: Supabase 전용, int8: 로컬 전용)
+DEFAULT_RESCORE_FACTOR = 4
+RESCORE_FACTORS = {"binary": 10}
+
+
+class VectorStore:
+    """
+    벡터 저장소 인터페이스
+
+    행(row)은 {"embedding": [...], "metadata": {...}} 형태이고,
+    검색 결과는 {"id", "similarity", "metadata", "created_at"} 형태이다.
+    """
+
+    def search(
+        self,
+        query_embedding: List[float],
+        match_threshold: float,
+        match_count: int,
+        filters: Optional[Dict] = None,
+        ef_search: Optional[int] = None,
+        include_text: bool = True
+    ) -> List[Dict]:
+        """
+        코사인 유사도 검색
+
+        Args:
+            query_embedding: 쿼리 벡터
+            match_threshold: 최소 유사도 (0~1)
+            match_count: 최대 결과 수
+            filters: source, author, category, date_from, date_to (None 값은 무시)
+            ef_search: 근사 인덱스(HNSW) 탐색 폭 (지원하지 않는 저장소는 무시)
+            include_text: False면 metadata에서 text/text_original을 뺀 lean 행
+                (본문은 fetch_texts()로 필요한 행만 가져온다)
+
+        Returns:
+            유사도 내림차순 결과 리스트
+        """
+        raise NotImplementedError
+
+    def recency_search(
+        self,
+        query_embedding: List[float],
+        match_threshold: float,
+        match_count: int,
+        recency_weight: float,
+        half_life_days: float,
+        filters: Optional[Dict] = None,
+        include_text: bool = True
+    ) -> List[Dict]:
+        """
+        유사도 + 최신성 혼합 점수 검색 (시간 관련 쿼리)
+
+        score = (1 - recency_weight) * similarity + recency_weight * recency,
+        recency = 0.5 ^ (문서 나이(일) / half_life_days) (metadata.date 기준, 없으면 0)
+
+        Args:
+            query_embedding: 쿼리 벡터
+            match_threshold: 최소 유사도 (0~1)
+            match_count: 최대 결과 수
+            recency_weight: 최신성 가중치 (0~1)
+            half_life_days: recency가 절반이 되는 기간 (일)
+            filters: search()와 같은 필터
+            include_text: search()와 같음
+
+        Returns:
+            score 내림차순 결과 리스트 ({"id", "similarity", "recency", "score", "metadata", "created_at"})
+        """
+        raise NotImplementedError
+
+    def lexical_search(
+        self,
+        query_text: str,
+        query_embedding: List[float],
+        match_count: int,
+        filters: Optional[Dict] = None,
+        include_text: bool = True
+    ) -> List[Dict]:
+        """
+        전문 검색 (하이브리드 검색의 lexical 후보)
+
+        쿼리 단어 중 하나라도 text_original/text에 (접두사로) 포함한 행을
+        lexical 점수 순으로 돌려준다. 영어 기능어와 한 글자 토큰은 검색어에서
+        빠진다 (language.lexical_terms). 지원하지 않는 저장소는 빈 리스트.
+
+        Args:
+            query_text: 검색어 (공백으로 구분된 단어들)
+            query_embedding: 결과의 similarity 계산용 쿼리 벡터
+            match_count: 최대 결과 수
+            filters: search()와 같은 필터
+            include_text: search()와 같음
+
+        Returns:
+            lexical 점수 내림차순 결과 리스트 ({"id", "similarity", "rank", "metadata", "created_at"})
+        """
+        return []
+
+    def fetch_texts(self, ids: List[int]) -> Dict[int, Dict]:
+        """
+        lean 검색 결과의 본문 조회 (한 번의 배치 조회)
+
+        Args:
+            ids: 검색 결과의 id
+
+        Returns:
+            {id: {"text", "text_original"}}
+        """
+        raise NotImplementedError
+
+    def replace_rows(self, rows: List[Dict]):
+        """같은 path의 기존 행을 지우고 새 행 저장 (원자적)"""
+        raise NotImplementedError
+
+    def insert_rows(self, rows: List[Dict]):
+        """기존 행을 유지한 채 새 행 추가"""
+        raise NotImplementedError
+
+    def delete_file(self, path: str, file_hash: str):
+        """한 파일 버전(path + file_hash)의 행 삭제"""
+        raise NotImplementedError
+
+    def promote_file(self, path: str, staged_hash: str, file_hash: str) -> int:
+        """
+        임시 file_hash로 나눠 추가한 파일 버전을 확정 (원자적)
+
+        staged_hash 행의 file_hash를 file_hash로 바꾼 뒤 같은 path의 나머지 행
+        (이전 버전)을 지운다. 여러 요청으로 나눠 저장하는 큰 파일용
+        (EmbeddingWriter): 중간에 실패해도 이전 버전이 남는다. 임시 행을 모두
+        확정하지 못하면 이전 버전을 지우지 않고 오류를 낸다.
+
+        Returns:
+            확정한 행 수
+        """
+        raise NotImplementedError
+
+    def file_hashes(self, path_prefix: str) -> Dict[str, Set[str]]:
+        """
+        경로 접두사 아래 파일들의 저장된 file_hash 조회
+
+        Args:
+            path_prefix: metadata.path 접두사 (이스케이프하지 않은 원래 문자열)
+
+        Returns:
+            {path: {file_hash, ...}}
+        """
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        """
+        저장소 통계 (get_stats RPC와 같은 형태)
+
+        Returns:
+            total_count, sources, authors, categories, folders,
+            table_size, index_size, last_ingest
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """보류 중인 인덱스 변경을 디스크에 저장 (대량 저장 후 호출)"""
+        pass
+
+    def backfill_columns(self, batch_size: int = 1000, progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        typed 메타데이터 컬럼(source, author, path, date, ...)이 비어 있는 기존 행 채우기
+
+        Args:
+            batch_size: 한 번에 채울 행 수
+            progress: 배치마다 지금까지 채운 행 수로 호출
+
+        Returns:
+            채운 행 수 (처음부터 컬럼이 있는 저장소는 0)
+        """
+        return 0
+
+
+def escape_like(value: str) -> str:
+    """LIKE 패턴용 와일드카드 이스케이프 (파일명에 흔한 '_' 포함)"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SupabaseStore(VectorStore):
+    """Supabase pgvector 저장소"""
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        quantization: Optional[str] = None,
+        rescore_factor: Optional[int] = None,
+        prefix_dimensions: Optional[int] = None
+    ):
+        """
+        초기화
+
+        Args:
+            url: Supabase 프로젝트 URL
+            key: Supabase API 키
+            quantization: 필터 없는 벡터 검색의 1차 인덱스 형식 (None / halfvec / binary)
+            rescore_factor: 1차 검색 후보 수 = match_count * rescore_factor
+            prefix_dimensions: 1차 인덱스에 쓸 앞쪽 차원 수 (Matryoshka 임베딩)
+
+        quantization이나 prefix_dimensions를 쓰려면 create_rescore_index()로 같은
+        설정의 인덱스를 만들어 두어야 한다 (schema.sql).
+        """
+        if quantization not in (None, "halfvec", "binary"):
+            raise ValueError(f"Unknown Supabase quantization: {quantization} (halfvec / binary)")
+
+        from supabase import create_client
+
+        self.client = create_client(url, key)
+        self.quantization = quantization
+        self.prefix_dimensions = prefix_dimensions
+        self.two_stage = bool(quantization or prefix_dimensions)
+        self.rescore_factor = rescore_factor or RESCORE_FACTORS.get(quantization, DEFAULT_RESCORE_FACTOR)
+
+    def _rescored_search(self, query_embedding, match_threshold, match_count, include_text):
+        """1차 인덱스로 후보를 고르고 원본 벡터로 다시 정렬 (None이면 RPC 없음)"""
+        try:
+            result = self.client.rpc('search_embeddings_rescored', {
+                'query_embedding': query_embedding,
+                'match_threshold': match_threshold,
+                'match_count': match_count,
+                'quantization': self.quantization,
+                'prefix_dimensions': self.prefix_dimensions,
+                'rescore_count': match_count * self.rescore_factor,
+                'include_text': include_text
+            }).execute()
+        except Exception as e:
+            if 'search_embeddings_rescored' not in str(e):
+                raise
+            print("⚠️  search_embeddings_rescored not found; re-run schema.sql. Using full-precision search")
+            self.two_stage = False
+            return None
+        return result.data
+
+    def search(self, query_embedding, match_threshold, match_count, filters=None, ef_search=None, include_text=True):
+        filters = filters or {}
+        # 필터가 있으면 B-tree로 후보를 좁혀 정확히 계산하므로 1차 인덱스를 쓰지 않는다
+        if self.two_stage and not any(filters.get(key) is not None for key in FILTER_KEYS):
+            rows = self._rescored_search(query_embedding, match_threshold, match_count, include_text)
+            if rows is not None:
+                return rows
+
+        result = self.client.rpc('search_embeddings', {
+            'query_embedding': query_embedding,
+            'match_threshold': match_threshold,
+            'match_count': match_count,
+            **{f'filter_{key}': filters.get(key) for key in FILTER_KEYS},
+            'include_text': include_text
+        }).execute()
+        return result.data
+
+    def recency_search(self, query_embedding, match_threshold, match_count, recency_weight, half_life_days,
+                       filters=None, include_text=True):
+        filters = filters or {}
+        result = self.client.rpc('search_recent', {
+            'query_embedding': query_embedding,
+            'match_threshold': match_threshold,
+            'match_count': match_count,
+            'recency_weight': recency_weight,
+            'half_life_days': half_life_days,
+            **{f'filter_{key}': filters.get(key) for key in FILTER_KEYS},
+            'include_text': include_text
+        }).execute()
+        return result.data
+
+    def lexical_search(self, query_text, query_embedding, match_count, filters=None, include_text=True):
+        filters = filters or {}
+        result = self.client.rpc('search_lexical', {
+            'query_text': query_text,
+            'query_embedding': query_embedding,
+            'match_count': match_count,
+            **{f'filter_{key}': filters.get(key) for key in FILTER_KEYS},
+            'include_text': include_text
+        }).execute()
+        return result.data
+
+    def fetch_texts(self, ids):
+        if not ids:
+            return {}
+        result = self.client.rpc('get_chunk_texts', {'ids': list(ids)}).execute()
+        return {
+            row['id']: {"text": row['text'], "text_original": row['text_original']}
+            for row in result.data
+        }
+
+    def replace_rows(self, rows):
+        self.client.rpc("replace_embeddings", {"new_rows": rows}).execute()
+
+    def insert_rows(self, rows):
+        self.client.table("embeddings").insert(rows, returning="minimal").execute()
+
+    def delete_file(self, path, file_hash):
+        self.client.table("embeddings").delete() \
+            .eq("path", path) \
+            .eq("file_hash", file_hash) \
+            .execute()
+
+    def promote_file(self, path, staged_hash, file_hash):
+        return self.client.rpc('promote_file_version', {
+            'file_path': path,
+            'staged_hash': staged_hash,
+            'new_hash': file_hash
+        }).execute().data
+
+    def file_hashes(self, path_prefix):
+        stored = {}
+        page_size = 1000  # PostgREST max-rows 기본값
+        offset = 0
+
+        while True:
+            result = self.client.rpc('get_file_hashes', {
+                'path_prefix': escape_like(path_prefix)
+            }).range(offset, offset + page_size - 1).execute()
+
+            for row in result.data:
+                stored.setdefault(row['path'], set()).add(row['file_hash'])
+
+            if len(result.data) < page_size:
+                break
+            offset += page_size
+
+        return stored
+
+    def stats(self):
+        return self.client.rpc('get_stats', {}).execute().data[0]
+
+    def backfill_columns(self, batch_size=1000, progress=None):
+        # 배치마다 별도 트랜잭션이므로 중간에 멈춰도 다시 실행하면 이어서 채운다
+        total = 0
+        while True:
+            updated = self.client.rpc('backfill_typed_columns', {'batch_size': batch_size}).execute().data or 0
+            total += updated
+            if updated and progress:
+                progress(total)
+            # 배치를 다 채우지 못했으면 남은 행이 없다
+            if updated < batch_size:
+                return total
+
+
+class LocalStore(VectorStore):
+    """
+    로컬 파일 저장소 (서버 없이 동작)
+
+    - vectors.bin: 정규화된 벡터를 행 단위로 이어 붙인 float32/float16 행렬 (memmap)
+    - index.sqlite: 행 메타데이터 (chunks 테이블, slot = vectors.bin의 행 번호)
+
+    - hnsw.pkl: index가 "hnsw"일 때의 HNSW 그래프 (chunk id 기준)
+    - codes.*.bin: 2단계 검색의 1차 스캔용 코드 (slot 순서, vectors.bin에서 만든다)
+    - chunks_fts: text_original/text 전문 검색용 FTS5 테이블 (trigger로 chunks와 동기화)
+
+    교체/삭제된 행의 벡터는 vectors.bin에 남아 있다가, 죽은 slot이 절반을
+    넘으면 compact()로 정리된다. 검색은 기본적으로 NumPy 행렬곱으로 정확한
+    코사인 top-k를 구하고, index가 "hnsw"이면 필터 없는 검색에 HNSW를 쓴다.
+    quantization(int8: 1/4, binary: 1/32 크기)이나 prefix_dimensions(Matryoshka
+    임베딩의 앞쪽 차원)를 켜면 스캔과 HNSW는 작은 벡터로 하고, 상위 후보만
+    vectors.bin의 원본 벡터로 다시 점수를 매긴다.
+    """
+
+    # 전체 스캔 시 한 번에 곱할 행 수 (임시 메모리 상한)
+    SCAN_BLOCK_ROWS = 65536
+    # int8 코드를 float32로 바꿔 곱할 행 수 (캐시에 들어가는 크기의 버퍼를 재사용)
+    CODE_BLOCK_ROWS = 2048
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            slot INTEGER NOT NULL,
+            path TEXT,
+            source TEXT,
+            author TEXT,
+            category TEXT,
+            date TEXT,
+            folder TEXT,
+            file_hash TEXT,
+            metadata TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_chunks_path ON chunks (path);
+        CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks (source);
+        CREATE INDEX IF NOT EXISTS idx_chunks_author ON chunks (author);
+        CREATE INDEX IF NOT EXISTS idx_chunks_category ON chunks (category);
+        CREATE INDEX IF NOT EXISTS idx_chunks_date ON chunks (date);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    # contentless FTS5 (본문은 chunks.metadata에만 저장), 삭제 시 같은 본문으로 'delete' 명령
+    FTS_BODY = (
+        "COALESCE(json_extract({row}.metadata, '$.text_original'), '') || ' ' || "
+        "COALESCE(json_extract({row}.metadata, '$.text'), '')"
+    )
+    FTS_SCHEMA = f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+            body, content='', tokenize='unicode61 remove_diacritics 2'
+        );
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks BEGIN
+            INSERT INTO chunks_fts (rowid, body) VALUES (new.id, {FTS_BODY.format(row="new")});
+        END;
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks BEGIN
+            INSERT INTO chunks_fts (chunks_fts, rowid, body) VALUES ('delete', old.id, {FTS_BODY.format(row="old")});
+        END;
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_LOCAL_PATH,
+        dtype: str = "float32",
+        index: str = "exact",
+        hnsw_params: Optional[Dict] = None,
+        quantization: Optional[str] = None,
+        rescore_factor: Optional[int] = None,
+        prefix_dimensions: Optional[int] = None
+    ):
+        """
+        초기화
+
+        Args:
+            path: 저장 디렉터리
+            dtype: 새 저장소의 벡터 저장 형식 (float32 / float16)
+            index: 검색 방식 (exact: 전체 스캔 / hnsw: 근사 인덱스)
+            hnsw_params: HNSWIndex 인자 (M, ef_construction, ef_search)
+            quantization: 스캔용 압축 코드 (None / int8 / binary)
+            rescore_factor: 원본 벡터로 다시 점수를 매길 후보 수 = match_count * rescore_factor
+            prefix_dimensions: 1차 검색(스캔 코드, HNSW)에 쓸 앞쪽 차원 수
+                (Matryoshka 임베딩, None이면 전체 차원)
+        """
+        if index not in ("exact", "hnsw"):
+            raise ValueError(f"Unknown local index type: {index}")
+        if quantization not in (None, "int8", "binary"):
+            raise ValueError(f"Unknown local quantization: {quantization} (int8 / binary)")
+
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("local storage requires numpy: pip install numpy")
+
+        self.np = np
+        self.dir = Path(path).expanduser()
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.dir / "vectors.bin"
+        self.hnsw_path = self.dir / "hnsw.pkl"
+        self.index = index
+        self.hnsw_params = hnsw_params or {}
+        self.quantization = quantization
+        self.prefix_dimensions = prefix_dimensions
+        self.two_stage = bool(quantization or prefix_dimensions)
+        self.rescore_factor = rescore_factor or RESCORE_FACTORS.get(quantization, DEFAULT_RESCORE_FACTOR)
+        self.codes_path = self.dir / (
+            f"codes.{quantization or 'float32'}" + (f".{prefix_dimensions}d" if prefix_dimensions else "") + ".bin"
+        ) if self.two_stage else None
+        # 비트 수 세기 (binary): NumPy 2.0+는 bitwise_count, 이전 버전은 바이트 값 → 비트 수 표
+        if hasattr(np, "bitwise_count"):
+            self.popcount = np.bitwise_count
+        else:
+            table = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+            self.popcount = lambda values: table[values]
+
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.dir / "index.sqlite"), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+        self.fts = self._init_fts()
+
+        # 저장 형식은 처음 만들 때 정해지고 이후에는 meta 값을 따른다
+        self.dtype = np.dtype(self._get_meta("dtype") or dtype)
+        dim = self._get_meta("dim")
+        self.dim = int(dim) if dim else None
+
+        self._matrix = None
+        self._matrix_rows = 0
+        self._codes = None
+        self._codes_rows = 0
+        self._alive = None
+        self._alive_version = None
+        self._hnsw = None
+        self._hnsw_alive = None
+        self._hnsw_slots = None
+
+    def _init_fts(self) -> bool:
+        """FTS5 테이블 준비 (기존 저장소는 한 번 채운다). SQLite에 FTS5가 없으면 False"""
+        try:
+            with self.conn:
+                self.conn.executescript(self.FTS_SCHEMA)
+                if self._get_meta("fts") is None:
+                    self.conn.execute(
+                        f"INSERT INTO chunks_fts (rowid, body) SELECT id, {self.FTS_BODY.format(row='chunks')} FROM chunks"
+                    )
+                    self._set_meta("fts", "1")
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    def _normalize(self, vectors):
+        """행 단위 L2 정규화 (코사인 유사도 = 내적)"""
+        np = self.np
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix[None, :]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _file_rows(self) -> int:
+        if not self.dim or not self.vectors_path.exists():
+            return 0
+        return self.vectors_path.stat().st_size // (self.dim * self.dtype.itemsize)
+
+    def _append_vectors(self, embeddings: List[List[float]]) -> List[int]:
+        """벡터를 vectors.bin 끝에 추가하고 slot 번호 반환"""
+        matrix = self._normalize(embeddings)
+
+        if self.dim is None:
+            self.dim = matrix.shape[1]
+            self._set_meta("dim", str(self.dim))
+            self._set_meta("dtype", self.dtype.name)
+        elif matrix.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension mismatch: index has {self.dim}, got {matrix.shape[1]}")
+
+        start = self._file_rows()
+        with open(self.vectors_path, "ab") as f:
+            f.write(matrix.astype(self.dtype).tobytes())
+
+        # 코드 파일이 vectors.bin과 맞춰져 있으면 바로 붙이고, 아니면 다음 검색 때 채운다
+        if self.two_stage and self.codes_path.exists() \
+                and self.codes_path.stat().st_size == start * self._code_dtype().itemsize:
+            with open(self.codes_path, "ab") as f:
+                f.write(self._encode(matrix))
+
+        return list(range(start, start + len(matrix)))
+
+    def _vectors(self):
+        """vectors.bin memmap (파일이 커졌으면 다시 연다)"""
+        rows = self._file_rows()
+        if self._matrix is None or rows != self._matrix_rows:
+            self._matrix = self.np.memmap(
+                self.vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim)
+            ) if rows else None
+            self._matrix_rows = rows
+        return self._matrix
+
+    @property
+    def scan_dim(self) -> Optional[int]:
+        """1차 검색 벡터의 차원 (prefix_dimensions, 저장된 차원보다 클 수 없다)"""
+        if self.dim is None or not self.prefix_dimensions:
+            return self.dim
+        return min(self.prefix_dimensions, self.dim)
+
+    def _project(self, matrix):
+        """정규화된 벡터 → 1차 검색 벡터 (앞쪽 scan_dim 차원을 다시 정규화)"""
+        if self.scan_dim == self.dim:
+            return matrix
+        return self._normalize(matrix[:, :self.scan_dim])
+
+    def _code_dtype(self):
+        """1차 스캔 코드 한 행의 형식 (float32, int8: 행별 scale + 코드, binary: 부호 비트)"""
+        np = self.np
+        if self.quantization == "int8":
+            return np.dtype([("scale", "<f4"), ("code", "i1", (self.scan_dim,))])
+        if self.quantization == "binary":
+            return np.dtype(("u1", ((self.scan_dim + 7) // 8,)))
+        return np.dtype(("<f4", (self.scan_dim,)))
+
+    def _encode(self, matrix) -> bytes:
+        """정규화된 float32 행렬 → 1차 스캔 코드"""
+        np = self.np
+        matrix = self._project(matrix)
+        if self.quantization == "binary":
+            return np.packbits(matrix > 0, axis=1).tobytes()
+        if self.quantization is None:
+            return matrix.astype(np.float32).tobytes()
+
+        # 행마다 최대 절댓값을 127에 맞춘다
+        scale = np.abs(matrix).max(axis=1) / 127
+        scale[scale == 0] = 1.0
+        records = np.empty(len(matrix), dtype=self._code_dtype())
+        records["scale"] = scale
+        records["code"] = np.rint(matrix / scale[:, None])
+        return records.tobytes()
+
+    def _quantized(self):
+        """
+        vectors.bin과 같은 slot 순서의 압축 코드 memmap
+
+        코드 파일이 vectors.bin보다 짧으면 (2단계 검색을 나중에 켰거나 다른
+        프로세스가 추가한 행) 모자란 행을 vectors.bin에서 만들어 붙인다.
+        """
+        rows = self._file_rows()
+        code_dtype = self._code_dtype()
+        code_rows = self.codes_path.stat().st_size // code_dtype.itemsize if self.codes_path.exists() else 0
+
+        if code_rows != rows:
+            vectors = self._vectors()
+            mode = "ab" if code_rows < rows else "wb"
+            with open(self.codes_path, mode) as f:
+                for start in range(code_rows if mode == "ab" else 0, rows, self.SCAN_BLOCK_ROWS):
+                    f.write(self._encode(vectors[start:start + self.SCAN_BLOCK_ROWS].astype(self.np.float32)))
+            code_rows = rows
+
+        if self._codes is None or code_rows != self._codes_rows:
+            self._codes = self.np.memmap(
+                self.codes_path, dtype=code_dtype, mode="r", shape=(code_rows,)
+            ) if code_rows else None
+            self._codes_rows = code_rows
+        return self._codes
+
+    def _alive_slots(self):
+        """살아 있는 행의 (id 배열, slot 배열) - 다른 프로세스가 쓰면 다시 읽는다"""
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._alive is None or version != self._alive_version:
+            rows = self.conn.execute("SELECT id, slot FROM chunks").fetchall()
+            ids = self.np.array([r[0] for r in rows], dtype=self.np.int64)
+            slots = self.np.array([r[1] for r in rows], dtype=self.np.int64)
+            self._alive = (ids, slots)
+            self._alive_version = version
+        return self._alive
+
+    def _invalidate(self):
+        self._alive = None
+
+    def _filter_sql(self, filters: Dict):
+        clauses = []
+        params = []
+        for key, column in (("source", "source"), ("author", "author"), ("category", "category")):
+            if filters.get(key) is not None:
+                clauses.append(f"{column} = ?")
+                params.append(filters[key])
+        if filters.get("date_from") is not None:
+            clauses.append("date >= ?")
+            params.append(filters["date_from"])
+        if filters.get("date_to") is not None:
+            clauses.append("date <= ?")
+            params.append(filters["date_to"])
+        return " AND ".join(clauses), params
+
+    def _candidates(self, filters: Dict):
+        """필터를 통과한 (id 배열, slot 배열)"""
+        where, params = self._filter_sql(filters)
+        if not where:
+            return self._alive_slots()
+
+        rows = self.conn.execute(f"SELECT id, slot FROM chunks WHERE {where}", params).fetchall()
+        np = self.np
+        return (
+            np.array([r[0] for r in rows], dtype=np.int64),
+            np.array([r[1] for r in rows], dtype=np.int64)
+        )
+
+    def _similarities(self, query, slots):
+        """slot들의 코사인 유사도"""
+        np = self.np
+        vectors = self._vectors()
+
+        # 후보가 적으면 해당 행만 읽고, 많으면 전체를 블록 단위로 곱한다
+        if len(slots) * 8 < len(vectors):
+            return vectors[slots].astype(np.float32) @ query
+
+        scores = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), self.SCAN_BLOCK_ROWS):
+            block = vectors[start:start + self.SCAN_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ query
+        return scores[slots]
+
+    def _approx_similarities(self, query, slots):
+        """
+        1차 스캔 코드로 구한 근사 코사인 유사도 (후보 선택용)
+
+        float32(prefix)는 내적, int8은 코드 · 쿼리 * scale,
+        binary는 해밍 거리로 1 - 2 * (다른 비트 수 / 차원)
+        """
+        np = self.np
+        codes = self._quantized()
+        query = self._project(query[None, :])[0]
+
+        if self.quantization is None:
+            def score(block):
+                return block @ query
+        elif self.quantization == "int8":
+            buffer = np.empty((self.CODE_BLOCK_ROWS, self.scan_dim), dtype=np.float32)
+
+            def score(block):
+                scores = np.empty(len(block), dtype=np.float32)
+                for start in range(0, len(block), self.CODE_BLOCK_ROWS):
+                    part = block[start:start + self.CODE_BLOCK_ROWS]
+                    converted = buffer[:len(part)]
+                    np.copyto(converted, part["code"], casting="unsafe")
+                    scores[start:start + len(part)] = (converted @ query) * part["scale"]
+                return scores
+        else:
+            query_bits = np.packbits(query > 0)
+            # bitwise_count는 64비트 단위로 세면 훨씬 빠르다
+            wide = self.popcount is getattr(np, "bitwise_count", None) and len(query_bits) % 8 == 0
+            if wide:
+                query_bits = query_bits.view(np.uint64)
+
+            def score(block):
+                if wide:
+                    block = block.view(np.uint64)
+                distance = self.popcount(block ^ query_bits).sum(axis=1, dtype=np.float32)
+                return 1 - 2 * distance / self.scan_dim
+
+        if len(slots) * 8 < len(codes):
+            return score(codes[slots])
+
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), self.SCAN_BLOCK_ROWS):
+            block = codes[start:start + self.SCAN_BLOCK_ROWS]
+            scores[start:start + len(block)] = score(block)
+        return scores[slots]
+
+    def _rescore_candidates(self, query, ids, slots, count: int, rescore_factor: Optional[int] = None, prior=None):
+        """
+        1차 스캔 점수 상위 count * rescore_factor개 후보만 남기기
+
+        Args:
+            prior: 근사 유사도 → 정렬 점수 함수 (최신성 검색의 혼합 점수, None이면 유사도)
+
+        Returns:
+            (남긴 위치 배열, id 배열, slot 배열) - 후보가 충분히 적으면 그대로
+        """
+        np = self.np
+        keep = count * (rescore_factor or self.rescore_factor)
+        if len(ids) <= keep:
+            return np.arange(len(ids)), ids, slots
+
+        approx = self._approx_similarities(query, slots)
+        if prior is not None:
+            approx = prior(approx)
+        picks = np.sort(np.argpartition(-approx, keep - 1)[:keep])
+        return picks, ids[picks], slots[picks]
+
+    def _fetch_rows(self, ids: List[int], include_text: bool = True) -> Dict[int, Dict]:
+        """id → {"metadata", "created_at"} (include_text가 False면 본문 없는 metadata)"""
+        column = "metadata" if include_text else "json_remove(metadata, '$.text', '$.text_original')"
+        rows = {}
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for row_id, metadata, created_at in self.conn.execute(
+                f"SELECT id, {column}, created_at FROM chunks WHERE id IN ({placeholders})", batch
+            ):
+                rows[row_id] = {"metadata": json.loads(metadata), "created_at": created_at}
+        return rows
+
+    def _ann(self):
+        """
+        살아 있는 행과 동기화된 HNSW 인덱스
+
+        처음에는 hnsw.pkl을 읽고 (없으면 새로 만든다), 이후 chunks 테이블이 바뀔
+        때마다 새 id는 추가하고 지워진 id는 tombstone 처리한다. tombstone이 살아 있는
+        노드보다 많아지면 다시 빌드한다. 바뀐 내용이 있으면 hnsw.pkl에 저장한다.
+        prefix_dimensions가 있으면 그래프는 앞쪽 차원 벡터로 만든다.
+        """
+        from hnsw import HNSWIndex
+
+        alive = self._alive_slots()
+        if self._hnsw is not None and self._hnsw_alive is alive:
+            return self._hnsw
+
+        index = self._hnsw
+        if index is None and self.hnsw_path.exists():
+            index = HNSWIndex.load(self.hnsw_path)
+        if index is None or index.dim != self.scan_dim:
+            index = HNSWIndex(self.scan_dim, **self.hnsw_params)
+
+        ids, slots = alive
+        slot_of = dict(zip(ids.tolist(), slots.tolist()))
+        stale = [label for label in index.label_to_node if label not in slot_of]
+        missing = [label for label in slot_of if label not in index]
+
+        for label in stale:
+            index.delete(label)
+        if missing:
+            vectors = self._vectors()
+            for start in range(0, len(missing), self.SCAN_BLOCK_ROWS):
+                batch = missing[start:start + self.SCAN_BLOCK_ROWS]
+                index.add_items(batch, self._project(vectors[[slot_of[label] for label in batch]].astype(self.np.float32)))
+        if index.tombstones > len(index):
+            index = index.rebuild()
+
+        if stale or missing:
+            index.save(self.hnsw_path)
+
+        self._hnsw = index
+        self._hnsw_alive = alive
+        self._hnsw_slots = slot_of
+        return index
+
+    def _ann_top(self, query, match_threshold: float, match_count: int, ef_search: Optional[int] = None,
+                 rescore_factor: Optional[int] = None):
+        """
+        HNSW top-k → (id 리스트, 유사도 리스트)
+
+        그래프가 앞쪽 차원 벡터로 만들어져 있으면 match_count * rescore_factor개를
+        찾은 뒤 원본 벡터로 다시 정렬한다.
+        """
+        np = self.np
+        index = self._ann()
+        if self.scan_dim == self.dim:
+            found = [(label, sim) for label, sim in index.search(query, match_count, ef_search=ef_search)
+                     if sim >= match_threshold]
+            return [label for label, _ in found], [sim for _, sim in found]
+
+        count = match_count * (rescore_factor or self.rescore_factor)
+        labels = [label for label, _ in index.search(self._project(query[None, :])[0], count, ef_search=ef_search)]
+        if not labels:
+            return [], []
+
+        slots = np.array([self._hnsw_slots[label] for label in labels], dtype=np.int64)
+        scores = self._vectors()[slots].astype(np.float32) @ query
+        keep = [i for i in np.argsort(-scores, kind="stable")[:match_count] if scores[i] >= match_threshold]
+        return [labels[i] for i in keep], [float(scores[i]) for i in keep]
+
+    def _exact_top(
+        self,
+        query,
+        ids,
+        slots,
+        match_threshold: float,
+        match_count: int,
+        quantized: bool = True,
+        rescore_factor: Optional[int] = None
+    ):
+        """
+        전체 스캔 top-k → (id 리스트, 유사도 리스트)
+
+        2단계 검색이 켜져 있으면 1차 스캔 코드로 후보를 고른 뒤 원본 벡터로 정렬한다
+        (quantized=False면 원본 벡터 전체 스캔). 돌려주는 유사도는 항상 원본 벡터 기준이다.
+        """
+        np = self.np
+        if self.two_stage and quantized:
+            _, ids, slots = self._rescore_candidates(query, ids, slots, match_count, rescore_factor)
+        scores = self._similarities(query, slots)
+
+        keep = np.nonzero(scores >= match_threshold)[0]
+        if len(keep) > match_count:
+            top = np.argpartition(-scores[keep], match_count - 1)[:match_count]
+            keep = keep[top]
+        keep = keep[np.argsort(-scores[keep], kind="stable")]
+
+        return [int(i) for i in ids[keep]], [float(s) for s in scores[keep]]
+
+    def search(self, query_embedding, match_threshold, match_count, filters=None, ef_search=None, include_text=True):
+        filters = filters or {}
+
+        with self.lock:
+            if self.dim is None:
+                return []
+
+            ids, slots = self._candidates(filters)
+            if len(ids) == 0 or match_count <= 0:
+                return []
+
+            query = self._normalize(query_embedding)[0]
+            if len(query) != self.dim:
+                raise ValueError(f"Query dimension mismatch: index has {self.dim}, got {len(query)}")
+
+            # 필터가 있으면 후보가 줄어드므로 정확한 스캔이 더 낫다
+            if self.index == "hnsw" and not any(filters.get(key) is not None for key in FILTER_KEYS):
+                top_ids, top_scores = self._ann_top(query, match_threshold, match_count, ef_search)
+            else:
+                top_ids, top_scores = self._exact_top(query, ids, slots, match_threshold, match_count)
+
+            rows = self._fetch_rows(top_ids, include_text)
+
+        return [
+            {
+                "id": row_id,
+                "similarity": score,
+                "metadata": rows[row_id]["metadata"],
+                "created_at": rows[row_id]["created_at"]
+            }
+            for row_id, score in zip(top_ids, top_scores)
+            if row_id in rows
+        ]
+
+    def recency_search(self, query_embedding, match_threshold, match_count, recency_weight, half_life_days,
+                       filters=None, include_text=True):
+        # 로컬은 후보 전체의 혼합 점수를 NumPy로 계산한다 (날짜 조건 없이 정확)
+        np = self.np
+        where, params = self._filter_sql(filters or {})
+
+        with self.lock:
+            if self.dim is None or match_count <= 0:
+                return []
+
+            candidates = self.conn.execute(
+                "SELECT id, slot, julianday('now') - julianday(substr(date, 1, 10)) FROM chunks"
+                + (f" WHERE {where}" if where else ""),
+                params
+            ).fetchall()
+            if not candidates:
+                return []
+
+            query = self._normalize(query_embedding)[0]
+            if len(query) != self.dim:
+                raise ValueError(f"Query dimension mismatch: index has {self.dim}, got {len(query)}")
+
+            ids = np.array([r[0] for r in candidates], dtype=np.int64)
+            slots = np.array([r[1] for r in candidates], dtype=np.int64)
+            ages = np.array([np.nan if r[2] is None else r[2] for r in candidates], dtype=np.float64)
+            recency = np.nan_to_num(0.5 ** (np.maximum(ages, 0) / half_life_days), nan=0.0)
+
+            if self.two_stage:
+                # 근사 유사도로 구한 혼합 점수 상위 후보만 원본 벡터로 다시 계산
+                picks, ids, slots = self._rescore_candidates(
+                    query, ids, slots, match_count,
+                    prior=lambda approx: (1 - recency_weight) * approx + recency_weight * recency
+                )
+                recency = recency[picks]
+
+            similarities = self._similarities(query, slots).astype(np.float64)
+            scores = (1 - recency_weight) * similarities + recency_weight * recency
+
+            keep = np.nonzero(similarities >= match_threshold)[0]
+            if len(keep) > match_count:
+                keep = keep[np.argpartition(-scores[keep], match_count - 1)[:match_count]]
+            keep = keep[np.argsort(-scores[keep], kind="stable")]
+
+            rows = self._fetch_rows([int(i) for i in ids[keep]], include_text)
+
+        return [
+            {
+                "id": int(ids[i]),
+                "similarity": float(similarities[i]),
+                "recency": float(recency[i]),
+                "score": float(scores[i]),
+                "metadata": rows[int(ids[i])]["metadata"],
+                "created_at": rows[int(ids[i])]["created_at"]
+            }
+            for i in keep
+            if int(ids[i]) in rows
+        ]
+
+    def lexical_search(self, query_text, query_embedding, match_count, filters=None, include_text=True):
+        words = lexical_terms(query_text)
+        if not self.fts or not words or match_count <= 0:
+            return []
+
+        # 단어별 접두사 OR 쿼리 ('삼성전자' → '삼성전자가'도 일치)
+        match = " OR ".join(f'"{word}"*' for word in words)
+        where, params = self._filter_sql(filters or {})
+
+        with self.lock:
+            if self.dim is None:
+                return []
+
+            hits = self.conn.execute(
+                "SELECT chunks.id, chunks.slot, bm25(chunks_fts) FROM chunks_fts "
+                "JOIN chunks ON chunks.id = chunks_fts.rowid "
+                f"WHERE chunks_fts MATCH ? {'AND ' + where if where else ''} "
+                "ORDER BY bm25(chunks_fts) LIMIT ?",
+                [match, *params, match_count]
+            ).fetchall()
+            if not hits:
+                return []
+
+            query = self._normalize(query_embedding)[0]
+            slots = self.np.array([slot for _, slot, _ in hits], dtype=self.np.int64)
+            similarities = self._vectors()[slots].astype(self.np.float32) @ query
+            rows = self._fetch_rows([row_id for row_id, _, _ in hits], include_text)
+
+        return [
+            {
+                "id": row_id,
+                "similarity": float(similarity),
+                "rank": -score,
+                "metadata": rows[row_id]["metadata"],
+                "created_at": rows[row_id]["created_at"]
+            }
+            for (row_id, _, score), similarity in zip(hits, similarities)
+            if row_id in rows
+        ]
+
+    def fetch_texts(self, ids):
+        texts = {}
+        with self.lock:
+            for start in range(0, len(ids), 500):
+                batch = list(ids[start:start + 500])
+                placeholders = ",".join("?" * len(batch))
+                for row_id, text, text_original in self.conn.execute(
+                    "SELECT id, json_extract(metadata, '$.text'), json_extract(metadata, '$.text_original') "
+                    f"FROM chunks WHERE id IN ({placeholders})",
+                    batch
+                ):
+                    texts[row_id] = {"text": text, "text_original": text_original}
+        return texts
+
+    def _insert(self, rows: List[Dict]):
+        """벡터 추가 + 메타데이터 INSERT (트랜잭션 안에서 호출)"""
+        slots = self._append_vectors([row["embedding"] for row in rows])
+        now = datetime.now(timezone.utc).isoformat()
+
+        self.conn.executemany(
+            "INSERT INTO chunks (slot, path, source, author, category, date, folder, file_hash, metadata, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    slot,
+                    row["metadata"].get("path"),
+                    row["metadata"].get("source"),
+                    row["metadata"].get("author"),
+                    row["metadata"].get("category"),
+                    row["metadata"].get("date"),
+                    row["metadata"].get("folder"),
+                    row["metadata"].get("file_hash"),
+                    json.dumps(row["metadata"], ensure_ascii=False),
+                    now
+                )
+                for slot, row in zip(slots, rows)
+            ]
+        )
+
+    def replace_rows(self, rows):
+        with self.lock:
+            with self.conn:
+                paths = {row["metadata"]["path"] for row in rows}
+                self.conn.executemany("DELETE FROM chunks WHERE path = ?", [(p,) for p in paths])
+                self._insert(rows)
+            self._invalidate()
+            self._maybe_compact()
+
+    def insert_rows(self, rows):
+        with self.lock:
+            with self.conn:
+                self._insert(rows)
+            self._invalidate()
+
+    def delete_file(self, path, file_hash):
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM chunks WHERE path = ? AND file_hash = ?", (path, file_hash))
+            self._invalidate()
+
+    def promote_file(self, path, staged_hash, file_hash):
+        with self.lock:
+            with self.conn:
+                # 하나의 트랜잭션이므로 순서와 관계없이 오류가 나면 이전 버전이 그대로 남는다
+                staged = self.conn.execute(
+                    "SELECT COUNT(*) FROM chunks WHERE path = ? AND file_hash = ?", (path, staged_hash)
+                ).fetchone()[0]
+                self.conn.execute(
+                    "DELETE FROM chunks WHERE path = ? AND file_hash IS NOT ?", (path, staged_hash)
+                )
+                promoted = self.conn.execute(
+                    "UPDATE chunks SET file_hash = ?, metadata = json_set(metadata, '$.file_hash', ?) "
+                    "WHERE path = ? AND file_hash = ?",
+                    (file_hash, file_hash, path, staged_hash)
+                ).rowcount
+                if promoted == 0 or promoted != staged:
+                    raise RuntimeError(f"promoted {promoted} of {staged} staged rows for {path}")
+            self._invalidate()
+            self._maybe_compact()
+        return promoted
+
+    def flush(self):
+        if self.index == "hnsw" and self.dim is not None:
+            with self.lock:
+                self._ann()
+
+    def index_report(
+        self,
+        queries: int = 100,
+        k: int = 10,
+        ef_values=(16, 32, 64, 128, 256)
+    ) -> List[Dict]:
+        """
+        HNSW와 정확한 검색의 recall@k / latency 비교
+
+        저장된 벡터 중 queries개를 무작위로 골라 쿼리로 사용한다.
+        그래프가 앞쪽 차원 벡터로 만들어져 있으면 원본 벡터 재정렬까지 포함해 잰다.
+
+        Args:
+            queries: 쿼리 수
+            k: top-k
+            ef_values: 비교할 ef_search 값들
+
+        Returns:
+            hnsw.recall_report() 결과
+        """
+        from hnsw import recall_report
+
+        np = self.np
+        with self.lock:
+            if self.dim is None:
+                return []
+
+            ids, slots = self._alive_slots()
+            index = self._ann()
+
+            picks = np.random.default_rng(0).choice(len(ids), size=min(queries, len(ids)), replace=False)
+            vectors = self._vectors()[np.sort(slots[picks])].astype(np.float32)
+
+            def exact_search(query, count):
+                return self._exact_top(query, ids, slots, -1.0, count, quantized=False)[0]
+
+            if self.scan_dim != self.dim:
+                index = SimpleNamespace(
+                    search=lambda query, count, ef_search=None: list(zip(*self._ann_top(query, -1.0, count, ef_search)))
+                )
+
+            return recall_report(index, exact_search, list(vectors), k=k, ef_values=ef_values)
+
+    def rescore_report(self, queries: int = 100, k: int = 10, factors=(1, 2, 4, 10)) -> List[Dict]:
+        """
+        2단계 스캔(1차 스캔 코드 + 원본 벡터 재정렬)과 원본 벡터 전체 스캔의 recall@k / latency 비교
+
+        저장된 벡터 중 queries개를 무작위로 골라 쿼리로 사용한다.
+
+        Args:
+            queries: 쿼리 수
+            k: top-k
+            factors: 비교할 rescore_factor 값들
+
+        Returns:
+            [{"rescore_factor", "recall", "p50_ms", "p95_ms", "scan_bytes"}, ...]
+            첫 항목은 원본 벡터 스캔 ({"rescore_factor": "full", "recall": 1.0, ...}),
+            scan_bytes는 1차 스캔이 읽는 벡터 한 개의 바이트 수
+        """
+        from hnsw import percentile
+
+        np = self.np
+        with self.lock:
+            if self.dim is None or not self.two_stage:
+                return []
+
+            ids, slots = self._alive_slots()
+            picks = np.random.default_rng(0).choice(len(ids), size=min(queries, len(ids)), replace=False)
+            vectors = self._vectors()[np.sort(slots[picks])].astype(np.float32)
+
+            def run(**kwargs):
+                results = []
+                timings = []
+                for query in vectors:
+                    start = time.perf_counter()
+                    results.append(set(self._exact_top(query, ids, slots, -1.0, k, **kwargs)[0]))
+                    timings.append((time.perf_counter() - start) * 1000)
+                return results, timings
+
+            self._quantized()
+            truth, timings = run(quantized=False)
+            report = [{
+                "rescore_factor": "full",
+                "recall": 1.0,
+                "p50_ms": percentile(timings, 50),
+                "p95_ms": percentile(timings, 95),
+                "scan_bytes": self.dim * self.dtype.itemsize
+            }]
+
+            total = sum(len(expected) for expected in truth)
+            for factor in factors:
+                found, timings = run(rescore_factor=factor)
+                hits = sum(len(expected & got) for expected, got in zip(truth, found))
+                report.append({
+                    "rescore_factor": factor,
+                    "recall": hits / total if total else 1.0,
+                    "p50_ms": percentile(timings, 50),
+                    "p95_ms": percentile(timings, 95),
+                    "scan_bytes": self._code_dtype().itemsize
+                })
+            return report
+
+    def _maybe_compact(self):
+        """죽은 slot이 절반을 넘으면 compact"""
+        alive = self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        if self._file_rows() > 1000 and alive * 2 < self._file_rows():
+            self.compact()
+
+    def compact(self):
+        """살아 있는 벡터만 남기도록 vectors.bin을 다시 쓰고 slot 번호 갱신"""
+        with self.lock:
+            vectors = self._vectors()
+            rows = self.conn.execute("SELECT id, slot FROM chunks ORDER BY slot").fetchall()
+
+            tmp_path = self.vectors_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                for start in range(0, len(rows), self.SCAN_BLOCK_ROWS):
+                    batch = [slot for _, slot in rows[start:start + self.SCAN_BLOCK_ROWS]]
+                    f.write(self.np.ascontiguousarray(vectors[batch]).tobytes())
+
+            # 1차 스캔 코드도 같은 순서로 다시 쓴다 (다른 형식의 코드 파일은 지우고 다음 검색 때 다시 만든다)
+            codes_tmp_path = None
+            if self.two_stage and self.dim is not None:
+                codes = self._quantized()
+                codes_tmp_path = self.codes_path.with_suffix(".tmp")
+                with open(codes_tmp_path, "wb") as f:
+                    for start in range(0, len(rows), self.SCAN_BLOCK_ROWS):
+                        batch = [slot for _, slot in rows[start:start + self.SCAN_BLOCK_ROWS]]
+                        f.write(codes[batch].tobytes())
+
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE chunks SET slot = ? WHERE id = ?",
+                    [(new_slot, row_id) for new_slot, (row_id, _) in enumerate(rows)]
+                )
+                self._matrix = None
+                self._codes = None
+                tmp_path.replace(self.vectors_path)
+                for codes_path in self.dir.glob("codes.*.bin"):
+                    if codes_path != self.codes_path:
+                        codes_path.unlink()
+                if codes_tmp_path:
+                    codes_tmp_path.replace(self.codes_path)
+            self._invalidate()
+
+    def reduce_dimensions(self, dims: int) -> int:
+        """
+        저장된 벡터를 앞쪽 dims 차원으로 줄이기 (Matryoshka 임베딩 마이그레이션)
+
+        text-embedding-3-*의 dimensions 축소는 앞쪽 차원을 잘라 다시 정규화한 것과
+        같으므로 다시 임베딩하지 않고 vectors.bin만 다시 쓴다 (slot 번호는 그대로).
+        새 벡터는 임시 파일에 쓴 뒤 rename으로 한 번에 바꾸고, 원래 파일은
+        vectors.bin.bak으로 남긴다 (되돌리기: .bak을 vectors.bin으로 되돌리고 meta dim 복구).
+        1차 스캔 코드와 HNSW 그래프는 지우고 다음 검색 때 새 차원으로 다시 만든다.
+
+        Args:
+            dims: 새 차원 수 (현재 차원보다 작아야 한다)
+
+        Returns:
+            다시 쓴 벡터 수 (빈 저장소는 0)
+        """
+        with self.lock:
+            if self.dim is None:
+                return 0
+            if not 0 < dims < self.dim:
+                raise ValueError(f"Can only reduce dimensions: index has {self.dim}, requested {dims}")
+
+            vectors = self._vectors()
+            rows = len(vectors) if vectors is not None else 0
+            tmp_path = self.vectors_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                for start in range(0, rows, self.SCAN_BLOCK_ROWS):
+                    block = vectors[start:start + self.SCAN_BLOCK_ROWS, :dims].astype(self.np.float32)
+                    f.write(self._normalize(block).astype(self.dtype).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            # 원본은 하드 링크로 남겨 두고 (링크를 못 만드는 파일 시스템은 복사) 새 파일로 교체
+            backup_path = self.vectors_path.with_name(self.vectors_path.name + ".bak")
+            backup_path.unlink(missing_ok=True)
+            try:
+                os.link(self.vectors_path, backup_path)
+            except OSError:
+                shutil.copyfile(self.vectors_path, backup_path)
+
+            with self.conn:
+                self._set_meta("dim", str(dims))
+                self._matrix = None
+                self._codes = None
+                tmp_path.replace(self.vectors_path)
+                for codes_path in self.dir.glob("codes.*.bin"):
+                    codes_path.unlink()
+                if self.hnsw_path.exists():
+                    self.hnsw_path.unlink()
+
+            self.dim = dims
+            self._hnsw = None
+            self._hnsw_alive = None
+            self._invalidate()
+            return rows
+
+    def file_hashes(self, path_prefix):
+        stored = {}
+        with self.lock:
+            for path, file_hash in self.conn.execute(
+                "SELECT DISTINCT path, file_hash FROM chunks WHERE path LIKE ? ESCAPE '\\'",
+                (escape_like(path_prefix) + "%",)
+            ):
+                stored.setdefault(path, set()).add(file_hash)
+        return stored
+
+    def stats(self):
+        def counts(column: str, default: str) -> Dict[str, int]:
+            return {
+                name if name is not None else default: count
+                for name, count in self.conn.execute(
+                    f"SELECT {column}, COUNT(*) FROM chunks GROUP BY {column}"
+                )
+            }
+
+        with self.lock:
+            total, last_ingest = self.conn.execute("SELECT COUNT(*), MAX(created_at) FROM chunks").fetchone()
+            stats = {
+                "total_count": total,
+                "sources": counts("source", "unknown"),
+                "authors": counts("author", "unknown"),
+                "categories": counts("category", "none"),
+                "folders": counts("folder", "unknown"),
+                "last_ingest": last_ingest
+            }
+
+        sqlite_size = sum(p.stat().st_size for p in self.dir.glob("index.sqlite*"))
+        vectors_size = self.vectors_path.stat().st_size if self.vectors_path.exists() else 0
+        codes_size = self.codes_path.stat().st_size if self.codes_path and self.codes_path.exists() else 0
+        stats["table_size"] = sqlite_size + vectors_size + codes_size
+        stats["index_size"] = vectors_size + codes_size
+        return stats
+
+
+def open_store(config: Dict) -> VectorStore:
+    """
+    config.json의 storage 설정으로 저장소 열기
+
+    Args:
+        config: 전체 설정 (storage.backend: supabase(기본) / local,
+            storage.quantization: halfvec / binary (supabase), int8 / binary (local),
+            storage.prefix_dimensions: 2단계 검색의 1차 검색 차원)
+
+    Returns:
+        VectorStore
+    """
+    storage_config = config.get("storage", {})
+    backend = storage_config.get("backend", "supabase")
+
+    if backend == "supabase":
+        return SupabaseStore(
+            config["supabase"]["url"],
+            config["supabase"]["key"],
+            quantization=storage_config.get("quantization"),
+            rescore_factor=storage_config.get("rescore_factor"),
+            prefix_dimensions=storage_config.get("prefix_dimensions")
+        )
+    elif backend == "local":
+        return LocalStore(
+            storage_config.get("path", DEFAULT_LOCAL_PATH),
+            dtype=storage_config.get("dtype", "float32"),
+            index=storage_config.get("index", "exact"),
+            hnsw_params=storage_config.get("hnsw"),
+            quantization=storage_config.get("quantization"),
+            rescore_factor=storage_config.get("rescore_factor"),
+            prefix_dimensions=storage_config.get("prefix_dimensions")
+        )
+    else:
+        raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,341 @@
+"""
+Knowledge Search - 단계별 시간 측정 (span/trace)
+
+검색/ingest 한 번을 trace 하나로 묶고, 그 안의 단계(번역, 임베딩, 저장소 검색,
+순위 계산 ...)를 span으로 잰다. 측정은 항상 켜져 있고 (perf_counter 몇 번),
+`ks search --benchmark`와 JSON 출력이 단계별 시간을 보여 준다.
+
+config.json의 tracing 설정을 켜면 끝난 trace를 파일로 내보낸다.
+- jsonl: trace 하나당 한 줄 (span 목록 포함)
+- prometheus: node_exporter textfile collector용 누적 histogram
+"""
+
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from cache import DEFAULT_CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# 현재 실행 중인 trace (asyncio.to_thread 등 context를 복사하는 스레드로 이어진다)
+_current: contextvars.ContextVar = contextvars.ContextVar("ks_trace", default=None)
+
+# Prometheus histogram bucket (초)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Trace:
+    """
+    trace 하나 (검색 한 번, ingest 한 번)
+
+    span은 여러 스레드에서 기록될 수 있다 (ingest 파이프라인 단계, 병렬 번역).
+    """
+
+    def __init__(self, name: str, **attrs):
+        """
+        초기화
+
+        Args:
+            name: trace 이름 (search, ingest ...)
+            **attrs: trace 속성 (JSONL에 함께 기록)
+        """
+        self.name = name
+        self.attrs = attrs
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.spans: List[Dict] = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[None]:
+        """
+        with 블록 실행 시간을 span으로 기록
+
+        Args:
+            name: 단계 이름
+            **attrs: span 속성 (행 수 등)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            record = {
+                "name": name,
+                "start_ms": round((start - self.started) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3)
+            }
+            if attrs:
+                record["attrs"] = attrs
+            with self.lock:
+                self.spans.append(record)
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self.started) * 1000, 3)
+
+    def stages(self) -> Dict[str, float]:
+        """
+        단계별 시간 합계 (ms, 처음 나온 순서)
+
+        같은 이름의 span은 더한다. 병렬로 실행된 단계(asearch의 번역/임베딩,
+        ingest의 번역 스레드)는 합계가 전체 시간보다 클 수 있다.
+        """
+        totals: Dict[str, float] = {}
+        with self.lock:
+            for record in self.spans:
+                totals[record["name"]] = totals.get(record["name"], 0.0) + record["duration_ms"]
+        return {name: round(ms, 2) for name, ms in totals.items()}
+
+    def to_dict(self) -> Dict:
+        with self.lock:
+            spans = list(self.spans)
+        return {
+            "name": self.name,
+            "timestamp": round(self.timestamp, 3),
+            "duration_ms": self.duration_ms,
+            "attrs": self.attrs,
+            "stages": self.stages(),
+            "spans": spans
+        }
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[None]:
+    """
+    현재 trace에 span 기록 (trace 밖이면 아무것도 하지 않음)
+
+    Args:
+        name: 단계 이름
+        **attrs: span 속성
+    """
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+
+    with trace.span(name, **attrs):
+        yield
+
+
+def bind(fn):
+    """
+    현재 trace를 다른 스레드에서도 이어 쓰도록 fn을 감싼다
+
+    ThreadPoolExecutor / threading.Thread는 context를 복사하지 않으므로
+    작업을 넘기기 전에 감싸야 그 안의 span이 같은 trace에 기록된다.
+    """
+    trace = _current.get()
+    if trace is None:
+        return fn
+
+    def wrapper(*args, **kwargs):
+        token = _current.set(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return wrapper
+
+
+def format_stages(stages: Dict[str, float]) -> str:
+    """단계별 시간 한 줄 요약 (e.g. "translate 412ms | embed 95ms | store.search 31ms")"""
+    return " | ".join(
+        f"{name} {ms / 1000:.1f}s" if ms >= 10000 else f"{name} {ms:.0f}ms" if ms >= 10 else f"{name} {ms:.1f}ms"
+        for name, ms in stages.items()
+    )
+
+
+class JsonlExporter:
+    """trace 하나당 한 줄씩 JSONL 파일에 추가"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        line = json.dumps(trace.to_dict(), ensure_ascii=False)
+        with self.lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class PrometheusExporter:
+    """
+    Prometheus textfile (node_exporter textfile collector 형식)
+
+    trace/span 이름별 누적 histogram `ks_span_duration_seconds`를 유지하고
+    trace가 끝날 때마다 파일을 통째로 다시 쓴다 (임시 파일 + rename).
+    trace 전체 시간은 span="total"로 기록한다. 여러 프로세스(ks serve와
+    ks search/ingest 한 번씩)가 같은 파일에 쓰므로, 내보낼 때마다 파일 잠금
+    (<path>.lock, fcntl.flock) 안에서 기존 값을 다시 읽어 더한다. 그래서
+    count/sum/bucket 값이 줄어들지 않는다 (Prometheus counter).
+    """
+
+    METRIC = "ks_span_duration_seconds"
+    LINE = re.compile(r'^(\w+)\{trace="([^"]*)",span="([^"]*)"(?:,le="([^"]*)")?\} (\S+)$')
+
+    def __init__(self, path: Path):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock_path = self.path.with_name(f"{self.path.name}.lock")
+        self.lock = threading.Lock()
+        # (trace, span) → {"buckets": [누적 count ...], "count": n, "sum": 초}
+        self.series: Dict[tuple, Dict] = {}
+
+    def _entry(self, key: tuple) -> Dict:
+        return self.series.setdefault(key, {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0})
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """다른 프로세스와 파일 읽기-쓰기가 겹치지 않도록 잠금 (fcntl이 없으면 스레드 잠금만)"""
+        with open(self.lock_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load(self):
+        """파일의 누적값으로 series를 다시 채운다 (형식이 다르면 무시하고 새로 시작)"""
+        self.series = {}
+        if not self.path.exists():
+            return
+
+        bounds = [f"{bound:g}" for bound in BUCKETS]
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            match = self.LINE.match(line)
+            if not match:
+                continue
+            metric, trace, span_name, le, value = match.groups()
+            entry = self._entry((trace, span_name))
+            try:
+                if metric == f"{self.METRIC}_bucket" and le in bounds:
+                    entry["buckets"][bounds.index(le)] = int(float(value))
+                elif metric == f"{self.METRIC}_count":
+                    entry["count"] = int(float(value))
+                elif metric == f"{self.METRIC}_sum":
+                    entry["sum"] = float(value)
+            except ValueError:
+                continue
+
+    def _observe(self, key: tuple, seconds: float):
+        entry = self._entry(key)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                entry["buckets"][i] += 1
+        entry["count"] += 1
+        entry["sum"] += seconds
+
+    def _render(self) -> str:
+        lines = [
+            f"# HELP {self.METRIC} Knowledge Search stage latency",
+            f"# TYPE {self.METRIC} histogram"
+        ]
+        for (trace, span_name), entry in sorted(self.series.items()):
+            labels = f'trace="{trace}",span="{span_name}"'
+            for bound, count in zip(BUCKETS, entry["buckets"]):
+                lines.append(f'{self.METRIC}_bucket{{{labels},le="{bound:g}"}} {count}')
+            lines.append(f'{self.METRIC}_bucket{{{labels},le="+Inf"}} {entry["count"]}')
+            lines.append(f'{self.METRIC}_sum{{{labels}}} {entry["sum"]:.6f}')
+            lines.append(f'{self.METRIC}_count{{{labels}}} {entry["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, trace: Trace):
+        with self.lock, self._file_lock():
+            # 다른 프로세스가 그 사이에 더한 값을 잃지 않도록 매번 다시 읽는다
+            self._load()
+            self._observe((trace.name, "total"), trace.duration_ms / 1000)
+            with trace.lock:
+                spans = list(trace.spans)
+            for record in spans:
+                self._observe((trace.name, record["name"]), record["duration_ms"] / 1000)
+
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(self._render(), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+
+
+class Tracer:
+    """trace 생성 + (설정되어 있으면) 내보내기"""
+
+    def __init__(self, exporter=None):
+        """
+        초기화
+
+        Args:
+            exporter: JsonlExporter / PrometheusExporter (None이면 내보내지 않음)
+        """
+        self.exporter = exporter
+
+    @contextmanager
+    def trace(self, name: str, **attrs) -> Iterator[Trace]:
+        """
+        with 블록을 trace 하나로 측정
+
+        블록 안의 span()은 이 trace에 기록된다. 이미 trace 안이면
+        (search_many 안의 검색 등) 새 trace를 만들지 않고 바깥 trace를 그대로 준다.
+
+        Args:
+            name: trace 이름
+            **attrs: trace 속성
+
+        Yields:
+            Trace
+        """
+        outer = _current.get()
+        if outer is not None:
+            yield outer
+            return
+
+        trace = Trace(name, **attrs)
+        token = _current.set(trace)
+        try:
+            yield trace
+        finally:
+            _current.reset(token)
+            trace.finish()
+            if self.exporter:
+                try:
+                    self.exporter.export(trace)
+                except OSError as e:
+                    print(f"⚠️  trace 내보내기 실패: {str(e)[:100]}")
+
+
+def open_tracer(config: Dict) -> Tracer:
+    """
+    config.json의 tracing 설정으로 Tracer 만들기
+
+    Args:
+        config: 전체 설정 (tracing.enabled, tracing.format: jsonl / prometheus, tracing.path)
+
+    Returns:
+        Tracer (tracing.enabled가 false이면 측정만 하고 내보내지 않음)
+    """
+    tracing_config = config.get("tracing", {})
+    if not tracing_config.get("enabled", False):
+        return Tracer()
+
+    format = tracing_config.get("format", "jsonl")
+    if format == "jsonl":
+        path = tracing_config.get("path", f"{DEFAULT_CACHE_DIR}/traces.jsonl")
+        return Tracer(JsonlExporter(path))
+    elif format == "prometheus":
+        path = tracing_config.get("path", f"{DEFAULT_CACHE_DIR}/metrics.prom")
+        return Tracer(PrometheusExporter(path))
+    else:
+        raise ValueError(f"Unknown tracing format: {format}")
@@ -0,0 +1,93 @@
+"""
+pytest 공통 설정
+
+src/ 모듈은 패키지가 아니라 같은 디렉터리 import (cli.py와 같음)이므로
+sys.path에 src/를 추가한다. 네트워크가 필요한 provider는 bench.StubProviders로 바꾼다.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bench import StubProviders, stub_embedding  # noqa: E402
+
+
+DIM = 64
+
+
+def make_config(tmp_path: Path, **sections) -> Path:
+    """로컬 저장소 + 임시 캐시 config.json을 만들고 경로를 돌려준다 (섹션별로 덮어쓰기)"""
+    config = {
+        "embedding": {"provider": "openai", "model": "stub-embedding", "api_key": "stub"},
+        "translation": {"provider": "openai", "model": "stub-translation", "api_key": "stub"},
+        "search": {"default_limit": 10, "min_similarity": 0.0},
+        "storage": {"backend": "local", "path": str(tmp_path / "store")},
+        "cache": {"enabled": True, "path": str(tmp_path / "cache")},
+        "sources": {"obsidian": {"path": str(tmp_path / "vault")}}
+    }
+    for name, values in sections.items():
+        config.setdefault(name, {}).update(values)
+
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(config))
+    return path
+
+
+def note_rows(texts, path: str = "notes/a.md", file_hash: str = "h1"):
+    """stub 임베딩으로 만든 저장소 행"""
+    return [
+        {
+            "embedding": stub_embedding(text, DIM),
+            "metadata": {
+                "path": path,
+                "text": text,
+                "source": "obsidian",
+                "author": "me",
+                "date": "2024-01-01",
+                "file_hash": file_hash
+            }
+        }
+        for text in texts
+    ]
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    return make_config(tmp_path)
+
+
+@pytest.fixture
+def searcher(config_path):
+    """캐시 없는 KnowledgeSearch (stub provider, 로컬 저장소)"""
+    from search import KnowledgeSearch
+
+    search = KnowledgeSearch(str(config_path), use_cache=False)
+    search.providers = StubProviders(dim=DIM)
+    return search
+
+
+@pytest.fixture
+def cached_searcher(config_path):
+    """캐시를 켠 KnowledgeSearch (캐시 디렉터리는 tmp_path 아래)"""
+    from search import KnowledgeSearch
+
+    search = KnowledgeSearch(str(config_path))
+    search.providers = StubProviders(dim=DIM)
+    return search
+
+
+@pytest.fixture(scope="session")
+def byte_encoding():
+    """바이트 단위 tiktoken Encoding (1바이트 = 1토큰, 다운로드 없음)"""
+    tiktoken = pytest.importorskip("tiktoken")
+    pattern = (
+        r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]++[\r\n]*"""
+        r"""|\s*[\r\n]|\s+(?!\S)|\s+"""
+    )
+    return tiktoken.Encoding(
+        "bytes", pat_str=pattern, mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={}
+    )
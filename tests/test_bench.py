@@ -0,0 +1,25 @@
+"""ks bench 보조 함수"""
+
+from bench import compare, peak_alloc_mb, stub_embedding
+
+
+def test_stub_embedding_is_deterministic_and_normalized():
+    vector = stub_embedding("alpha beta", 32)
+    assert vector == stub_embedding("alpha beta", 32)
+    assert abs(sum(value * value for value in vector) - 1.0) < 1e-9
+
+
+def test_peak_alloc_measures_only_the_phase():
+    held = bytearray(8 * 1024 * 1024)
+    assert peak_alloc_mb(lambda: None) < 1.0
+    assert peak_alloc_mb(lambda: bytearray(4 * 1024 * 1024)) >= 3.9
+    del held
+
+
+def test_compare_flags_regressions():
+    baseline = {"search": {"p50_ms": 10.0, "peak_alloc_mb": 10.0}, "ingest": {"chunks_per_sec": 100.0}}
+    report = {"search": {"p50_ms": 20.0, "peak_alloc_mb": 11.0}, "ingest": {"chunks_per_sec": 150.0}}
+    rows = {row["metric"]: row for row in compare(report, baseline, tolerance=0.2)}
+    assert rows["search.p50_ms"]["regression"]
+    assert not rows["search.peak_alloc_mb"]["regression"]
+    assert not rows["ingest.chunks_per_sec"]["regression"] and rows["ingest.chunks_per_sec"]["change"] == 0.5
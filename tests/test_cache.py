@@ -0,0 +1,118 @@
+"""캐시: 쿼리/결과/임베딩/번역 캐시"""
+
+from cache import (
+    EmbeddingCache, QueryCache, ResultCache, TranslationCache, normalize_query,
+    open_embedding_cache, open_query_cache, open_result_cache, open_translation_cache
+)
+
+
+def test_result_cache_generation_invalidates(tmp_path):
+    cache = ResultCache(tmp_path / "results.db", max_bytes=1 << 20, ttl_seconds=60)
+    key = cache.make_key([0.1, 0.2], limit=10)
+    cache.put(key, [{"id": 1}])
+    assert cache.get(key) == [{"id": 1}]
+
+    cache.bump_generation()
+    assert cache.get(key) is None
+
+
+def test_result_cache_key_covers_options():
+    embedding = [0.1, 0.2]
+    assert ResultCache.make_key(embedding, limit=10) == ResultCache.make_key(embedding, limit=10)
+    assert ResultCache.make_key(embedding, limit=10) != ResultCache.make_key(embedding, limit=5)
+    assert ResultCache.make_key(embedding, limit=10) != ResultCache.make_key([0.1, 0.3], limit=10)
+
+
+def test_result_cache_ttl(tmp_path, monkeypatch):
+    import cache
+
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    results = ResultCache(tmp_path / "results.db", max_bytes=1 << 20, ttl_seconds=60)
+    key = results.make_key([0.5], limit=3)
+    results.put(key, [{"id": 7}])
+
+    now[0] += 59
+    assert results.get(key) == [{"id": 7}]
+    now[0] += 2
+    assert results.get(key) is None
+    assert results.stats()["hits"] == 1 and results.stats()["misses"] == 1
+
+
+def test_embedding_cache_round_trip(tmp_path):
+    embeddings = EmbeddingCache(tmp_path / "embeddings.db", max_bytes=1 << 20)
+    embeddings.put_many("openai", "model@256", ["a", "b"], [[0.5, 0.25], [1.0, -1.0]])
+
+    assert embeddings.get_many("openai", "model@256", ["b", "c", "a", "b"]) == [[1.0, -1.0], None, [0.5, 0.25], [1.0, -1.0]]
+    # 모델(차원)과 input_type이 다르면 다른 항목
+    assert embeddings.get_many("openai", "model", ["a"]) == [None]
+    assert embeddings.get_many("openai", "model@256", ["a"], "search_query") == [None]
+    assert embeddings.stats()["hits"] == 3
+
+
+def test_embedding_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    import cache
+
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(cache.time, "time", lambda: float(next(clock)))
+    embeddings = EmbeddingCache(tmp_path / "embeddings.db", max_bytes=3 * 16)
+    for i, text in enumerate("abc"):
+        embeddings.put_many("p", "m", [text], [[float(i)] * 4])
+        embeddings.get_many("p", "m", ["a"])  # 'a'는 계속 쓰인다
+    embeddings.put_many("p", "m", ["d"], [[3.0] * 4])
+
+    assert embeddings.get_many("p", "m", ["a", "b", "d"]) == [[0.0] * 4, None, [3.0] * 4]
+
+
+def test_translation_cache(tmp_path):
+    translations = TranslationCache(tmp_path / "translations.db", max_bytes=1 << 20)
+    translations.put("anthropic", "model", "query", "회의록", "meeting notes")
+
+    assert translations.get("anthropic", "model", "query", "회의록") == "meeting notes"
+    assert translations.get("anthropic", "model", "document", "회의록") is None
+    translations.count_skipped()
+    assert translations.stats() == {
+        "entries": 1, "size_bytes": len("meeting notes"), "hits": 1, "misses": 1, "skipped": 1
+    }
+
+
+def test_query_cache_normalizes_and_uses_memory(tmp_path):
+    queries = QueryCache(tmp_path / "queries.db", max_bytes=1 << 20, ttl_seconds=60)
+    queries.put("ns", "Kubernetes  Pods", "kubernetes pods", [0.5, 0.25])
+
+    assert normalize_query("  KUBERNETES pods ") == "kubernetes pods"
+    assert queries.get("ns", "kubernetes pods") == ("kubernetes pods", [0.5, 0.25])
+    assert queries.get("other", "kubernetes pods") is None
+    assert queries.session == {"memory_hits": 1, "disk_hits": 0, "misses": 1}
+
+    # 다른 프로세스: 디스크에서 읽고 메모리에 올린다
+    fresh = QueryCache(tmp_path / "queries.db", max_bytes=1 << 20, ttl_seconds=60)
+    assert fresh.get("ns", "Kubernetes Pods") == ("kubernetes pods", [0.5, 0.25])
+    assert fresh.get("ns", "Kubernetes Pods") == ("kubernetes pods", [0.5, 0.25])
+    assert fresh.session == {"memory_hits": 1, "disk_hits": 1, "misses": 0}
+
+
+def test_query_cache_ttl(tmp_path, monkeypatch):
+    import cache
+
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    queries = QueryCache(tmp_path / "queries.db", max_bytes=1 << 20, ttl_seconds=60, memory_entries=1)
+    queries.put("ns", "a", "a", [1.0])
+    queries.put("ns", "b", "b", [2.0])  # 메모리에서 'a'를 밀어낸다
+
+    assert queries.get("ns", "a") == ("a", [1.0])
+    now[0] += 61
+    assert queries.get("ns", "a") is None
+    assert queries.get("ns", "b") is None
+
+
+def test_open_caches_respect_enabled(tmp_path):
+    config = {"cache": {"enabled": False, "path": str(tmp_path)}}
+    assert open_embedding_cache(config) is None
+    assert open_query_cache(config) is None
+    assert open_result_cache(config) is None
+    assert open_translation_cache(config) is None
+
+    config["cache"]["enabled"] = True
+    assert isinstance(open_query_cache(config), QueryCache)
@@ -0,0 +1,71 @@
+"""MarkdownChunker: 블록 경계 분할 (1바이트 = 1토큰 encoding으로 크기를 정확히 맞춘다)"""
+
+import pytest
+
+from chunker import MarkdownChunker
+
+
+def paragraph(word: str, size: int) -> str:
+    """size 바이트짜리 한 줄 문단 (문장 경계 없음)"""
+    return (f"{word} " * size)[:size - 1] + "\n"
+
+
+@pytest.fixture
+def chunker(byte_encoding):
+    return MarkdownChunker(byte_encoding, chunk_size=200, chunk_overlap=50, min_chunk_size=40)
+
+
+def test_code_fence_is_never_split(chunker):
+    code = "```python\n" + "".join(f"value_{i} = compute({i})\n" for i in range(6)) + "```\n"
+    text = paragraph("intro", 120) + "\n" + code + "\n" + paragraph("outro", 120)
+    assert len(code) < 200 < 120 + len(code)
+
+    chunks = chunker.split(text)
+    assert len(chunks) > 1
+    assert sum(code.strip() in chunk for chunk in chunks) >= 1
+    for chunk in chunks:
+        # 여는 fence가 있는 청크에는 닫는 fence도 있다
+        assert chunk.count("```") % 2 == 0
+
+
+def test_heading_starts_a_chunk(chunker):
+    sections = [
+        ("# Alpha", paragraph("alpha", 60)),
+        ("## Beta", paragraph("beta", 150)),
+        ("## Gamma", paragraph("gamma", 150)),
+        ("## Delta", paragraph("delta", 120))
+    ]
+    text = "\n".join(f"{heading}\n\n{body}" for heading, body in sections)
+
+    chunks = chunker.split(text)
+    # 'Beta' 본문이 넘쳐도 제목이 앞 청크 끝에 남지 않고, 앞 섹션 내용을 겹쳐 넣지 않는다
+    assert [chunk.splitlines()[0] for chunk in chunks] == [heading for heading, _ in sections]
+    for chunk, (heading, body) in zip(chunks, sections):
+        assert chunk == f"{heading}\n\n{body}".strip()
+
+
+def test_short_sections_share_a_chunk(chunker):
+    text = "# One\n\n" + paragraph("one", 40) + "\n## Two\n\n" + paragraph("two", 40)
+    assert chunker.split(text) == [text.strip()]
+
+
+def test_overlap_carries_previous_blocks(chunker):
+    text = "\n".join(paragraph(word, 45) for word in ("one", "two", "three", "four", "five", "six"))
+    chunks = chunker.split(text)
+    assert len(chunks) == 2
+    assert chunks[1].startswith("four")
+
+
+def test_merged_tail_is_bounded(chunker, byte_encoding):
+    text = "\n".join(paragraph(f"w{i}", 60) for i in range(7)) + "\n" + paragraph("tail", 20)
+    chunks = chunker.split(text)
+
+    assert chunks[-1].endswith("tail tail tail tail")
+    assert not chunks[-1].startswith("tail")
+    for chunk in chunks:
+        assert len(byte_encoding.encode_ordinary(chunk)) <= chunker.chunk_size + chunker.min_chunk_size
+
+
+def test_short_text_is_one_chunk(chunker):
+    assert chunker.split("# Title\n\nshort note\n") == ["# Title\n\nshort note"]
+    assert chunker.split("   \n\n") == []
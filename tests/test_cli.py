@@ -0,0 +1,84 @@
+"""ks CLI 명령 (config.json은 임시 설치 디렉터리에서 읽는다)"""
+
+import json
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+import cli
+from conftest import make_config, note_rows
+from storage import open_store
+
+
+@pytest.fixture
+def install(tmp_path, monkeypatch):
+    """tmp_path를 설치 디렉터리로: cli는 src/의 부모 디렉터리에서 config.json을 읽는다"""
+    (tmp_path / "src").mkdir()
+    monkeypatch.setattr(cli, "__file__", str(tmp_path / "src" / "cli.py"))
+
+    def configure(**sections):
+        config_path = make_config(tmp_path, **sections)
+        store = open_store(json.loads(config_path.read_text()))
+        store.insert_rows(note_rows(["alpha beta", "gamma delta", "epsilon zeta"]))
+        return store
+
+    return configure
+
+
+def test_migrate_dimensions_requires_matching_config(install):
+    store = install()
+    result = CliRunner().invoke(cli.cli, ["migrate-dimensions", "32", "--yes"])
+    assert result.exit_code == 1
+    assert "--force" in result.output
+    assert open_store({"storage": {"backend": "local", "path": str(store.dir)}}).dim == 64
+
+
+def test_migrate_dimensions_asks_for_confirmation(install):
+    store = install(embedding={"dimensions": 32})
+    result = CliRunner().invoke(cli.cli, ["migrate-dimensions", "32"], input="n\n")
+    assert "Aborted" in result.output
+    assert not (store.dir / "vectors.bin.bak").exists()
+    assert open_store({"storage": {"backend": "local", "path": str(store.dir)}}).dim == 64
+
+
+def test_migrate_dimensions_keeps_backup(install):
+    store = install(embedding={"dimensions": 32})
+    before = np.fromfile(store.vectors_path, dtype=np.float32).reshape(-1, 64)
+
+    result = CliRunner().invoke(cli.cli, ["migrate-dimensions", "32", "--yes"])
+    assert result.exit_code == 0, result.output
+    assert np.array_equal(np.fromfile(store.dir / "vectors.bin.bak", dtype=np.float32).reshape(-1, 64), before)
+    assert not (store.dir / "vectors.tmp").exists()
+
+    migrated = open_store({"storage": {"backend": "local", "path": str(store.dir)}})
+    assert migrated.dim == 32
+    after = np.fromfile(store.vectors_path, dtype=np.float32).reshape(-1, 32)
+    expected = before[:, :32] / np.linalg.norm(before[:, :32], axis=1, keepdims=True)
+    assert np.allclose(after, expected, atol=1e-6)
+
+
+def test_migrate_dimensions_force(install):
+    install()
+    result = CliRunner().invoke(cli.cli, ["migrate-dimensions", "32", "--force", "--yes"])
+    assert result.exit_code == 0, result.output
+    assert "⚠️" in result.output
+
+
+def test_search_json_includes_stages(install, monkeypatch):
+    import search
+    from bench import StubProviders
+    from conftest import DIM
+
+    install()
+    monkeypatch.setattr(search, "open_providers", lambda config: StubProviders(dim=DIM))
+
+    result = CliRunner().invoke(cli.cli, ["search", "alpha beta", "--format", "json", "--no-daemon"])
+    assert result.exit_code == 0, result.output
+    # search()가 먼저 출력하는 "🔍 Searching: ..." 줄 다음이 JSON
+    output = json.loads(result.output[result.output.index("{"):])
+    assert output["results"]
+    assert "embed" in output["stages"]
+    # elapsed_ms/query_cache는 --benchmark일 때만
+    assert output["elapsed_ms"] is None
+    assert "query_cache" not in output
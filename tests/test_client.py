@@ -0,0 +1,59 @@
+"""daemon_search: 데몬이 아닌 프로세스가 포트를 쓰면 in-process 검색으로 대체"""
+
+import json
+import socket
+import threading
+
+import pytest
+
+from client import daemon_search
+
+
+def serve_once(response: bytes):
+    """요청 하나를 받아 response를 돌려주는 TCP 서버 → config (server.host/port)"""
+    listener = socket.create_server(("127.0.0.1", 0))
+    port = listener.getsockname()[1]
+
+    def handle():
+        with listener:
+            conn, _ = listener.accept()
+            with conn:
+                conn.recv(65536)
+                conn.sendall(response)
+
+    threading.Thread(target=handle, daemon=True).start()
+    return {"server": {"host": "127.0.0.1", "port": port}}
+
+
+def http(status: str, body) -> bytes:
+    payload = json.dumps(body).encode("utf-8")
+    return f"HTTP/1.1 {status}\r\nContent-Length: {len(payload)}\r\n\r\n".encode("ascii") + payload
+
+
+@pytest.mark.parametrize("response", [
+    b"SSH-2.0-OpenSSH_9.6\r\n",
+    b"HTTP/1.1 200 OK\r\n\r\n<html>hello</html>",
+    http("200 OK", ["not", "a", "dict"]),
+    http("200 OK", {"status": "ok"}),
+    http("404 Not Found", {"error": "not found"}),
+    b""
+])
+def test_other_process_on_port_falls_back(tmp_path, response, capsys):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(serve_once(response)))
+
+    assert daemon_search(str(config_path), "query", timeout=5.0) is None
+    assert "not a ks search daemon" in capsys.readouterr().err
+
+
+def test_daemon_response(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(serve_once(http("200 OK", {"results": [], "elapsed_ms": 1.0}))))
+    assert daemon_search(str(config_path), "query", timeout=5.0) == {"results": [], "elapsed_ms": 1.0}
+
+
+def test_daemon_error_raises(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(serve_once(http("500 Internal Server Error", {"error": "boom"}))))
+    with pytest.raises(RuntimeError, match="boom"):
+        daemon_search(str(config_path), "query", timeout=5.0)
@@ -0,0 +1,112 @@
+"""EmbeddingWriter: 파일 단위 저장, 검색 결과 캐시 무효화"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from conftest import note_rows
+from ingest import EmbeddingWriter
+from storage import LocalStore
+
+
+def test_flush_calls_on_flush_after_each_write(tmp_path):
+    store = LocalStore(str(tmp_path / "store"))
+    flushes = []
+    writer = EmbeddingWriter(store, max_rows=2, on_flush=lambda: flushes.append(store.stats()["total_count"]))
+
+    writer.add_file(Path("a.md"), note_rows(["one two", "three four"], path="a.md"))
+    writer.add_file(Path("b.md"), note_rows(["five six"], path="b.md"))
+    assert flushes == [2]
+
+    writer.flush()
+    assert flushes == [2, 3]
+
+    # 빈 flush는 저장소에 쓰지 않으므로 호출하지 않는다
+    writer.flush()
+    assert flushes == [2, 3]
+
+
+def test_stored_path_outside_home(tmp_path, monkeypatch):
+    from ingest import KnowledgeIngest
+
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    assert KnowledgeIngest.stored_path(tmp_path / "home" / "vault" / "a.md") == "vault/a.md"
+    assert KnowledgeIngest.stored_path(tmp_path / "elsewhere" / "a.md") == str(tmp_path / "elsewhere" / "a.md")
+
+
+class FailingStore(LocalStore):
+    """n번째 insert_rows 요청에서 실패하는 LocalStore"""
+
+    def __init__(self, path, fail_at):
+        super().__init__(path)
+        self.fail_at = fail_at
+        self.inserts = 0
+
+    def insert_rows(self, rows):
+        self.inserts += 1
+        if self.inserts == self.fail_at:
+            raise RuntimeError("insert failed")
+        super().insert_rows(rows)
+
+
+def stored_texts(store, path="a.md"):
+    rows = store.conn.execute("SELECT metadata FROM chunks WHERE path = ?", (path,)).fetchall()
+    return sorted(json.loads(metadata)["text"] for metadata, in rows)
+
+
+def test_failed_multi_request_write_keeps_old_version(tmp_path):
+    store = FailingStore(str(tmp_path / "store"), fail_at=2)
+    store.replace_rows(note_rows(["old one", "old two"], path="a.md", file_hash="v1"))
+
+    writer = EmbeddingWriter(store, max_rows=2)
+    writer.add_file(Path("a.md"), note_rows(["new one", "new two", "new three"], path="a.md", file_hash="v2"))
+    writer.flush()
+
+    assert writer.failed_files == [Path("a.md")]
+    assert stored_texts(store) == ["old one", "old two"]
+    assert store.file_hashes("") == {"a.md": {"v1"}}
+
+
+def test_multi_request_write_replaces_old_version(tmp_path):
+    store = LocalStore(str(tmp_path / "store"))
+    store.replace_rows(note_rows(["old one", "old two"], path="a.md", file_hash="v1"))
+
+    writer = EmbeddingWriter(store, max_rows=2)
+    new_rows = note_rows(["new one", "new two", "new three"], path="a.md", file_hash="v2")
+    writer.add_file(Path("a.md"), new_rows)
+    assert writer.requests == 3
+    assert stored_texts(store) == ["new one", "new three", "new two"]
+    assert store.file_hashes("") == {"a.md": {"v2"}}
+
+    # 같은 hash로 다시 저장해도 (--force) 행이 중복되지 않는다
+    writer.add_file(Path("a.md"), new_rows)
+    assert stored_texts(store) == ["new one", "new three", "new two"]
+    assert store.file_hashes("") == {"a.md": {"v2"}}
+
+
+def test_promote_without_staged_rows_keeps_old_version(tmp_path):
+    store = LocalStore(str(tmp_path / "store"))
+    store.replace_rows(note_rows(["old one", "old two"], path="a.md", file_hash="v1"))
+
+    with pytest.raises(RuntimeError):
+        store.promote_file("a.md", "v2.staged", "v2")
+    assert stored_texts(store) == ["old one", "old two"]
+
+
+def test_unconfirmed_promote_fails_the_file(tmp_path):
+    class SilentStore(LocalStore):
+        """RLS로 UPDATE가 막힌 것처럼 아무것도 확정하지 않는 저장소"""
+
+        def promote_file(self, path, staged_hash, file_hash):
+            return 0
+
+    store = SilentStore(str(tmp_path / "store"))
+    store.replace_rows(note_rows(["old one", "old two"], path="a.md", file_hash="v1"))
+
+    writer = EmbeddingWriter(store, max_rows=2)
+    writer.add_file(Path("a.md"), note_rows(["new one", "new two", "new three"], path="a.md", file_hash="v2"))
+
+    assert writer.failed_files == [Path("a.md")]
+    assert stored_texts(store) == ["old one", "old two"]
+    assert store.file_hashes("") == {"a.md": {"v1"}}
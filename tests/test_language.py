@@ -0,0 +1,34 @@
+"""language.is_english, lexical_terms"""
+
+from language import is_english, lexical_terms
+
+
+def test_korean_and_mixed_text_is_not_english():
+    assert not is_english("삼성전자 실적 정리")
+    assert not is_english("Kubernetes 파드 eviction 정리 노트입니다")
+
+
+def test_english_text():
+    assert is_english("latest kubernetes pod eviction")
+    assert is_english("The meeting covered the budget and the hiring plan for next quarter.")
+
+
+def test_text_without_letters_is_english():
+    assert is_english("")
+    assert is_english("1234 5678 -- == 42")
+
+
+def test_long_latin_text_needs_english_stopwords():
+    # 라틴 문자를 쓰는 다른 언어 (영어 기능어 비율 10% 미만)
+    assert not is_english("Dieser Bericht beschreibt unsere Planung fuer naechstes Quartal sehr genau")
+    # 짧은 쿼리는 기능어가 없어도 영어로 본다
+    assert is_english("Quartal Planung Bericht")
+
+
+def test_accented_letters_count_as_non_ascii():
+    assert not is_english("réunion budgétaire équipe")
+
+
+def test_lexical_terms():
+    assert lexical_terms("The Kubernetes pod, the POD and a 1 x") == ["kubernetes", "pod"]
+    assert lexical_terms("에러 코드 E42") == ["에러", "코드", "e42"]
@@ -0,0 +1,118 @@
+"""TokenBucket, RateLimiter, retry_with_backoff"""
+
+import pytest
+
+import ratelimit
+from ratelimit import RateLimiter, TokenBucket, get_retry_after, get_status_code, retry_with_backoff
+
+
+class FakeClock:
+    """time.monotonic/time.sleep 대용 (sleep하면 시간이 흐른다)"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(ratelimit.time, "sleep", fake.sleep)
+    return fake
+
+
+class APIError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": {"retry-after": retry_after} if retry_after else {}})()
+
+
+def test_token_bucket_waits_for_refill(clock):
+    bucket = TokenBucket(60)  # 초당 1개, 최대 60개
+    for _ in range(60):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+    bucket.acquire(3)
+    assert sum(clock.sleeps) == pytest.approx(4.0)
+
+
+def test_token_bucket_caps_request_at_capacity(clock):
+    bucket = TokenBucket(60, capacity=10)
+    bucket.acquire(1000)  # capacity보다 큰 요청은 capacity만큼만
+    assert clock.sleeps == [] and bucket.tokens == 0
+
+
+def test_rate_limiter_limits_tokens_only_when_configured(clock):
+    limiter = RateLimiter(requests_per_minute=120)
+    assert not limiter.limits_tokens
+    limiter.acquire(tokens=10 ** 9)
+    assert clock.sleeps == []
+
+    limiter = RateLimiter(tokens_per_minute=600)
+    assert limiter.limits_tokens
+    limiter.acquire(tokens=600)
+    limiter.acquire(tokens=100)
+    assert sum(clock.sleeps) == pytest.approx(10.0)
+
+
+def test_retry_with_backoff_retries_rate_limits(clock, capsys):
+    calls = []
+
+    def flaky(value, scale=1):
+        calls.append(value)
+        if len(calls) < 3:
+            raise APIError(429)
+        return value * scale
+
+    assert retry_with_backoff(flaky, 21, scale=2, max_retries=5, base_delay=1.0) == 42
+    assert len(calls) == 3
+    # 지수 backoff + jitter (0.5~1.0배)
+    assert 0.5 <= clock.sleeps[0] <= 1.0 and 1.0 <= clock.sleeps[1] <= 2.0
+    assert "재시도" in capsys.readouterr().out
+
+
+def test_retry_with_backoff_uses_retry_after(clock, capsys):
+    attempts = iter([APIError(503, retry_after="7"), None])
+
+    def call():
+        error = next(attempts)
+        if error:
+            raise error
+        return "ok"
+
+    assert retry_with_backoff(call) == "ok"
+    assert clock.sleeps == [7.0]
+
+
+def test_retry_with_backoff_gives_up(clock, capsys):
+    def always(status):
+        raise APIError(status)
+
+    with pytest.raises(APIError):
+        retry_with_backoff(always, 400)
+    assert clock.sleeps == []
+
+    with pytest.raises(APIError):
+        retry_with_backoff(always, 529, max_retries=2, max_delay=0.1)
+    assert len(clock.sleeps) == 2 and max(clock.sleeps) <= 0.1
+
+
+def test_status_code_and_retry_after_extraction():
+    assert get_status_code(APIError(429)) == 429
+    wrapped = Exception()
+    wrapped.response = type("Response", (), {"status_code": 502, "headers": {"retry-after": "x"}})()
+    assert get_status_code(wrapped) == 502
+    assert get_retry_after(wrapped) is None
+    assert get_status_code(ValueError()) is None
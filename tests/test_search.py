@@ -0,0 +1,140 @@
+"""KnowledgeSearch: 하이브리드 검색 (RRF 융합, 임계값)"""
+
+import pytest
+
+from conftest import note_rows
+
+
+NOTES = [
+    "meeting note about the quarterly budget",
+    "grocery note milk eggs bread",
+    "note on kubernetes pod eviction",
+    "travel plans for the summer holiday"
+]
+
+
+def test_lexical_query_drops_stopwords_and_short_tokens(searcher):
+    assert searcher._lexical_query("the a note", "the a note") == "note"
+    assert searcher._lexical_query("x 1", "x 1") == ""
+    assert searcher._lexical_query("삼성전자 실적", "Samsung earnings") == "삼성전자 실적 samsung earnings"
+
+
+def test_high_min_similarity_filters_lexical_matches(searcher):
+    searcher.store.insert_rows(note_rows(NOTES))
+
+    # 'note'는 세 청크와 일치하지만 쿼리와의 유사도는 낮다
+    assert searcher.search("the a note", min_similarity=90) == []
+    assert searcher.search("x 1", min_similarity=95) == []
+
+
+def test_lexical_matches_kept_within_margin(searcher):
+    searcher.store.insert_rows(note_rows(NOTES))
+    results = searcher.search("kubernetes eviction", min_similarity=0)
+    assert results[0]['text'] == NOTES[2]
+
+    # 벡터 임계값보다 lexical_margin 이내로 낮은 키워드 일치는 남는다
+    similarity = results[0]['similarity']
+    searcher.lexical_margin = 10.0
+    kept = searcher.search("kubernetes eviction", min_similarity=similarity + 5)
+    assert [result['text'] for result in kept] == [NOTES[2]]
+    searcher.hybrid = False
+    assert searcher.search("kubernetes eviction", min_similarity=similarity + 5) == []
+
+
+def test_rrf_fusion_orders_by_summed_reciprocal_rank(searcher):
+    searcher.rrf_k = 60
+
+    def row(key, similarity):
+        return {'id': key, 'similarity': similarity, 'metadata': {'path': f'{key}.md', 'text': key}}
+
+    vector_rows = [row('a', 0.9), row('b', 0.8), row('c', 0.7)]
+    lexical_rows = [row('c', 0.7), row('d', 0.1)]
+    fused = searcher._fuse(vector_rows, lexical_rows)
+
+    # c: 1/63 + 1/61 > a: 1/61 > b: 1/62 > d: 1/62 (먼저 들어온 b가 앞)
+    assert [row['id'] for row in fused] == ['c', 'a', 'b', 'd']
+    assert fused[0]['lexical'] and 'lexical' not in fused[1]
+
+    # 융합 순서 유지, lexical 행만 낮은 하한 (0.1 → 10 < 50 - 10 이므로 d는 제외)
+    searcher.lexical_margin = 10.0
+    ranked = searcher._rank(fused, 10, 50.0, False, fused=True)
+    assert [result['id'] for result in ranked] == ['c', 'a', 'b']
+
+
+def test_failed_translation_is_not_cached(cached_searcher, capsys):
+    providers = cached_searcher.providers
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("translation API down")
+
+    providers.complete = fail
+    assert cached_searcher.prepare_query("회의록 요약")[0] == "회의록 요약"
+    assert cached_searcher.query_cache.get(cached_searcher.query_namespace, "회의록 요약") is None
+    assert "번역 실패" in capsys.readouterr().out
+
+    # 복구되면 다음 검색이 다시 번역하고 그 결과를 캐시한다
+    providers.complete = lambda *args, **kwargs: "meeting summary"
+    assert cached_searcher.prepare_query("회의록 요약")[0] == "meeting summary"
+    assert cached_searcher.query_cache.get(cached_searcher.query_namespace, "회의록 요약")[0] == "meeting summary"
+
+
+def test_result_cache_key_includes_store_settings(cached_searcher):
+    cached_searcher.store.insert_rows(note_rows(NOTES))
+    cached_searcher.search("kubernetes eviction")
+    cached_searcher.search("kubernetes eviction")
+    assert cached_searcher.result_cache.stats()["hits"] == 1
+
+    # 같은 쿼리라도 양자화/rescore 설정이나 RRF 파라미터가 다르면 다시 검색한다
+    cached_searcher.store_key = {**cached_searcher.store_key, "quantization": "int8"}
+    cached_searcher.search("kubernetes eviction")
+    cached_searcher.rrf_k = 10
+    cached_searcher.search("kubernetes eviction")
+    assert cached_searcher.result_cache.stats()["hits"] == 1
+    assert cached_searcher.store_key["location"] == str(cached_searcher.store.dir)
+
+
+def test_concurrent_asearch_keeps_own_trace(searcher):
+    import asyncio
+
+    searcher.store.insert_rows(note_rows(NOTES))
+
+    async def run(query):
+        await searcher.asearch(query)
+        return searcher.last_trace
+
+    async def main():
+        return await asyncio.gather(run("quarterly budget"), run("summer holiday"))
+
+    traces = asyncio.run(main())
+    assert [trace.attrs["query"] for trace in traces] == ["quarterly budget", "summer holiday"]
+
+
+def test_repeated_asearch_uses_same_merged_results(cached_searcher, monkeypatch):
+    import asyncio
+
+    search = cached_searcher
+    search.store.insert_rows(note_rows(NOTES))
+    # 번역이 원문과 다르면 원문/번역 임베딩을 모두 검색한다
+    monkeypatch.setattr(search, "_translate", lambda query: ("summer holiday travel", True))
+
+    first = asyncio.run(search.asearch("quarterly budget meeting"))
+
+    calls = []
+    store_search = search.store.search
+    monkeypatch.setattr(search.store, "search", lambda *args, **kwargs: calls.append(1) or store_search(*args, **kwargs))
+    embed_calls = search.providers.embed_calls
+
+    second = asyncio.run(search.asearch("quarterly budget meeting"))
+    assert second == first
+    # 번역은 쿼리 캐시, 원문 임베딩은 임베딩 캐시, 결과는 결과 캐시에서
+    assert calls == []
+    assert search.providers.embed_calls == embed_calls
+    assert {result['text'] for result in first} >= {NOTES[0], NOTES[3]}
+
+
+def test_search_many_rejects_unknown_options_and_keeps_zero_limit(searcher):
+    searcher.store.insert_rows(note_rows(NOTES))
+    with pytest.raises(TypeError):
+        searcher.search_many(["budget"], min_similarty=50)
+    assert searcher.search_many(["budget", "holiday"], limit=0) == [[], []]
+    assert [len(results) for results in searcher.search_many(["budget"], limit=2)] == [2]
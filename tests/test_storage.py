@@ -0,0 +1,230 @@
+"""LocalStore: memmap 벡터, FTS5 동기화, 교체/삭제, compact, HNSW, 2단계 검색"""
+
+import numpy as np
+import pytest
+
+from storage import LocalStore
+
+
+DIM = 32
+
+
+def make_rows(vectors, path="notes/a.md", file_hash="h1", texts=None):
+    return [
+        {
+            "embedding": [float(value) for value in vector],
+            "metadata": {
+                "path": path,
+                "file_hash": file_hash,
+                "source": "obsidian",
+                "date": "2024-01-01",
+                "text": texts[i] if texts else f"{path} chunk {i}"
+            }
+        }
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def random_vectors(count, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top(vectors, query, k):
+    scores = vectors @ query
+    return list(np.argsort(-scores, kind="stable")[:k])
+
+
+def texts_of(results):
+    return [row["metadata"]["text"] for row in results]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalStore(str(tmp_path / "store"))
+
+
+def test_memmap_grows_with_inserts(store):
+    first = random_vectors(10, seed=1)
+    store.insert_rows(make_rows(first, path="a.md"))
+    assert store._vectors().shape == (10, DIM)
+    assert texts_of(store.search(first[3], 0.0, 1)) == ["a.md chunk 3"]
+
+    second = random_vectors(5, seed=2)
+    store.insert_rows(make_rows(second, path="b.md"))
+    assert store._vectors().shape == (15, DIM)
+    result = store.search(second[4], 0.0, 1)[0]
+    assert result["metadata"]["text"] == "b.md chunk 4"
+    assert result["similarity"] == pytest.approx(1.0, abs=1e-5)
+
+    # 다시 열어도 같은 행렬 (dim/dtype은 meta에 저장)
+    reopened = LocalStore(str(store.dir))
+    assert reopened.dim == DIM and reopened._vectors().shape == (15, DIM)
+
+
+def test_dimension_mismatch_is_rejected(store):
+    store.insert_rows(make_rows(random_vectors(2)))
+    with pytest.raises(ValueError):
+        store.insert_rows(make_rows(np.ones((1, DIM + 1))))
+    with pytest.raises(ValueError):
+        store.search([1.0] * (DIM + 1), 0.0, 1)
+
+
+def test_fts_follows_replace_and_delete(store):
+    vectors = random_vectors(2)
+    store.insert_rows(make_rows(vectors, path="a.md", texts=["kubernetes eviction", "budget review"]))
+    assert texts_of(store.lexical_search("eviction", vectors[0], 5)) == ["kubernetes eviction"]
+    # 접두사 일치
+    assert texts_of(store.lexical_search("kube", vectors[0], 5)) == ["kubernetes eviction"]
+
+    store.replace_rows(make_rows(vectors[:1], path="a.md", file_hash="h2", texts=["postgres vacuum"]))
+    assert store.lexical_search("eviction", vectors[0], 5) == []
+    assert store.lexical_search("budget", vectors[0], 5) == []
+    assert texts_of(store.lexical_search("vacuum", vectors[0], 5)) == ["postgres vacuum"]
+
+    store.delete_file("a.md", "h2")
+    assert store.lexical_search("vacuum", vectors[0], 5) == []
+
+
+def test_fts_skips_stopword_only_queries(store):
+    vectors = random_vectors(1)
+    store.insert_rows(make_rows(vectors, texts=["the a x 1 note"]))
+    assert store.lexical_search("the a x 1", vectors[0], 5) == []
+    assert len(store.lexical_search("the note", vectors[0], 5)) == 1
+
+
+def test_replace_rows_and_delete_file(store):
+    store.insert_rows(make_rows(random_vectors(3, seed=1), path="a.md"))
+    store.insert_rows(make_rows(random_vectors(2, seed=2), path="b.md"))
+
+    replacement = random_vectors(1, seed=3)
+    store.replace_rows(make_rows(replacement, path="a.md", file_hash="h2"))
+    assert store.stats()["total_count"] == 3
+    assert store.file_hashes("a") == {"a.md": {"h2"}}
+    assert store.search(replacement[0], 0.99, 5)[0]["metadata"]["path"] == "a.md"
+
+    # 다른 file_hash는 지우지 않는다
+    store.delete_file("b.md", "other")
+    assert store.stats()["total_count"] == 3
+    store.delete_file("b.md", "h1")
+    assert store.stats()["total_count"] == 1
+    assert {row["metadata"]["path"] for row in store.search(replacement[0], -1.0, 10)} == {"a.md"}
+
+
+def test_compact_keeps_results(store):
+    vectors = random_vectors(20)
+    for i, vector in enumerate(vectors):
+        store.insert_rows(make_rows([vector], path=f"{i}.md"))
+    for i in range(0, 20, 2):
+        store.replace_rows(make_rows([vectors[i]], path=f"{i}.md", file_hash="h2"))
+    assert store._file_rows() == 30
+
+    query = random_vectors(1, seed=9)[0]
+    before = [(row["metadata"]["path"], round(row["similarity"], 5)) for row in store.search(query, -1.0, 20)]
+    store.compact()
+    assert store._file_rows() == 20
+    after = [(row["metadata"]["path"], round(row["similarity"], 5)) for row in store.search(query, -1.0, 20)]
+    assert after == before
+
+
+def test_hnsw_tracks_inserts_and_deletes(tmp_path):
+    store = LocalStore(str(tmp_path / "store"), index="hnsw", hnsw_params={"ef_search": 64})
+    vectors = random_vectors(200)
+    store.insert_rows(make_rows(vectors[:150], path="a.md"))
+    store.flush()
+    assert store.hnsw_path.exists()
+
+    query = vectors[7]
+    assert store.search(query, 0.0, 1)[0]["metadata"]["text"] == "a.md chunk 7"
+
+    # 새 행은 그래프에 추가되고, 지운 행은 결과에 나오지 않는다
+    store.insert_rows(make_rows(vectors[150:], path="b.md"))
+    assert store.search(vectors[160], 0.0, 1)[0]["metadata"]["text"] == "b.md chunk 10"
+    store.delete_file("a.md", "h1")
+    assert all(row["metadata"]["path"] == "b.md" for row in store.search(query, -1.0, 10))
+    assert len(store._ann()) == 50
+
+    # 필터가 있으면 정확한 스캔
+    assert store.search(vectors[160], 0.0, 1, filters={"source": "obsidian"})[0]["metadata"]["text"] == "b.md chunk 10"
+
+
+@pytest.mark.parametrize("options", [
+    {"quantization": "int8"},
+    {"quantization": "binary"},
+    {"prefix_dimensions": 16},
+    {"prefix_dimensions": 16, "quantization": "int8"}
+])
+def test_two_stage_search_rescores_with_full_vectors(tmp_path, options):
+    store = LocalStore(str(tmp_path / "store"), rescore_factor=10, **options)
+    vectors = random_vectors(500)
+    store.insert_rows(make_rows(vectors))
+    assert store.two_stage and store.codes_path is not None
+
+    query = random_vectors(1, seed=5)[0]
+    results = store.search(query, -1.0, 5)
+    assert store.codes_path.exists()
+
+    # 유사도는 원본 벡터 기준, 순서도 그 유사도 순
+    for row in results:
+        index = int(row["metadata"]["text"].rsplit(" ", 1)[1])
+        assert row["similarity"] == pytest.approx(float(vectors[index] @ query), abs=1e-5)
+    similarities = [row["similarity"] for row in results]
+    assert similarities == sorted(similarities, reverse=True)
+
+    # 자기 자신 검색은 항상 1위 (후보 50개 안에 들어온다)
+    assert store.search(vectors[42], 0.0, 1)[0]["metadata"]["text"] == "notes/a.md chunk 42"
+
+    # 후보가 전체 행을 덮으면 정확한 검색과 같다 (id = slot + 1)
+    ids, slots = store._alive_slots()
+    wide = store._exact_top(query, ids, slots, -1.0, 5, rescore_factor=100)[0]
+    assert [row_id - 1 for row_id in wide] == exact_top(vectors, query, 5)
+
+
+def test_two_stage_codes_follow_inserts(tmp_path):
+    store = LocalStore(str(tmp_path / "store"), quantization="int8")
+    store.insert_rows(make_rows(random_vectors(50, seed=1), path="a.md"))
+    store.search(random_vectors(1)[0], 0.0, 1)
+    code_size = store._code_dtype().itemsize
+
+    more = random_vectors(30, seed=2)
+    store.insert_rows(make_rows(more, path="b.md"))
+    assert store.codes_path.stat().st_size == 80 * code_size
+    assert store.search(more[3], 0.0, 1)[0]["metadata"]["text"] == "b.md chunk 3"
+
+
+def test_reduce_dimensions(store):
+    vectors = random_vectors(10)
+    store.insert_rows(make_rows(vectors))
+    assert store.reduce_dimensions(16) == 10
+    assert store.dim == 16 and (store.dir / "vectors.bin.bak").exists()
+
+    prefix = vectors[:, :16] / np.linalg.norm(vectors[:, :16], axis=1, keepdims=True)
+    assert store.search(prefix[4], 0.0, 1)[0]["metadata"]["text"] == "notes/a.md chunk 4"
+    with pytest.raises(ValueError):
+        store.reduce_dimensions(16)
+
+
+def test_supabase_backfill_stops_on_partial_batch():
+    from storage import SupabaseStore
+
+    class Client:
+        """backfill_typed_columns RPC가 남은 행을 batch_size개씩 채우는 client"""
+
+        def __init__(self, pending):
+            self.pending = pending
+            self.calls = 0
+
+        def rpc(self, name, params):
+            assert name == "backfill_typed_columns"
+            self.calls += 1
+            updated = min(self.pending, params["batch_size"])
+            self.pending -= updated
+            return type("Query", (), {"execute": lambda _: type("Response", (), {"data": updated})()})()
+
+    store = SupabaseStore.__new__(SupabaseStore)
+    store.client = Client(pending=25)
+    progress = []
+    assert store.backfill_columns(batch_size=10, progress=progress.append) == 25
+    assert progress == [10, 20, 25]
+    # 마지막 배치가 batch_size보다 적으면 한 번 더 호출하지 않는다
+    assert store.client.calls == 3
@@ -0,0 +1,107 @@
+"""Tracer/span 측정과 JSONL/Prometheus 내보내기"""
+
+import json
+import threading
+
+import pytest
+
+from tracing import BUCKETS, JsonlExporter, PrometheusExporter, Trace, Tracer, bind, span
+
+
+def finished_trace(name: str, total_ms: float, **spans) -> Trace:
+    """duration을 정해 둔 trace (span 이름 → ms)"""
+    trace = Trace(name)
+    trace.duration_ms = total_ms
+    trace.spans = [{"name": span_name, "start_ms": 0.0, "duration_ms": ms} for span_name, ms in spans.items()]
+    return trace
+
+
+def test_prometheus_exporters_in_two_processes_accumulate(tmp_path):
+    path = tmp_path / "metrics.prom"
+    # 오래 떠 있는 ks serve와 한 번 실행되는 ks search가 번갈아 내보낸다
+    daemon = PrometheusExporter(path)
+    oneshot = PrometheusExporter(path)
+
+    daemon.export(finished_trace("search", 20, embed=8))
+    oneshot.export(finished_trace("search", 30, embed=9))
+    daemon.export(finished_trace("search", 40, embed=10))
+
+    reader = PrometheusExporter(path)
+    reader._load()
+    assert reader.series[("search", "total")]["count"] == 3
+    assert reader.series[("search", "embed")]["count"] == 3
+
+
+def test_nested_trace_and_spans():
+    tracer = Tracer()
+
+    # trace 밖의 span은 아무것도 하지 않는다
+    with span("outside"):
+        pass
+
+    with tracer.trace("search", query="q") as trace:
+        with span("embed"):
+            with span("embed.request"):
+                pass
+        with span("embed"):
+            pass
+        # search_many 안의 검색처럼 안쪽 trace는 바깥 trace를 그대로 쓴다
+        with tracer.trace("search") as inner:
+            assert inner is trace
+            with span("rank"):
+                pass
+
+        # bind로 감싸면 다른 스레드의 span도 같은 trace에 기록된다
+        def work():
+            with span("store.search"):
+                pass
+
+        worker = threading.Thread(target=bind(work))
+        worker.start()
+        worker.join()
+
+    assert [record["name"] for record in trace.spans].count("embed") == 2
+    assert list(trace.stages()) == ["embed.request", "embed", "rank", "store.search"]
+    assert trace.duration_ms is not None
+    assert trace.duration_ms >= trace.stages()["embed"]
+
+
+def test_jsonl_exporter_writes_one_line_per_trace(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(JsonlExporter(path))
+    for query in ("first", "second"):
+        with tracer.trace("search", query=query):
+            with span("embed", texts=1):
+                pass
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["attrs"]["query"] for line in lines] == ["first", "second"]
+    assert lines[0]["spans"][0]["name"] == "embed"
+    assert lines[0]["spans"][0]["attrs"] == {"texts": 1}
+    assert set(lines[0]["stages"]) == {"embed"}
+
+
+def test_prometheus_histogram_buckets_count_and_sum(tmp_path):
+    path = tmp_path / "metrics.prom"
+    exporter = PrometheusExporter(path)
+    exporter.export(finished_trace("search", 20, embed=8))
+    exporter.export(finished_trace("search", 300, embed=9))
+
+    text = path.read_text()
+    total = 'trace="search",span="total"'
+    assert f'ks_span_duration_seconds_bucket{{{total},le="0.01"}} 0' in text
+    assert f'ks_span_duration_seconds_bucket{{{total},le="0.025"}} 1' in text
+    assert f'ks_span_duration_seconds_bucket{{{total},le="0.25"}} 1' in text
+    assert f'ks_span_duration_seconds_bucket{{{total},le="0.5"}} 2' in text
+    assert f'ks_span_duration_seconds_bucket{{{total},le="+Inf"}} 2' in text
+    assert f'ks_span_duration_seconds_count{{{total}}} 2' in text
+    assert f'ks_span_duration_seconds_sum{{{total}}} 0.320000' in text
+    assert 'ks_span_duration_seconds_bucket{trace="search",span="embed",le="0.01"} 2' in text
+
+    # 파일에서 읽은 값이 내보낸 값과 같다 (round trip)
+    reader = PrometheusExporter(path)
+    reader._load()
+    assert reader.series == exporter.series
+    entry = reader.series[("search", "total")]
+    assert entry["buckets"] == [0, 0, 1, 1, 1, 1, 2] + [2] * (len(BUCKETS) - 7)
+    assert entry["sum"] == pytest.approx(0.32)